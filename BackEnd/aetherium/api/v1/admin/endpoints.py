@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from aetherium.database.db import get_db
@@ -12,12 +12,17 @@ from aetherium.schemas.user import (
 )
 from aetherium.schemas.category import CategoryCreate, CategoryResponse
 from aetherium.schemas.topic import TopicCreate, TopicResponse
-from aetherium.schemas.course import CourseResponse, CourseReviewRequest
+from aetherium.schemas.course import CourseListResponse, CourseResponse, CourseReviewRequest
 from aetherium.services.course_service import CourseService
 from aetherium.services.admin_service import AdminService
 from typing import List
 from aetherium.models.user import User
 from aetherium.models.courses import Topic, Course
+from aetherium.core.dependency import get_manager
+from aetherium.sockets.websocket import NotificationManager
+from aetherium.utils.token_blacklist import get_blacklist_filter
+from aetherium.services.progress_buffer import get_progress_buffer
+from aetherium.services.upload_executor import get_upload_executor
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -155,7 +160,7 @@ async def create_topic(
         raise HTTPException(status_code=403, detail="Not authorized")
     return CourseService.create_topic(db, topic_data)
 
-@router.get("/courses", response_model=List[CourseResponse])
+@router.get("/courses", response_model=List[CourseListResponse])
 async def get_all_courses(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -164,7 +169,7 @@ async def get_all_courses(
         raise HTTPException(status_code=403, detail="Not authorized")
     return CourseService.get_all_courses(db)
 
-@router.get("/courses/pending", response_model=List[CourseResponse])
+@router.get("/courses/pending", response_model=List[CourseListResponse])
 async def get_pending_courses(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -176,13 +181,14 @@ async def get_pending_courses(
 @router.get("/courses/{course_id}", response_model=CourseResponse)
 async def get_course_for_review(
     course_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role.name not in ["admin", "instructor"]:
 
         raise HTTPException(status_code=403, detail="Not authorized")
-    return CourseService.get_course_by_id(db, course_id)
+    return (await CourseService.get_course_by_id(db, course_id)).to_response(request)
 
 @router.post("/courses/{course_id}/review", response_model=CourseResponse)
 async def review_course(course_id: int,review_data: CourseReviewRequest,db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
@@ -278,4 +284,43 @@ def download_course_report(
             float(r.revenue)
         ])
     output.seek(0)
-    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=course_report.csv"})
\ No newline at end of file
+    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=course_report.csv"})
+
+# Runtime metrics of this worker's in-process components
+
+@router.get("/websocket/metrics")
+def get_websocket_metrics(
+    current_user: User = Depends(get_current_user),
+    manager: NotificationManager = Depends(get_manager)
+):
+    """Per-connection outbound queue depth and delivery counters for this worker"""
+    if current_user.role.name != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return manager.metrics()
+
+@router.get("/auth/blacklist-filter/metrics")
+def get_blacklist_filter_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Token blacklist filter size, Redis lookups saved and false-positive rate for this worker"""
+    if current_user.role.name != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return get_blacklist_filter().metrics()
+
+@router.get("/progress/heartbeat-buffer/metrics")
+def get_progress_buffer_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Buffered lesson heartbeats recorded and flushed by this worker"""
+    if current_user.role.name != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return get_progress_buffer().metrics()
+
+@router.get("/uploads/executor/metrics")
+def get_upload_executor_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Media upload concurrency, queue wait and transfer times per resource type for this worker"""
+    if current_user.role.name != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return get_upload_executor().metrics()
@@ -9,6 +9,8 @@ from aetherium.schemas.withdrawal import (
 )
 from aetherium.services.withdrawal_service import withdrawal_service
 from aetherium.models.withdrawal import WithdrawalStatus
+from aetherium.utils.pagination import COUNT_MODE_PATTERN
+from typing import Optional
 
 router = APIRouter(prefix="/admin/withdrawal", tags=["admin-withdrawal"])
 
@@ -17,6 +19,8 @@ async def get_all_withdrawal_requests(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=50),
     status_filter: str = Query(None, description="Filter by status: pending, approved, rejected, completed"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes precedence over page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -28,27 +32,26 @@ async def get_all_withdrawal_requests(
         )
     
     try:
-        result = withdrawal_service.get_all_withdrawal_requests(
-            db=db,
-            page=page,
-            limit=limit
-        )
-        
         # Filter by status if provided
+        filter_status = None
         if status_filter:
             try:
                 filter_status = WithdrawalStatus(status_filter)
-                result["requests"] = [
-                    req for req in result["requests"] 
-                    if req.status == filter_status
-                ]
-                result["total"] = len(result["requests"])
             except ValueError:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid status filter. Use: pending, approved, rejected, completed"
                 )
         
+        result = withdrawal_service.get_all_withdrawal_requests(
+            db=db,
+            page=page,
+            limit=limit,
+            status=filter_status,
+            cursor=cursor,
+            count=count
+        )
+        
         # Add instructor names
         for request in result["requests"]:
             if request.instructor:
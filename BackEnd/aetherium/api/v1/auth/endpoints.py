@@ -5,7 +5,10 @@ from aetherium.database.db import get_db
 from aetherium.models.user import User, Role
 from aetherium.schemas.user import UserCreate, UserResponse, Token, UserUpdate, OTPVerify, OTPSend, PasswordChange,MessageResponse,ForgotPasswordRequest,ResetPasswordRequest
 from aetherium.services.auth_service import create_user, update_user_bio, change_password, upload_profile_picture
-from aetherium.utils.jwt_utils import create_access_token, get_current_user,create_refresh_token,blacklist_token,is_token_blacklisted
+from aetherium.services.image_pipeline import avatar_variant
+from aetherium.utils.jwt_utils import create_access_token, get_current_user,create_refresh_token,is_token_blacklisted,blacklist_token_async,invalidate_user_cache_async
+from aetherium.core.dependency import get_redis
+from redis.asyncio import Redis
 from aetherium.utils.password_hash import verify_password,hash_password
 from aetherium.utils.email_utils import generate_otp, store_otp, verify_otp_code, send_otp_email,check_existing_reset_request,generate_reset_token,store_reset_token,delete_reset_token,verify_reset_token,send_password_reset_email
 from authlib.integrations.starlette_client import OAuth,OAuthError
@@ -187,7 +190,11 @@ async def google_exchange(request: Request, response: Response, db: Session = De
                 user.google_id = google_id
                 user.is_emailverified = True
                 user.profile_picture = profile_picture
+                # Derivatives belonged to the replaced upload
+                user.profile_picture_variants = None
+                user.profile_picture_blurhash = None
                 db.commit()
+                await invalidate_user_cache_async(request.app.state.redis, user.id)
                 logger.debug(f"Updated existing user with google_id: {google_id}")
             else:
                 default_role = db.query(Role).filter(Role.name == "user").first()
@@ -275,13 +282,15 @@ def upload_profile_picture_route(
     return {"message": "Profile picture uploaded successfully", "file_path": file_path}
 
 @router.get("/profile-picture/{user_id}")
-def get_profile_picture(user_id: int, db: Session = Depends(get_db)):
+def get_profile_picture(user_id: int, size: Optional[int] = None, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user or not user.profile_picture:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile picture not found")
-    if not os.path.exists(user.profile_picture):
+    # ?size=N: the smallest derivative covering N px
+    picture = avatar_variant(user, size) if size else user.profile_picture
+    if not os.path.exists(picture):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile picture file missing")
-    return FileResponse(user.profile_picture)
+    return FileResponse(picture)
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
@@ -299,11 +308,11 @@ async def get_current_user_info(
     return user
 
 @router.post("/logout")
-def logout(response: Response,request: Request,current_user: User = Depends(get_current_user)):
+async def logout(response: Response,request: Request,current_user: User = Depends(get_current_user),cache: Redis = Depends(get_redis)):
     logger.debug("Deleting cookies")
     access_token = request.cookies.get("access_token")
     if access_token:
-        blacklist_token(access_token, current_user.id)
+        await blacklist_token_async(cache, access_token, current_user.id)
     response.delete_cookie(key="access_token")
     response.delete_cookie(key="refresh_token")
     return {"message": "Logout successful"}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Form
-from sqlalchemy.orm import Session
-from aetherium.database.db import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from aetherium.database.db import get_async_db
 from aetherium.utils.jwt_utils import get_current_user
 from aetherium.models.user import User
 from aetherium.services.chat_service import ChatService
@@ -12,14 +12,16 @@ from aetherium.schemas.chat import (
 from typing import List, Optional
 from aetherium.core.dependency import get_manager
 from aetherium.sockets.websocket import NotificationManager
+from aetherium.utils.pagination import COUNT_MODE_PATTERN
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.get("/conversations")
-def get_conversations(
+async def get_conversations(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page (overrides page)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all conversations for the current user"""
@@ -27,29 +29,31 @@ def get_conversations(
     
     # Check if user is instructor or regular user
     if current_user.role.name == "instructor":
-        result = chat_service.get_instructor_conversations(current_user.id, page, limit)
+        result = await chat_service.get_instructor_conversations(current_user.id, page, limit, cursor)
         return InstructorConversationListResponse(**result)
     else:
-        result = chat_service.get_user_conversations(current_user.id, page, limit)
+        result = await chat_service.get_user_conversations(current_user.id, page, limit, cursor)
         return GroupedConversationListResponse(**result)
 
 @router.get("/conversations/{conversation_id}/messages", response_model=ChatMessageResponse)
-def get_conversation_messages(
+async def get_conversation_messages(
     conversation_id: int,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page (overrides page)"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get messages for a specific conversation"""
     chat_service = ChatService(db)
-    result = chat_service.get_conversation_messages(conversation_id, current_user.id, page, limit)
+    result = await chat_service.get_conversation_messages(conversation_id, current_user.id, page, limit, cursor, count)
     return ChatMessageResponse(**result)
 
 @router.post("/conversations", response_model=ConversationResponse)
-def create_conversation(
+async def create_conversation(
     conversation_data: ConversationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new conversation (only for users, not instructors)"""
@@ -60,16 +64,16 @@ def create_conversation(
         )
     
     chat_service = ChatService(db)
-    conversation = chat_service.get_or_create_conversation(current_user.id, conversation_data.course_id)
+    conversation = await chat_service.get_or_create_conversation(current_user.id, conversation_data.course_id)
     
     # Get conversation details
-    conv_details = chat_service.get_conversation_details(conversation, current_user.id)
+    conv_details = await chat_service.get_conversation_details(conversation, current_user.id)
     return ConversationResponse(**conv_details)
 
 @router.post("/messages", response_model=dict)
-async  def send_message(
+async def send_message(
     message_data: MessageCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     manager: NotificationManager = Depends(get_manager)
 ):
@@ -78,10 +82,10 @@ async  def send_message(
     return await chat_service.send_message(message_data=message_data, sender_id=current_user.id,manager=manager)
 
 @router.post("/messages/image")
-def send_image_message(
+async def send_image_message(
     conversation_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload and send an image message"""
@@ -100,12 +104,12 @@ def send_image_message(
         )
     
     chat_service = ChatService(db)
-    return chat_service.upload_image(file, conversation_id, current_user.id)
+    return await chat_service.upload_image(file, conversation_id, current_user.id)
 
 @router.get("/courses/{course_id}/conversation")
-def get_course_conversation(
+async def get_course_conversation(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get or create conversation for a specific course (for users only)"""
@@ -116,18 +120,20 @@ def get_course_conversation(
         )
     
     chat_service = ChatService(db)
-    conversation = chat_service.get_or_create_conversation(current_user.id, course_id)
+    conversation = await chat_service.get_or_create_conversation(current_user.id, course_id)
     
     # Get conversation details
-    conv_details = chat_service.get_conversation_details(conversation, current_user.id)
+    conv_details = await chat_service.get_conversation_details(conversation, current_user.id)
     return ConversationResponse(**conv_details)
 
 @router.get("/instructors/{instructor_id}/messages", response_model=GroupedChatMessageResponse)
-def get_instructor_messages(
+async def get_instructor_messages(
     instructor_id: int,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page (overrides page)"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all messages from all conversations with a specific instructor (for grouped conversations)"""
@@ -138,15 +144,17 @@ def get_instructor_messages(
         )
     
     chat_service = ChatService(db)
-    result = chat_service.get_instructor_messages(current_user.id, instructor_id, page, limit)
+    result = await chat_service.get_instructor_messages(current_user.id, instructor_id, page, limit, cursor, count)
     return GroupedChatMessageResponse(**result)
 
 @router.get("/users/{user_id}/messages", response_model=GroupedChatMessageResponse)
-def get_user_messages(
+async def get_user_messages(
     user_id: int,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page (overrides page)"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all messages from all conversations with a specific user (for instructors)"""
@@ -157,13 +165,13 @@ def get_user_messages(
         )
     
     chat_service = ChatService(db)
-    result = chat_service.get_instructor_user_messages(user_id, current_user.id, page, limit)
+    result = await chat_service.get_instructor_user_messages(user_id, current_user.id, page, limit, cursor, count)
     return GroupedChatMessageResponse(**result)
 
 @router.post("/instructors/messages", response_model=dict)
 async def send_message_to_instructor(
     message_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send a message to an instructor (for grouped conversations)"""
@@ -185,7 +193,7 @@ async def send_message_to_instructor(
 async def send_image_message_to_instructor(
     file: UploadFile = File(...),
     instructor_id: int = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send an image message to an instructor (for grouped conversations)"""
@@ -215,7 +223,7 @@ async def send_image_message_to_instructor(
 @router.post("/users/messages", response_model=dict)
 async def send_message_to_user(
     message_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send a message to a user (for instructors)"""
@@ -237,7 +245,7 @@ async def send_message_to_user(
 async def send_image_message_to_user(
     file: UploadFile = File(...),
     user_id: int = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send an image message to a user (for instructors)"""
@@ -265,19 +273,19 @@ async def send_image_message_to_user(
     return await chat_service.send_image_message_to_instructor(user_id, current_user.id, file)
 
 @router.post("/conversations/{conversation_id}/mark-read")
-def mark_conversation_messages_as_read(
+async def mark_conversation_messages_as_read(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark all messages in a conversation as read"""
     chat_service = ChatService(db)
-    return chat_service.mark_conversation_messages_as_read(conversation_id, current_user.id)
+    return await chat_service.mark_conversation_messages_as_read(conversation_id, current_user.id)
 
 @router.post("/instructors/{instructor_id}/mark-read")
-def mark_instructor_messages_as_read(
+async def mark_instructor_messages_as_read(
     instructor_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark all messages from an instructor as read (for users)"""
@@ -287,12 +295,12 @@ def mark_instructor_messages_as_read(
             detail="Instructors cannot access this endpoint"
         )
     chat_service = ChatService(db)
-    return chat_service.mark_instructor_messages_as_read(instructor_id, current_user.id)
+    return await chat_service.mark_instructor_messages_as_read(instructor_id, current_user.id)
 
 @router.post("/users/{user_id}/mark-read")
-def mark_user_messages_as_read(
+async def mark_user_messages_as_read(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark all messages from a user as read (for instructors)"""
@@ -302,12 +310,12 @@ def mark_user_messages_as_read(
             detail="Only instructors can access this endpoint"
         )
     chat_service = ChatService(db)
-    return chat_service.mark_user_messages_as_read(user_id, current_user.id)
+    return await chat_service.mark_user_messages_as_read(user_id, current_user.id)
 
 @router.post("/typing/start")
 async def start_typing(
     typing_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send typing start indicator"""
@@ -340,7 +348,7 @@ async def start_typing(
 @router.post("/typing/stop")
 async def stop_typing(
     typing_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send typing stop indicator"""
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query, Header
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session,Query
-from aetherium.database.db import get_db
+from sqlalchemy.orm import Session
+from aetherium.database.db import get_db, get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
+from aetherium.core.dependency import get_redis
 from aetherium.utils.jwt_utils import get_current_user
+from aetherium.utils.upload_staging import stage_upload
+from aetherium.services.upload_session_service import UploadSessionService
+from aetherium.services.upload_progress import read_upload_status, upload_status_response
 from aetherium.models.user import User
 from aetherium.models.courses import Course,Section,Lesson
 from aetherium.services.course_service import CourseService
@@ -12,7 +18,12 @@ import os
 import shutil
 from pathlib import Path
 from aetherium.services.lesson_service import LessonService
-from aetherium.schemas.lesson import LessonCreate, LessonUpdate, LessonResponse,LessonContentCreate, AssessmentCreate
+from aetherium.services.curriculum_cache import invalidate_curriculum_totals_async
+from aetherium.services.course_graph_cache import bump_content_version
+from aetherium.services.media_index import MediaIndex
+from aetherium.services.progress_service import discount_removed_lessons, remove_course_progress
+from aetherium.services.search import get_course_search
+from aetherium.schemas.lesson import LessonCreate, LessonUpdate, LessonResponse,LessonContentCreate, AssessmentCreate, LessonBatchCreate, LessonBatchResponse, LessonOrder, UploadSessionCreate, UploadSessionResponse
 from aetherium.core.logger import logger
 from celery.result import AsyncResult
 from aetherium.services.instructoranalytics_service import CourseAnalyticsService
@@ -52,6 +63,9 @@ async def update_course_step1(
         if value is not None:
             setattr(course, field, value)
 
+    db.flush()
+    get_course_search().refresh_course(db, course.id)
+    bump_content_version(db, course.id)
     db.commit()
     db.refresh(course)
     return course
@@ -134,6 +148,23 @@ async def update_course_step3(course_id: int,db: Session = Depends(get_db),curre
     db.refresh(course)
     return course
 
+@router.put("/courses/{course_id}/curriculum", response_model=CurriculumSaveResponse)
+async def save_course_curriculum(
+    course_id: int,
+    course_data: CourseCreateStep3,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Course builder save/autosave of sections and lessons; send back the returned ids on the next save"""
+    if current_user.role.name != "instructor":
+        raise HTTPException(status_code=403, detail="Instructor access required")
+    
+    result, unused_media = CourseService.update_course_step3_with_lessons(db, course_id, course_data, current_user.id)
+    if result["changed"]:
+        await invalidate_curriculum_totals_async(course_id)
+        await MediaIndex.delete_unused_async(unused_media)
+    return result
+
 @router.put("/courses/{course_id}/step4", response_model=CourseResponse)
 async def update_course_step4(
     course_id: int,
@@ -162,7 +193,7 @@ async def submit_course(
     return course
 
 
-@router.get("/courses/drafts", response_model=List[CourseResponse])
+@router.get("/courses/drafts", response_model=List[CourseListResponse])
 async def get_drafts(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -174,7 +205,7 @@ async def get_drafts(
     return CourseService.get_instructor_drafts(db, current_user.id)
 
 
-@router.get("/courses/pending-approval", response_model=List[CourseResponse])
+@router.get("/courses/pending-approval", response_model=List[CourseListResponse])
 async def get_pending_approval(db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
     
     if current_user.role.name != "instructor":
@@ -182,7 +213,7 @@ async def get_pending_approval(db: Session = Depends(get_db),current_user: User
     
     return CourseService.get_instructor_pending_courses(db, current_user.id)
 
-@router.get("/courses/my-courses", response_model=List[CourseResponse])
+@router.get("/courses/my-courses", response_model=List[CourseListResponse])
 async def get_my_courses(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -236,8 +267,16 @@ async def delete_course(
         raise HTTPException(status_code=403, detail="Instructor access required")
     
     course = CourseService.get_instructor_course(db, course_id, current_user.id)
+    lesson_ids = [
+        lesson_id for (lesson_id,) in
+        db.query(Lesson.id).join(Section, Section.id == Lesson.section_id).filter(Section.course_id == course_id)
+    ]
+    unused_media = MediaIndex.release_lessons(db, lesson_ids)
+    remove_course_progress(db, course_id)
     db.delete(course)
     db.commit()
+    await invalidate_curriculum_totals_async(course_id)
+    await MediaIndex.delete_unused_async(unused_media)
     return {"message": "Course deleted successfully"}
 
 @router.get("/courses/search/instructors")
@@ -297,8 +336,10 @@ async def create_section(
     # Create the section
     new_section = Section(course_id=course_id, name=section_data.name)
     db.add(new_section)
+    bump_content_version(db, course_id)
     db.commit()
     db.refresh(new_section)
+    await invalidate_curriculum_totals_async(course_id)
     return new_section
 
 @router.put("/sections/{section_id}", response_model=SectionResponse)
@@ -321,6 +362,7 @@ async def update_section(
         raise HTTPException(status_code=403, detail="Not authorized to update this section")
 
     section.name = section_data.name
+    bump_content_version(db, course.id)
     db.commit()
     db.refresh(section)
     return section
@@ -344,8 +386,14 @@ async def delete_section(
     if not course:
         raise HTTPException(status_code=403, detail="Not authorized to delete this section")
 
+    lesson_ids = [lesson_id for (lesson_id,) in db.query(Lesson.id).filter(Lesson.section_id == section_id)]
+    unused_media = MediaIndex.release_lessons(db, lesson_ids)
+    discount_removed_lessons(db, lesson_ids, [section_id])
     db.delete(section)
+    bump_content_version(db, course.id)
     db.commit()
+    await invalidate_curriculum_totals_async(course.id)
+    await MediaIndex.delete_unused_async(unused_media)
     return {"message": "Section deleted successfully"}
 
 
@@ -464,49 +512,120 @@ async def upload_lesson_file(
 
     """Handle file uploads with size-based processing"""
     try:
-        # Verify file content immediately
-        file_content = await file.read()
-        if len(file_content) == 0:
-            raise HTTPException(status_code=400, detail="Uploaded file is empty")
-        
-        # Verify PDF header if it's a PDF
-        if file_type == "pdf" and not file_content.startswith(b'%PDF-'):
-            raise HTTPException(status_code=400, detail="Invalid PDF file format")
+        # Spool to disk in chunks instead of reading the whole file into memory
+        staged = await stage_upload(file)
+        service = LessonService(db)
+        return await service.upload_staged_file(
+            lesson_id=lesson_id,
+            staged=staged,
+            file_type=file_type,
+            filename=file.filename,
+            user_id=current_user.id
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="File upload failed")
+
+# Resumable uploads: create a session, PUT chunks at the committed offset, then complete it
+def _require_lesson_owner(db: Session, lesson_id: int, current_user) -> None:
+    """The current user must be the instructor of the lesson's course"""
+    if current_user.role.name != "instructor":
+        raise HTTPException(status_code=403, detail="Instructor access required")
+    instructor_id = db.query(Course.instructor_id).join(Section, Section.course_id == Course.id).join(
+        Lesson, Lesson.section_id == Section.id
+    ).filter(Lesson.id == lesson_id).scalar()
+    if instructor_id is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    if instructor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to upload files to this lesson")
 
-        # Create new stream for processing
-        file_stream = io.BytesIO(file_content)
-        file_stream.seek(0)
+@router.post("/lessons/{lesson_id}/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    lesson_id: int,
+    data: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    cache: Redis = Depends(get_redis),
+    current_user = Depends(get_current_user)
+):
+    """Start a resumable lesson file upload"""
+    _require_lesson_owner(db, lesson_id, current_user)
+    return await UploadSessionService.create_session(cache, lesson_id, current_user.id, data)
 
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    upload_id: str,
+    cache: Redis = Depends(get_redis),
+    current_user = Depends(get_current_user)
+):
+    """Committed offset of a resumable upload; resume by sending the chunk starting there"""
+    return await UploadSessionService.get_status(cache, upload_id, current_user.id)
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256", pattern="^[0-9a-fA-F]{64}$"),
+    cache: Redis = Depends(get_redis),
+    current_user = Depends(get_current_user)
+):
+    """Append the raw request body at offset; X-Chunk-SHA256 is the body's hex SHA-256"""
+    return await UploadSessionService.write_chunk(
+        cache, upload_id, current_user.id, offset, chunk_sha256, request.stream()
+    )
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    cache: Redis = Depends(get_redis),
+    current_user = Depends(get_current_user)
+):
+    """Hand a fully received upload to the lesson upload pipeline (same response as upload-file)"""
+    session = await UploadSessionService.get_session(cache, upload_id, current_user.id)
+    # The course may have changed hands since the session was created
+    _require_lesson_owner(db, int(session["lesson_id"]), current_user)
+    lesson_id, file_type, staged = await UploadSessionService.complete(cache, upload_id, current_user.id)
+    try:
         service = LessonService(db)
-        
-        if len(file_content) > 10 * 1024 * 1024:  # >10MB - Celery path
-            return await service.upload_lesson_file_async(
-                lesson_id=lesson_id,
-                file_stream=file_stream,
-                file_type=file_type,
-                filename=file.filename
-            )
-        else:
-            result= await service.upload_lesson_file(
-                lesson_id=lesson_id,
-                file_stream=file_stream,
-                file_type=file_type,
-                filename=file.filename
-            )
-            result["status"] = "completed"
-            return result
+        return await service.upload_staged_file(
+            lesson_id=lesson_id,
+            staged=staged,
+            file_type=file_type,
+            filename=staged.filename,
+            user_id=current_user.id
+        )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="File upload failed")
 
+@router.delete("/uploads/{upload_id}")
+async def abort_upload_session(
+    upload_id: str,
+    cache: Redis = Depends(get_redis),
+    current_user = Depends(get_current_user)
+):
+    """Cancel a resumable upload and discard the received bytes"""
+    await UploadSessionService.abort(cache, upload_id, current_user.id)
+    return {"message": "Upload cancelled"}
+
 @router.get("/lessons/upload-status/{task_id}")
-async def check_task_status(
+def check_task_status(
     task_id: str,
     current_user = Depends(get_current_user)
 ):
-    """Check specific task status by task_id"""
+    """Check specific task status by task_id (live progress is pushed as upload_progress WebSocket events)"""
+    # The snapshot the task keeps in Redis; the Celery result backend is only asked for older tasks
+    snapshot = read_upload_status(task_id)
+    if snapshot:
+        if snapshot.get("user_id") not in (None, current_user.id):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return upload_status_response(snapshot)
+
     try:
         from celery.result import AsyncResult
         task_result = AsyncResult(task_id)
@@ -573,7 +692,7 @@ async def add_text_content(
 @router.post("/sections/{section_id}/lessons/reorder")
 async def reorder_lessons(
     section_id: int,
-    lesson_orders: List[Dict[str, int]],
+    lesson_orders: List[LessonOrder],
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -584,21 +703,17 @@ async def reorder_lessons(
         raise HTTPException(status_code=400, detail="Failed to reorder lessons")
     return {"message": "Lessons reordered successfully"}
 
-@router.post("/lessons/bulk-create")
+@router.post("/lessons/bulk-create", response_model=LessonBatchResponse)
 async def bulk_create_lessons(
-    lessons: List[Dict[str, Any]],
+    lessons: List[LessonBatchCreate],
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Bulk create lessons"""
+    if current_user.role.name != "instructor":
+        raise HTTPException(status_code=403, detail="Instructor access required")
     service = LessonService(db)
-    created_lessons = []
-    
-    for lesson_data in lessons:
-        section_id = lesson_data.pop("section_id")
-        lesson_create = LessonCreate(**lesson_data)
-        lesson = await service.create_lesson(section_id, lesson_create)
-        created_lessons.append(lesson)
+    created_lessons = await service.bulk_create_lessons(lessons, instructor_id=current_user.id)
     
     return {"lessons": created_lessons, "count": len(created_lessons)}
 
@@ -607,14 +722,15 @@ async def bulk_create_lessons(
 async def update_lesson_progress(
     lesson_id: int,
     progress_data: Dict[str, Any],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    cache: Redis = Depends(get_redis),
     current_user = Depends(get_current_user)
 ):
     """Update lesson progress for current user"""
     from aetherium.services.progress_service import ProgressService
     from aetherium.schemas.progress import LessonProgressUpdate
     
-    service = ProgressService(db)
+    service = ProgressService(db, cache)
     progress_update = LessonProgressUpdate(**progress_data)
     
     return await service.update_lesson_progress(
@@ -624,7 +740,7 @@ async def update_lesson_progress(
 @router.get("/lessons/{lesson_id}/progress")
 async def get_lesson_progress(
     lesson_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Get lesson progress for current user"""
@@ -632,7 +748,7 @@ async def get_lesson_progress(
     if current_user.role.name != "instructor":
         raise HTTPException(status_code=403, detail="Instructor access required")
     service = ProgressService(db)
-    progress = service.get_lesson_progress(current_user.id, lesson_id)
+    progress = await service.get_lesson_progress(current_user.id, lesson_id)
     
     if not progress:
         # Return default progress if none exists
@@ -8,6 +8,8 @@ from aetherium.utils.jwt_utils import get_current_user
 from aetherium.models.user import User
 from aetherium.services.user_course.review_service import ReviewService
 from aetherium.core.logger import logger
+from aetherium.utils.pagination import COUNT_MODE_PATTERN
+from typing import Optional
 
 router = APIRouter()
 
@@ -31,11 +33,13 @@ async def get_course_reviews(
     course_id: int,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes precedence over page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN),
     db: Session = Depends(get_db)
 ):
     """Get course reviews with pagination"""
     logger.info(f"Request received for course {course_id} reviews, page {page}")
-    return ReviewService.get_course_reviews(db, course_id, page, limit)
+    return ReviewService.get_course_reviews(db, course_id, page, limit, cursor, count)
 
 @router.put('/courses/{course_id}/reviews', response_model=CourseReviewsListResponse)
 async def update_review(
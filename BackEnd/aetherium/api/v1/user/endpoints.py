@@ -1,14 +1,20 @@
 from aetherium.services.user_course.user_course_service import UserCourseService
+from aetherium.services.user_course.catalog_service import CatalogService
+from aetherium.utils.pagination import COUNT_MODE_PATTERN, Keyset
 from aetherium.services.user_course.cart_service import CartService
 from aetherium.services.user_course.purchase_service import PurchaseService
 from aetherium.services.user_course.progress_service import ProgressService
 from aetherium.services.user_course.review_service import ReviewService
 from aetherium.services.user_course.wishlist_service import WishlistService
 from aetherium.services.razorpay_service import *
-from fastapi import APIRouter,Query,Depends,HTTPException
-from typing import Optional,List
+from fastapi import APIRouter,Query,Depends,HTTPException,Request,Response
+from typing import Optional,List,Union
 from sqlalchemy.orm import Session,joinedload
-from aetherium.database.db import get_db
+from aetherium.database.db import get_db, get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
+from aetherium.core.dependency import get_redis
+from aetherium.services.progress_buffer import ProgressHeartbeatBuffer, get_progress_buffer
 from aetherium.schemas.user_course import *
 from aetherium.schemas.user_course import CourseFilters,CartItemCreate,CartResponse,PurchaseResponse,PurchaseCreate,CourseProgressResponse,CourseProgressUpdate,CourseReviewUpdate,CourseReviewResponse,CourseReviewCreate,WishlistItemCreate,WishlistItemResponse,PaginatedCoursesResponse,OrderHistoryResponse,OrderDetailResponse
 from aetherium.schemas.course import CourseResponse
@@ -19,7 +25,7 @@ from aetherium.models.user_course import Purchase,Cart
 from aetherium.models.courses.progress import CourseProgress
 from aetherium.services.progress_service import ProgressService
 from aetherium.schemas.progress import (
-    LessonProgressUpdate, LessonProgressResponse,
+    LessonProgressUpdate, LessonProgressResponse, LessonHeartbeatResponse,
     SectionProgressResponse, CourseProgressResponse
 )
 from aetherium.services.wallet_service import wallet_service
@@ -44,27 +50,42 @@ async def get_published_courses(
     category: Optional[int] = Query(None),
     level: Optional[str] = Query(None),
     language: Optional[str] = Query(None),
+    price: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     limit: int = Query(12, ge=1, le=50),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes precedence over page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN),
+    facets: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    cache: Redis = Depends(get_redis)
 ):
     filters = CourseFilters(
         search=search,
         category=category,
         level=level,
         language=language,
+        price=price,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        count=count
     )
-    return UserCourseService.get_published_courses(db, filters)
+    result = await UserCourseService.get_published_courses(db, filters)
+    if facets:
+        # Counts per category/level/language/price range for the current search
+        result["facets"] = await CatalogService.get_facets(db, filters, cache)
+    return result
 
 @router.get("/courses/{course_id}", response_model=CourseResponse)
 async def get_course_details(
     course_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return UserCourseService.get_course_details(db, course_id, current_user.id if current_user else None)
+    # Cached JSON with an ETag; If-None-Match on an unchanged course gets a 304
+    graph = await UserCourseService.get_course_details(db, course_id, current_user.id if current_user else None)
+    return graph.to_response(request)
 
 @router.get("/courses/{course_id}/purchase-status")
 async def check_course_purchase_status(
@@ -205,24 +226,28 @@ async def remove_from_wishlist(
 
 @router.get("/orders", response_model=List[OrderHistoryResponse])
 async def get_order_history(
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; takes precedence over page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role.name != "user":
         raise HTTPException(status_code=403, detail="User access required")
     
-    offset = (page - 1) * limit
-    
-    orders = db.query(Purchase).options(
+    keyset = Keyset(Purchase.purchased_at, Purchase.id)
+    orders = keyset.paginate(db.query(Purchase).options(
         joinedload(Purchase.course).joinedload(Course.instructor),
         joinedload(Purchase.course).joinedload(Course.category)
     ).filter(
         Purchase.user_id == current_user.id,
         Purchase.status == PurchaseStatus.COMPLETED
-    ).order_by(Purchase.purchased_at.desc()).offset(offset).limit(limit).all()
+    ), cursor, page, limit).all()
     
+    orders, next_cursor = keyset.split(orders, limit, lambda order: (order.purchased_at, order.id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return orders
 
 @router.get("/orders/{order_id}", response_model=OrderDetailResponse)
@@ -328,21 +353,21 @@ async def get_wallet_transactions(current_user: User = Depends(get_current_user)
 
 @router.get("/progress/courses", response_model=List[CourseProgressResponse])
 async def get_user_course_progress(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """Get all course progress for current user"""
     service = ProgressService(db)
-    return service.get_user_course_progress_summary(current_user.id)
+    return await service.get_user_course_progress_summary(current_user.id)
 
 
 
 @router.get("/progress/courses/{course_id}", response_model=CourseProgressResponse)
-async def get_course_progress(course_id: int,db: Session = Depends(get_db),current_user = Depends(get_current_user)
+async def get_course_progress(course_id: int,db: AsyncSession = Depends(get_async_db),current_user = Depends(get_current_user)
 ):
     """Get course progress for current user"""
     service = ProgressService(db)
-    progress = service.get_course_progress(current_user.id, course_id)
+    progress = await service.get_course_progress(current_user.id, course_id)
     
     if not progress:
         raise HTTPException(status_code=404, detail="Course progress not found")
@@ -352,52 +377,61 @@ async def get_course_progress(course_id: int,db: Session = Depends(get_db),curre
 
 """Get section progress for current user"""
 @router.get("/progress/sections/{section_id}", response_model=SectionProgressResponse)
-async def get_section_progress(section_id: int,db: Session = Depends(get_db),current_user = Depends(get_current_user)):
+async def get_section_progress(section_id: int,db: AsyncSession = Depends(get_async_db),current_user = Depends(get_current_user)):
 
     service = ProgressService(db)
-    progress = service.get_section_progress(current_user.id, section_id)
+    progress = await service.get_section_progress(current_user.id, section_id)
     
     if not progress:
         raise HTTPException(status_code=404, detail="Section progress not found")
     
     return progress
 
-@router.get("/progress/lessons/{lesson_id}", response_model=LessonProgressResponse)
+@router.get("/progress/lessons/{lesson_id}", response_model=Union[LessonProgressResponse, LessonHeartbeatResponse])
 async def get_lesson_progress(
     lesson_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    buffer: ProgressHeartbeatBuffer = Depends(get_progress_buffer),
     current_user = Depends(get_current_user)
 ):
     """Get lesson progress for current user"""
     service = ProgressService(db)
-    progress = service.get_lesson_progress(current_user.id, lesson_id)
+    progress = await service.get_lesson_progress(current_user.id, lesson_id)
+    pending = await buffer.pending(current_user.id, lesson_id)
     
     if not progress:
+        # Pinged, but the row is only written by the next flush
+        if pending:
+            return ProgressService.buffered(current_user.id, lesson_id, pending)
         raise HTTPException(status_code=404, detail="Lesson progress not found")
     
-    return progress
+    # Include heartbeats that are still waiting for the next flush
+    return ProgressService.with_pending(progress, pending)
 
-@router.post("/progress/lessons/{lesson_id}", response_model=LessonProgressResponse)
+@router.post("/progress/lessons/{lesson_id}", response_model=Union[LessonProgressResponse, LessonHeartbeatResponse])
 async def update_lesson_progress(
     lesson_id: int,
     progress_data: LessonProgressUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    cache: Redis = Depends(get_redis),
+    buffer: ProgressHeartbeatBuffer = Depends(get_progress_buffer),
     current_user = Depends(get_current_user)
 ):
-    """Update lesson progress for current user"""
-    service = ProgressService(db)
-    return await service.update_lesson_progress(
-        current_user.id, lesson_id, progress_data
+    """Update lesson progress for current user (buffered unless completion changes)"""
+    service = ProgressService(db, cache)
+    return await service.record_heartbeat(
+        current_user.id, lesson_id, progress_data, buffer
     )
 
 @router.post("/progress/lessons/{lesson_id}/complete")
 async def complete_lesson(
     lesson_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    cache: Redis = Depends(get_redis),
     current_user = Depends(get_current_user)
 ):
     """Mark lesson as completed"""
-    service = ProgressService(db)
+    service = ProgressService(db, cache)
     progress_update = LessonProgressUpdate(
         progress_percentage=100.0,
         is_completed=True
@@ -449,15 +483,17 @@ def verify_certificate_generation(course_id:int,db:Session=Depends(get_db),curre
 async def update_lesson_time(
     lesson_id: int,
     time_spent: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    cache: Redis = Depends(get_redis),
+    buffer: ProgressHeartbeatBuffer = Depends(get_progress_buffer),
     current_user = Depends(get_current_user)
 ):
     """Update time spent on lesson"""
-    service = ProgressService(db)
+    service = ProgressService(db, cache)
     progress_update = LessonProgressUpdate(time_spent=time_spent)
     
-    return await service.update_lesson_progress(
-        current_user.id, lesson_id, progress_update
+    return await service.record_heartbeat(
+        current_user.id, lesson_id, progress_update, buffer
     )
 
 # Test endpoint to verify router is working
@@ -29,6 +29,40 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
 
+    # Database connection pools, one per engine and per process (API worker or Celery worker).
+    # Together they stay within the 15 connections (5 + 10 overflow) the single sync engine used
+    DB_SYNC_POOL_SIZE: int = 3
+    DB_SYNC_MAX_OVERFLOW: int = 4
+    DB_ASYNC_POOL_SIZE: int = 4
+    DB_ASYNC_MAX_OVERFLOW: int = 4
+    # Shared by both pools
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Seconds an authenticated user stays cached per access token
+    AUTH_USER_CACHE_TTL: int = 300
+
+    # Seconds between bulk writes of buffered lesson time/progress heartbeats
+    PROGRESS_FLUSH_INTERVAL: float = 5.0
+
+    # Course search backend: "postgres" (tsvector + pg_trgm) or "memory" (in-process index)
+    SEARCH_BACKEND: str = "postgres"
+
+    # Lesson uploads are spooled here before upload; the API and the Celery workers must share it
+    UPLOAD_STAGING_DIR: str = "staging/uploads"
+    # Larger lesson files are uploaded by a Celery task instead of within the request
+    DIRECT_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    # Media storage driver (services.media_storage): "cloudinary", or "local" (files under LOCAL_MEDIA_DIR, served at /uploads)
+    MEDIA_UPLOAD_BACKEND: str = "cloudinary"
+    LOCAL_MEDIA_DIR: str = "uploads/media"
+    # Concurrent media uploads per worker process, per Cloudinary resource type (pdf/raw files and deletes: RAW)
+    UPLOAD_CONCURRENCY_VIDEO: int = 2
+    UPLOAD_CONCURRENCY_IMAGE: int = 8
+    UPLOAD_CONCURRENCY_RAW: int = 4
+    # Processes resizing uploaded images (profile pictures, chat images), and the largest image accepted
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_MAX_PIXELS: int = 40_000_000
     
     # Google
     # Stripe
@@ -3,4 +3,8 @@ from fastapi import Request
 from aetherium.sockets.websocket import NotificationManager
 def get_manager(request: Request)->NotificationManager:
     """Dependency to get the notification manager"""
-    return request.app.state.notification_manager
\ No newline at end of file
+    return request.app.state.notification_manager
+
+def get_redis(request: Request):
+    """Dependency to get the shared async Redis client"""
+    return request.app.state.redis
@@ -0,0 +1,41 @@
+# core/redis_client.py
+from typing import Optional
+import redis
+from redis.asyncio import Redis as AsyncRedis
+
+from aetherium.config import settings
+
+_sync_client: Optional[redis.Redis] = None
+_async_client: Optional[AsyncRedis] = None
+
+
+def _connection_options() -> dict:
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "decode_responses": True,
+    }
+
+
+def get_sync_redis() -> redis.Redis:
+    """Process-wide sync client, for sync services, sync routes and Celery tasks"""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis(**_connection_options())
+    return _sync_client
+
+
+def get_async_redis() -> AsyncRedis:
+    """Process-wide async client; the app's event loop uses it as app.state.redis (core.dependency.get_redis)"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncRedis(**_connection_options())
+    return _async_client
+
+
+async def close_async_redis() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -1,13 +1,38 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from aetherium.config import settings
 
 DATABASE_URL=settings.DATABASE_URL
+# Same database through asyncpg for the async request path
+ASYNC_DATABASE_URL=make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
 
-engine=create_engine(DATABASE_URL)
+POOL_OPTIONS = {
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# Sync engine: Celery tasks, scripts and the endpoints not yet moved to AsyncSession
+engine=create_engine(
+    DATABASE_URL,
+    pool_size=settings.DB_SYNC_POOL_SIZE,
+    max_overflow=settings.DB_SYNC_MAX_OVERFLOW,
+    **POOL_OPTIONS
+)
 SessionLocal=sessionmaker(autocommit=False,autoflush=False,bind=engine)
 Base=declarative_base()
 
+# Async engine: hot request paths (auth, chat, progress, catalog)
+async_engine=create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    **POOL_OPTIONS
+)
+AsyncSessionLocal=async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
 def get_db():
     db=SessionLocal()
     try:
@@ -15,6 +40,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # from sqlalchemy import create_engine
 # from sqlalchemy.orm import sessionmaker, declarative_base
 # from aetherium.config import settings
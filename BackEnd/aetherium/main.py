@@ -1,15 +1,21 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
 from aetherium.api.v1 import auth_router, admin_router, instructor_router, user_router,chat_router, admin_bank_router, admin_withdrawal_request_router
 from aetherium.api.v1.instructor import withdrawal_router as instructor_withdrawal_router
 from aetherium.api.v1.admin import admin_withdrawal_router
-from aetherium.database.db import engine, Base
+from aetherium.database.db import engine, async_engine, Base
 from aetherium.middleware.auth_middleware import add_session_middleware, startup_redis, shutdown_redis
 from aetherium.sockets.websocket import get_notification_manager
 from aetherium.sockets.websocket import router as websocket_router
+from aetherium.utils.token_blacklist import get_blacklist_filter
+from aetherium.services.progress_buffer import get_progress_buffer
+from aetherium.utils.upload_staging import purge_stale_staged_files
+from aetherium.services.upload_executor import get_upload_executor
+from aetherium.services.image_pipeline import get_image_pipeline
+from aetherium.utils.media_files import MediaFiles
+from aetherium.config import settings
 import logging
 
 
@@ -23,8 +29,18 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await startup_redis(app)
+    await get_notification_manager().start(app.state.redis)
+    await get_blacklist_filter().start(app.state.redis)
+    await get_progress_buffer().start(app.state.redis)
+    purge_stale_staged_files()
     yield 
+    await get_progress_buffer().stop()
+    get_upload_executor().shutdown()
+    get_image_pipeline().shutdown()
+    await get_blacklist_filter().stop()
+    await get_notification_manager().stop()
     await shutdown_redis(app)
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -44,7 +60,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Set-Cookie"],
+    expose_headers=["Set-Cookie", "X-Next-Cursor"],
 )
 
 # Mount static files for uploads
@@ -52,7 +68,12 @@ uploads_dir = "uploads"
 if not os.path.exists(uploads_dir):
     os.makedirs(uploads_dir)
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Local media files get unique names, so they are cached for good; Range requests are served for seeking
+app.mount(
+    "/uploads",
+    MediaFiles(directory=uploads_dir, immutable_prefixes=[os.path.relpath(settings.LOCAL_MEDIA_DIR, uploads_dir)]),
+    name="uploads"
+)
 
 app.state.notification_manager = get_notification_manager()
 # Middleware and Routers
@@ -70,4 +91,3 @@ app.include_router(websocket_router)
 
 # DB & Static Files
 # Base.metadata.create_all(bind=engine)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
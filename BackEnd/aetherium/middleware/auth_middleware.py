@@ -1,17 +1,8 @@
 from starlette.middleware.sessions import SessionMiddleware
 from aetherium.config import settings
 from fastapi import FastAPI
-import redis.asyncio as redis
-from redis.asyncio import Redis
+from aetherium.core.redis_client import close_async_redis, get_async_redis
 
-async def get_redis_client() -> Redis:
-    return redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        db=settings.REDIS_DB,
-        decode_responses=True
-    )
-    
 
 def add_session_middleware(app: FastAPI):
     app.add_middleware(
@@ -23,7 +14,7 @@ def add_session_middleware(app: FastAPI):
     )
 
 async def startup_redis(app: FastAPI):
-    app.state.redis = await get_redis_client()
+    app.state.redis = get_async_redis()
 
 async def shutdown_redis(app: FastAPI):
-    await app.state.redis.close()
\ No newline at end of file
+    await close_async_redis()
\ No newline at end of file
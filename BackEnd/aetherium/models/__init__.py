@@ -1,10 +1,11 @@
 from .user import User,Role
 import aetherium.models.user_course as user_course
 import aetherium.models.courses as courses
-from .chat import Conversation, Message
+from .chat import Conversation, Message, ConversationSummary
 from .withdrawal import WithdrawalRequest, BankDetails, WithdrawalStatus
 from .admin_bank import AdminBankDetails
 from .admin_withdrawal import AdminWithdrawalRequest
+from .media import MediaAsset
 # LessonComment models are imported through courses module
 
 from .user_course import *
@@ -17,8 +18,8 @@ from .enum import (
 
 
 __all__=["User","Role", "PurchaseStatus", "PaymentMethod", "VerificationStatus", 
-    "CourseLevel", "DurationUnit","ContentType", "Conversation", "Message", 
+    "CourseLevel", "DurationUnit","ContentType", "Conversation", "Message", "ConversationSummary", 
     "WithdrawalRequest", "BankDetails", "WithdrawalStatus", "AdminBankDetails", 
-    "AdminWithdrawalRequest"] + courses.__all__+user_course.__all__
+    "AdminWithdrawalRequest", "MediaAsset"] + courses.__all__+user_course.__all__
 
 # __all__=["User","Role"] + courses.__all__
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Text, UniqueConstraint, Index, text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from aetherium.database.db import Base
@@ -18,9 +18,11 @@ class Conversation(Base):
     instructor = relationship("User", foreign_keys=[instructor_id], back_populates="instructor_conversations")
     course = relationship("Course", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    summary = relationship("ConversationSummary", back_populates="conversation", uselist=False, cascade="all, delete-orphan")
     
     __table_args__ = (
         UniqueConstraint('user_id', 'instructor_id', 'course_id', name='unique_conversation'),
+        Index('ix_conversations_instructor_id_user_id', 'instructor_id', 'user_id'),
     )
 
 class Message(Base):
@@ -31,9 +33,38 @@ class Message(Base):
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     message_type = Column(String(20), default="text")  # "text", "image"
     content = Column(Text, nullable=False)  # Text message or image URL
+    # Image messages: {"preview": url, "blurhash": str, "width": int, "height": int}
+    image_variants = Column(JSON, nullable=True)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
-    sender = relationship("User", back_populates="sent_messages") 
\ No newline at end of file
+    sender = relationship("User", back_populates="sent_messages")
+    
+    __table_args__ = (
+        # Last message per conversation (inbox LATERAL lookup)
+        Index('ix_messages_conversation_id_created_at', 'conversation_id', 'created_at'),
+        # Unread counters only ever look at unread rows
+        Index('ix_messages_unread', 'conversation_id', 'sender_id', postgresql_where=text('is_read = false')),
+    ) 
+
+class ConversationSummary(Base):
+    """
+    Denormalized inbox row for a conversation, maintained on every send and
+    mark-read so inbox reads never have to touch the messages table.
+    """
+    __tablename__ = "conversation_summaries"
+    
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True)
+    last_message_id = Column(Integer, ForeignKey("messages.id", ondelete="SET NULL"), nullable=True)
+    last_sender_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    last_message_type = Column(String(20), nullable=True)
+    last_message_preview = Column(String(500), nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    user_unread_count = Column(Integer, nullable=False, default=0, server_default="0")  # unread by the student
+    instructor_unread_count = Column(Integer, nullable=False, default=0, server_default="0")  # unread by the instructor
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    conversation = relationship("Conversation", back_populates="summary")
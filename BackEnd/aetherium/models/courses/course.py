@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, DateTime, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, DateTime, Float, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from aetherium.database.db import Base
 from aetherium.models.enum import (
@@ -34,6 +35,15 @@ class Course(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     curriculum_complete=Column(Boolean,default=False)
+    # Bumped by every authoring change; keys the cached course graph (services.course_graph_cache)
+    content_version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Weighted title/subtitle/description/objectives vector, maintained by services.search
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
+    __table_args__ = (
+        Index('ix_courses_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_courses_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
 
     # Relationships
     category = relationship("Category", back_populates="courses")
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from aetherium.database.db import Base
+
+
+class MediaAsset(Base):
+    """
+    One uploaded file on the media host, keyed by its content. Lesson contents and
+    chat messages that use the same bytes share the asset; ref_count tracks how many
+    do, and the file is deleted from the host when it drops to zero.
+    """
+    __tablename__ = "media_assets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # Upload flavour (video, pdf, image, document, chat_image); the same bytes uploaded
+    # with different options are different assets
+    kind = Column(String(20), nullable=False)
+    public_id = Column(String(255), nullable=False, unique=True)
+    secure_url = Column(String(500), nullable=False)
+    resource_type = Column(String(20), nullable=True)
+    duration = Column(Integer, nullable=True)
+    thumbnail = Column(String(500), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('sha256', 'size', 'kind', name='uq_media_assets_content'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime,Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime,Float, JSON
 from datetime import datetime,timezone
 from sqlalchemy.orm import relationship
 from aetherium.database.db import Base
@@ -32,6 +32,9 @@ class User(Base):
     youtube = Column(String, nullable=True)
     date_of_birth = Column(String, nullable=True)
     profile_picture = Column(String, nullable=True)  
+    # Derivatives of an uploaded profile picture: {"48": path, ...} (services.image_pipeline)
+    profile_picture_variants = Column(JSON, nullable=True)
+    profile_picture_blurhash = Column(String(64), nullable=True)
    
     role = relationship("Role", back_populates="users")
     courses = relationship("Course", back_populates="instructor", cascade="all, delete-orphan")
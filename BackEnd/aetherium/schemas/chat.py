@@ -15,6 +15,8 @@ class MessageResponse(BaseModel):
     sender_profile_picture: Optional[str]
     message_type: str
     content: str
+    # Image messages: preview URL, blurhash, width and height
+    image_variants: Optional[dict] = None
     is_read: bool
     created_at: datetime
 
@@ -59,15 +61,20 @@ class ConversationListResponse(BaseModel):
 class GroupedConversationListResponse(BaseModel):
     conversations: List[GroupedConversationResponse]
     total: int
+    next_cursor: Optional[str] = None
 
 class ChatMessageResponse(BaseModel):
     messages: List[MessageResponse]
     total: int
+    total_estimated: bool = False
+    next_cursor: Optional[str] = None
     conversation: ConversationResponse
 
 class GroupedChatMessageResponse(BaseModel):
     messages: List[MessageResponse]
     total: int
+    total_estimated: bool = False
+    next_cursor: Optional[str] = None
     conversation: GroupedConversationResponse
 
 class InstructorConversationResponse(BaseModel):
@@ -87,4 +94,5 @@ class InstructorConversationResponse(BaseModel):
 
 class InstructorConversationListResponse(BaseModel):
     conversations: List[InstructorConversationResponse]
-    total: int 
\ No newline at end of file
+    total: int
+    next_cursor: Optional[str] = None 
\ No newline at end of file
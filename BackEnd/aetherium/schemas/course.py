@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from aetherium.models.enum import VerificationStatus,CourseLevel,DurationUnit,ContentType
 import json
-from .lesson import LessonCreate,LessonResponse
+from .lesson import LessonCreate,LessonResponse,LessonContentCreate,AssessmentCreate
 class CourseStatus(str, Enum):
     DRAFT = "draft"
     PENDING = "pending"
@@ -36,8 +36,25 @@ class SectionCreate(BaseModel):
     name: str
     lessons: List[LessonCreate] = []
 
+class CurriculumLesson(BaseModel):
+    """A lesson of a curriculum save; matched to an existing lesson by id, else by name within its section"""
+    id: Optional[int] = None
+    name: str = Field(..., max_length=200)
+    content_type: ContentType = ContentType.DESCRIPTION
+    duration: Optional[int] = Field(default=None, ge=0)
+    description: Optional[str] = None
+    # Only used when the lesson is created; existing content is edited through the lesson endpoints
+    content: Optional[LessonContentCreate] = None
+    assessment: Optional[AssessmentCreate] = None
+
+class CurriculumSection(BaseModel):
+    """A section of a curriculum save; matched to an existing section by id, else by name"""
+    id: Optional[int] = None
+    name: str = Field(..., max_length=200)
+    lessons: List[CurriculumLesson] = []
+
 class CourseCreateStep3(BaseModel):
-    sections: List[SectionCreate] = []
+    sections: List[CurriculumSection] = []
 
 class CourseCreateStep4(BaseModel):
     price: Optional[float] = None
@@ -103,6 +120,56 @@ class InstructorResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class CurriculumLessonRef(BaseModel):
+    id: int
+    name: str
+    order_index: int
+
+class CurriculumSectionRef(BaseModel):
+    id: int
+    name: str
+    lessons: List[CurriculumLessonRef] = []
+
+class CurriculumChanges(BaseModel):
+    sections_created: int = 0
+    sections_updated: int = 0
+    sections_deleted: int = 0
+    lessons_created: int = 0
+    lessons_updated: int = 0
+    lessons_deleted: int = 0
+
+class CurriculumSaveResponse(BaseModel):
+    """What a curriculum save changed, and the ids of the saved tree for the next save"""
+    changed: bool
+    changes: CurriculumChanges
+    sections: List[CurriculumSectionRef] = []
+
+class CourseListResponse(BaseModel):
+    """Course card of instructor/admin listings; CourseResponse without long text and collections"""
+    id: int
+    title: Optional[str]
+    subtitle: Optional[str]
+    category_id: Optional[int]
+    topic_id: Optional[int]
+    language: Optional[str]
+    level: Optional[CourseLevel]
+    duration: Optional[int]
+    duration_unit: Optional[DurationUnit]
+    cover_image: Optional[str]
+    trailer_video: Optional[str]
+    price: Optional[float]
+    instructor_id: int
+    verification_status: VerificationStatus
+    is_published: bool
+    admin_response: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    category: Optional[CategoryResponse] = None
+    topic: Optional[TopicResponse] = None
+    instructor: Optional[InstructorResponse] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 class CourseResponse(BaseModel):
     id: int
     title: Optional[str]
@@ -38,6 +38,8 @@ class CourseReviewWithUserResponse(CourseReviewBase):
 class CourseReviewsListResponse(BaseModel):
     reviews: list[CourseReviewWithUserResponse]
     total: int
+    total_estimated: bool=False
     average_rating: float
     page: Optional[int]=None
-    limit: Optional[int]=None
\ No newline at end of file
+    limit: Optional[int]=None
+    next_cursor: Optional[str]=None
\ No newline at end of file
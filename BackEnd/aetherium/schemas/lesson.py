@@ -138,3 +138,36 @@ class LessonResponse(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class LessonBatchCreate(LessonCreate):
+    section_id: int
+
+
+class LessonBatchResponse(BaseModel):
+    lessons: List[LessonResponse]
+    count: int
+
+
+class LessonOrder(BaseModel):
+    lesson_id: int
+    order_index: int = Field(ge=0)
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    file_type: str = Field(pattern="^(video|pdf|image|document)$")
+    total_size: int = Field(gt=0)
+    # Hex SHA-256 of the whole file, checked on completion when given
+    sha256: Optional[str] = Field(default=None, pattern="^[0-9a-fA-F]{64}$")
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    lesson_id: int
+    filename: str
+    file_type: str
+    total_size: int
+    offset: int
+    chunk_size: int
+    expires_in: int
@@ -30,6 +30,15 @@ class LessonProgressResponse(BaseModel):
     }
 
 
+class LessonHeartbeatResponse(BaseModel):
+    """A buffered ping: the values waiting for the next flush, before the row is written"""
+    user_id: int
+    lesson_id: int
+    progress_percentage: float
+    time_spent: int
+    buffered: bool = True
+
+
 class SectionProgressResponse(BaseModel):
     id: int
     user_id: int
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from pydantic import StringConstraints
-from typing import Optional, Annotated, List
+from typing import Optional, Annotated, List, Dict
 
 NonEmptyStr = Annotated[str, StringConstraints(min_length=1, strip_whitespace=True)]
 
@@ -139,6 +139,22 @@ class UserResponse(UserBase):
     youtube: Optional[str] = None
     date_of_birth: Optional[str] = None
     profile_picture: Optional[str] = None
+    profile_picture_variants: Optional[Dict[str, str]] = None
+    profile_picture_blurhash: Optional[str] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class AuthenticatedUser(BaseModel):
+    """Projection of the signed-in user returned by get_current_user (cached per token)"""
+    id: int
+    email: str
+    firstname: Optional[str] = None
+    lastname: Optional[str] = None
+    profile_picture: Optional[str] = None
+    is_active: Optional[bool] = True
+    role: RoleResponse
 
     model_config = {
         "from_attributes": True
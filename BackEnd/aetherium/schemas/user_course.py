@@ -147,8 +147,11 @@ class CourseFilters(BaseModel):
     category: Optional[int] = None
     level: Optional[str] = None
     language: Optional[str] = None
+    price: Optional[str] = None
     page: Optional[int] = 1
     limit: Optional[int] = 12
+    cursor: Optional[str] = None
+    count: str = "exact"
 
 class PurchaseStatusCheck(BaseModel):
     is_purchased: bool
@@ -175,11 +178,25 @@ class CertificateEligibilityResponse(BaseModel):
 
 
 
+class FacetCount(BaseModel):
+    value: str
+    label: Optional[str] = None
+    count: int
+
+class CatalogFacets(BaseModel):
+    categories: List[FacetCount] = []
+    levels: List[FacetCount] = []
+    languages: List[FacetCount] = []
+    price_ranges: List[FacetCount] = []
+
 class PaginatedCoursesResponse(BaseModel):
     courses: List[CourseResponse]
     total_pages: int
     current_page: int
     total_items: int
+    total_estimated: bool = False
+    next_cursor: Optional[str] = None
+    facets: Optional[CatalogFacets] = None
 
 
 
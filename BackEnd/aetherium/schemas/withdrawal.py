@@ -52,8 +52,10 @@ class BankDetailsResponse(BaseModel):
 class WithdrawalRequestListResponse(BaseModel):
     requests: List[WithdrawalRequestResponse]
     total: int
+    total_estimated: bool = False
     page: int
     limit: int
+    next_cursor: Optional[str] = None
 
 class AccountSummaryResponse(BaseModel):
     wallet_balance: float
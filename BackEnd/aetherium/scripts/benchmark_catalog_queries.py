@@ -0,0 +1,101 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from aetherium.database.db import AsyncSessionLocal, async_engine, engine
+from aetherium.models.courses import Course
+from aetherium.schemas.user_course import CourseFilters, CourseResponse, InstructorResponse, CategoryResponse
+from aetherium.services.user_course.catalog_service import CatalogService
+import asyncio
+import sys
+import time
+
+PAGE_SIZES = [1, 12, 25, 50]
+
+
+class QueryCounter:
+    """Counts statements (and the rows they report) sent through an engine while active"""
+
+    def __init__(self, sync_engine):
+        self.sync_engine = sync_engine
+        self.count = 0
+        self.rows = 0
+
+    def _before_cursor_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def _after_cursor_execute(self, conn, cursor, *args, **kwargs):
+        # psycopg2/asyncpg report the rows a SELECT returned; drivers that don't report -1
+        if cursor.rowcount > 0:
+            self.rows += cursor.rowcount
+
+    def __enter__(self):
+        event.listen(self.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+
+def legacy_page(filters: CourseFilters):
+    """The catalog as it was built before the read model: count, page, then lazy loads per course"""
+    with Session(engine) as db:
+        query = db.query(Course).filter(Course.is_published == True)
+        total_items = query.count()
+        courses = query.offset((filters.page - 1) * filters.limit).limit(filters.limit).all()
+        cards = []
+        for course in courses:
+            instructor = course.instructor
+            category = course.category
+            cards.append(CourseResponse(
+                id=course.id,
+                title=course.title,
+                subtitle=course.subtitle,
+                description=course.description,
+                price=course.price,
+                discount_price=course.discount_price,
+                cover_image=course.cover_image,
+                category=CategoryResponse(id=category.id, name=category.name) if category else None,
+                instructor=InstructorResponse(
+                    id=instructor.id,
+                    firstname=instructor.firstname,
+                    lastname=instructor.lastname,
+                    profile_picture=instructor.profile_picture,
+                    title=instructor.title,
+                ) if instructor else None,
+                level=course.level,
+                language=course.language,
+                duration=course.duration,
+                duration_unit=course.duration_unit,
+                created_at=course.created_at,
+                updated_at=course.updated_at,
+            ))
+        return total_items, cards
+
+
+async def benchmark_catalog():
+    print(f"{'limit':>6} {'rows':>5} {'legacy queries':>15} {'legacy ms':>10} {'read model queries':>19} {'read model ms':>14}")
+    for limit in PAGE_SIZES:
+        filters = CourseFilters(page=1, limit=limit)
+
+        with QueryCounter(engine) as legacy:
+            started = time.perf_counter()
+            _, cards = legacy_page(filters)
+            legacy_ms = (time.perf_counter() - started) * 1000
+
+        async with AsyncSessionLocal() as db:
+            with QueryCounter(async_engine.sync_engine) as read_model:
+                started = time.perf_counter()
+                page = await CatalogService.get_page(db, filters)
+                read_model_ms = (time.perf_counter() - started) * 1000
+
+        if len(page["courses"]) != len(cards):
+            print(f"❌ limit={limit}: read model returned {len(page['courses'])} courses, legacy {len(cards)}")
+            sys.exit(1)
+
+        print(f"{limit:>6} {len(cards):>5} {legacy.count:>15} {legacy_ms:>10.1f} {read_model.count:>19} {read_model_ms:>14.1f}")
+
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_catalog())
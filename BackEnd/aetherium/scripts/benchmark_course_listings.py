@@ -0,0 +1,106 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from aetherium.database.db import engine
+from aetherium.models.courses import Course, Lesson, Section
+from aetherium.schemas.course import CourseListResponse, CourseResponse
+from aetherium.scripts.benchmark_catalog_queries import QueryCounter
+from aetherium.services.course_service import CourseService
+import sys
+import time
+
+INSTRUCTORS = 5
+# Regression budgets: a listing is one statement, a detail one per level of the graph
+LIST_QUERY_BUDGET = 1
+DETAIL_QUERY_BUDGET = 9
+
+LEGACY_OPTIONS = (
+    joinedload(Course.learning_objectives),
+    joinedload(Course.target_audiences),
+    joinedload(Course.requirements),
+    joinedload(Course.sections),
+    joinedload(Course.category),
+    joinedload(Course.topic),
+    joinedload(Course.instructor),
+)
+
+
+def legacy_listing(db: Session, instructor_id: int, limit: int):
+    """CourseService.get_instructor_courses as served before the loader layer (List[CourseResponse])"""
+    courses = db.query(Course).options(*LEGACY_OPTIONS).filter(
+        Course.instructor_id == instructor_id
+    ).order_by(Course.created_at.desc()).offset(0).limit(limit).all()
+    return [CourseResponse.model_validate(course) for course in courses]
+
+
+def legacy_detail(db: Session, course_id: int):
+    course = db.query(Course).options(
+        joinedload(Course.learning_objectives),
+        joinedload(Course.target_audiences),
+        joinedload(Course.requirements),
+        joinedload(Course.sections).joinedload(Section.lessons).joinedload(Lesson.lesson_content),
+        joinedload(Course.category),
+        joinedload(Course.topic),
+        joinedload(Course.instructor)
+    ).filter(Course.id == course_id).first()
+    return CourseResponse.model_validate(course)
+
+
+def measure(fn, *args):
+    with Session(engine) as db:
+        with QueryCounter(engine) as counter:
+            started = time.perf_counter()
+            result = fn(db, *args)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+    return result, counter, elapsed_ms
+
+
+def new_listing(db: Session, instructor_id: int, limit: int):
+    courses = CourseService.get_instructor_courses(db, instructor_id, page=1, limit=limit)
+    return [CourseListResponse.model_validate(course) for course in courses]
+
+
+def new_detail(db: Session, course_id: int):
+    instructor_id = db.query(Course.instructor_id).filter(Course.id == course_id).scalar()
+    return CourseResponse.model_validate(CourseService.get_instructor_course_detail(db, course_id, instructor_id))
+
+
+def curriculum_size(course: CourseResponse):
+    return len(course.sections), sum(len(section.lessons) for section in course.sections)
+
+
+def benchmark_course_listings():
+    with Session(engine) as db:
+        instructors = db.query(Course.instructor_id, func.count(Course.id)).group_by(Course.instructor_id).order_by(
+            func.count(Course.id).desc()
+        ).limit(INSTRUCTORS).all()
+        largest = db.query(Course.id).join(Section).join(Lesson).group_by(Course.id).order_by(
+            func.count(Lesson.id).desc()
+        ).limit(INSTRUCTORS).all()
+
+    failed = False
+    print(f"{'listing':>12} {'courses':>8} {'legacy q':>9} {'legacy rows':>12} {'legacy ms':>10} {'new q':>6} {'new rows':>9} {'new ms':>7}")
+    for instructor_id, course_count in instructors:
+        legacy, legacy_counter, legacy_ms = measure(legacy_listing, instructor_id, course_count)
+        new, counter, new_ms = measure(new_listing, instructor_id, course_count)
+        print(f"{'instr ' + str(instructor_id):>12} {course_count:>8} {legacy_counter.count:>9} {legacy_counter.rows:>12} {legacy_ms:>10.1f} {counter.count:>6} {counter.rows:>9} {new_ms:>7.1f}")
+        if len(new) != len(legacy) or counter.count > LIST_QUERY_BUDGET:
+            print(f"❌ instructor {instructor_id}: {len(new)} courses in {counter.count} queries (legacy {len(legacy)}, budget {LIST_QUERY_BUDGET})")
+            failed = True
+
+    print(f"{'detail':>12} {'lessons':>8} {'legacy q':>9} {'legacy rows':>12} {'legacy ms':>10} {'new q':>6} {'new rows':>9} {'new ms':>7}")
+    for (course_id,) in largest:
+        legacy, legacy_counter, legacy_ms = measure(legacy_detail, course_id)
+        new, counter, new_ms = measure(new_detail, course_id)
+        _, lessons = curriculum_size(new)
+        print(f"{'course ' + str(course_id):>12} {lessons:>8} {legacy_counter.count:>9} {legacy_counter.rows:>12} {legacy_ms:>10.1f} {counter.count:>6} {counter.rows:>9} {new_ms:>7.1f}")
+        # +1 for the instructor lookup in new_detail
+        if curriculum_size(new) != curriculum_size(legacy) or counter.count > DETAIL_QUERY_BUDGET + 1:
+            print(f"❌ course {course_id}: detail differs or took {counter.count} queries (budget {DETAIL_QUERY_BUDGET})")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Course listings within query budgets")
+
+if __name__ == "__main__":
+    benchmark_course_listings()
@@ -0,0 +1,32 @@
+from aetherium.database.db import AsyncSessionLocal
+from aetherium.services.conversation_summary_service import ConversationSummaryService
+import asyncio
+import sys
+
+async def rebuild_conversation_summaries(check_only: bool = False):
+    async with AsyncSessionLocal() as db:
+        try:
+            service = ConversationSummaryService(db)
+            problems = await service.check_consistency()
+            if problems:
+                print(f"Found {len(problems)} inconsistent conversation summaries")
+                for problem in problems[:50]:
+                    print(f"  conversation {problem['conversation_id']}: {problem['fields']}")
+            else:
+                print("✅ Conversation summaries are consistent")
+
+            if check_only:
+                sys.exit(1 if problems else 0)
+
+            count = await service.rebuild()
+            print(f"✅ Rebuilt {count} conversation summaries")
+        except Exception as e:
+            print(f"❌ Error rebuilding conversation summaries: {e}")
+            await db.rollback()
+            sys.exit(1)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] != "--check"):
+        print("Usage: python -m aetherium.scripts.rebuild_conversation_summaries [--check]")
+        sys.exit(1)
+    asyncio.run(rebuild_conversation_summaries(check_only=len(sys.argv) == 2))
@@ -7,6 +7,9 @@ import os
 from fastapi import UploadFile
 from aetherium.config import settings
 from aetherium.core.logger import logger
+from aetherium.utils.jwt_utils import invalidate_user_cache
+from aetherium.services.image_pipeline import AVATAR_MAX_EDGE, AVATAR_SIZES, ImagePipelineUnavailable, ImageRejected, get_image_pipeline
+import hashlib
 def create_user(db: Session, user: UserCreate) -> User:
     existing_user = db.query(User).filter(User.email == user.email).first()
     if existing_user:
@@ -69,6 +72,7 @@ def update_user_bio(db: Session, user_update: UserUpdate, email: str) -> User:
     
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id)
     return user
 
 def change_password(db: Session, password_data: PasswordChange, email: str) -> None:
@@ -84,6 +88,7 @@ def change_password(db: Session, password_data: PasswordChange, email: str) -> N
     
     user.password_hash = hash_password(password_data.new_password)
     db.commit()
+    invalidate_user_cache(user.id)
 
 def upload_profile_picture(db: Session, file: UploadFile, email: str) -> str:
     print(f"Starting upload for email: {email}")
@@ -108,28 +113,52 @@ def upload_profile_picture(db: Session, file: UploadFile, email: str) -> str:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File size exceeds 1MB")
     
  
-    if file.content_type not in ["image/jpeg", "image/png"]:
+    if file.content_type not in ["image/jpeg", "image/png", "image/webp"]:
         print(f"Invalid file type: {file.content_type}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only JPEG or PNG files are allowed")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only JPEG, PNG or WebP files are allowed")
     
 
-    file_extension = file.filename.split(".")[-1].lower()
-    file_path = f"{upload_dir}/{user.id}_{email.split('@')[0]}.{file_extension}"
+    content = file.file.read()
+    logger.debug(f"Read {len(content)} bytes of profile picture upload")
+
+    # Re-encoded without EXIF, capped in size, with small variants for lists and a blurhash
+    try:
+        rendered = get_image_pipeline().render_sync(content, AVATAR_MAX_EDGE, AVATAR_SIZES, square=True, main_format="jpeg")
+    except ImageRejected as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ImagePipelineUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    # Named by content, so a new picture never reuses the URL (and cache entries) of the old one
+    file_stem = f"{upload_dir}/{user.id}_{hashlib.sha256(content).hexdigest()[:12]}"
+    file_path = f"{file_stem}.jpg"
+    variants = {str(size): f"{file_stem}_{size}.webp" for size in AVATAR_SIZES}
     print(f"Attempting to save file to: {file_path}")
     
     # FileSave 
     try:
         with open(file_path, "wb") as buffer:
-            content = file.file.read()
-            print(f"Read {len(content)} bytes from file")
-            buffer.write(content)
+            buffer.write(rendered["main"])
+        for size, path in variants.items():
+            with open(path, "wb") as buffer:
+                buffer.write(rendered["variants"][int(size)])
     except Exception as e:
         print(f"File save failed: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to save file: {str(e)}")
     
+    previous = [user.profile_picture, *(user.profile_picture_variants or {}).values()]
     # Update user profile picture path
     print(f"Updating user profile picture path to: {file_path}")
     user.profile_picture = file_path
+    user.profile_picture_variants = variants
+    user.profile_picture_blurhash = rendered["blurhash"]
     db.commit()
+    invalidate_user_cache(user.id)
     print("Profile picture path saved successfully")
+
+    # Files of the replaced picture (not Google avatar URLs)
+    current = {file_path, *variants.values()}
+    for path in previous:
+        if path and path.startswith(f"{upload_dir}/") and path not in current and os.path.exists(path):
+            os.remove(path)
     return file_path     
@@ -0,0 +1,263 @@
+# services/chat_inbox_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy import and_, case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from typing import Optional, Dict, Any, List
+from fastapi import HTTPException, status
+from datetime import datetime
+import base64
+
+from aetherium.models.chat import Conversation, ConversationSummary
+from aetherium.models.user import User
+from aetherium.models.courses import Course
+from aetherium.services.image_pipeline import picture_variant
+
+
+def encode_inbox_cursor(latest_activity: datetime, counterpart_id: int) -> str:
+    """Opaque keyset cursor for the inbox (latest activity, counterpart id)"""
+    raw = f"{latest_activity.isoformat()}|{counterpart_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_inbox_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        latest_activity, counterpart_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(latest_activity), int(counterpart_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+class ChatInboxService:
+    """
+    Builds the grouped chat inbox (one row per instructor for students, one row
+    per student for instructors) in a constant number of queries:
+
+    - the last message and unread counters are read from `conversation_summaries`
+    - a window function picks the latest message per counterpart
+    - the page is ordered by latest activity and paginated by keyset (or offset
+      when the caller still uses page numbers)
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _columns(self, as_instructor: bool):
+        """(owner column, counterpart column) on Conversation for the viewer's role"""
+        if as_instructor:
+            return Conversation.instructor_id, Conversation.user_id
+        return Conversation.user_id, Conversation.instructor_id
+
+    def _page_query(self, viewer_id: int, as_instructor: bool, counterpart_id: Optional[int] = None):
+        owner_col, counterpart_col = self._columns(as_instructor)
+
+        conv_filter = owner_col == viewer_id
+        if counterpart_id is not None:
+            conv_filter = and_(conv_filter, counterpart_col == counterpart_id)
+
+        # Last message and unread counters come from the denormalized summary,
+        # so building the inbox never scans the messages table
+        summary = ConversationSummary
+        unread_count = func.coalesce(
+            summary.instructor_unread_count if as_instructor else summary.user_unread_count, 0
+        )
+        # The last message is unread exactly while its recipient's counter is non-zero
+        last_is_read = case(
+            (summary.last_sender_id == Conversation.user_id, summary.instructor_unread_count == 0),
+            else_=summary.user_unread_count == 0
+        )
+
+        conv_activity = func.greatest(
+            func.coalesce(Conversation.updated_at, Conversation.created_at),
+            func.coalesce(summary.last_message_at, Conversation.created_at),
+        )
+
+        per_conversation = (
+            select(
+                Conversation.id.label("conversation_id"),
+                counterpart_col.label("counterpart_id"),
+                Conversation.created_at.label("created_at"),
+                Course.title.label("course_title"),
+                conv_activity.label("activity_at"),
+                unread_count.label("unread_count"),
+                summary.last_message_id.label("last_message_id"),
+                summary.last_sender_id.label("last_sender_id"),
+                summary.last_message_preview.label("last_content"),
+                summary.last_message_type.label("last_message_type"),
+                last_is_read.label("last_is_read"),
+                summary.last_message_at.label("last_created_at"),
+                func.row_number().over(
+                    partition_by=counterpart_col,
+                    order_by=(
+                        summary.last_message_at.desc().nulls_last(),
+                        Conversation.id.desc(),
+                    ),
+                ).label("rn"),
+            )
+            .select_from(Conversation)
+            .join(Course, Course.id == Conversation.course_id)
+            .outerjoin(summary, summary.conversation_id == Conversation.id)
+            .where(conv_filter)
+            .cte("inbox_conversations")
+        )
+
+        groups = (
+            select(
+                per_conversation.c.counterpart_id,
+                func.sum(per_conversation.c.unread_count).label("unread_count"),
+                func.count(per_conversation.c.conversation_id).label("conversation_count"),
+                func.min(per_conversation.c.created_at).label("created_at"),
+                func.max(per_conversation.c.activity_at).label("latest_activity"),
+                func.array_agg(
+                    aggregate_order_by(per_conversation.c.course_title, per_conversation.c.created_at)
+                ).label("course_titles"),
+            )
+            .group_by(per_conversation.c.counterpart_id)
+            .cte("inbox_groups")
+        )
+
+        latest = (
+            select(per_conversation)
+            .where(per_conversation.c.rn == 1)
+            .cte("inbox_latest")
+        )
+
+        owner = aliased(User, name="inbox_owner")
+        counterpart = aliased(User, name="inbox_counterpart")
+        sender = aliased(User, name="last_sender")
+
+        query = (
+            select(
+                groups.c.counterpart_id,
+                groups.c.unread_count,
+                groups.c.conversation_count,
+                groups.c.created_at,
+                groups.c.latest_activity,
+                groups.c.course_titles,
+                latest.c.conversation_id.label("last_conversation_id"),
+                latest.c.last_message_id,
+                latest.c.last_sender_id,
+                latest.c.last_content,
+                latest.c.last_message_type,
+                latest.c.last_is_read,
+                latest.c.last_created_at,
+                owner.id.label("owner_id"),
+                owner.firstname.label("owner_firstname"),
+                owner.lastname.label("owner_lastname"),
+                owner.profile_picture.label("owner_profile_picture"),
+                owner.profile_picture_variants.label("owner_profile_picture_variants"),
+                counterpart.firstname.label("counterpart_firstname"),
+                counterpart.lastname.label("counterpart_lastname"),
+                counterpart.profile_picture.label("counterpart_profile_picture"),
+                counterpart.profile_picture_variants.label("counterpart_profile_picture_variants"),
+                sender.firstname.label("sender_firstname"),
+                sender.lastname.label("sender_lastname"),
+                sender.profile_picture.label("sender_profile_picture"),
+                sender.profile_picture_variants.label("sender_profile_picture_variants"),
+            )
+            .select_from(groups)
+            .join(latest, latest.c.counterpart_id == groups.c.counterpart_id)
+            .join(owner, owner.id == viewer_id)
+            .join(counterpart, counterpart.id == groups.c.counterpart_id)
+            .outerjoin(sender, sender.id == latest.c.last_sender_id)
+        )
+        return query, groups
+
+    def _row_to_dict(self, row, as_instructor: bool) -> Dict[str, Any]:
+        if as_instructor:
+            user_id, instructor_id = row.counterpart_id, row.owner_id
+            user_name = f"{row.counterpart_firstname} {row.counterpart_lastname}"
+            user_picture = picture_variant(row.counterpart_profile_picture, row.counterpart_profile_picture_variants)
+            instructor_name = f"{row.owner_firstname} {row.owner_lastname}"
+            instructor_picture = picture_variant(row.owner_profile_picture, row.owner_profile_picture_variants)
+            group_id = f"user_{user_id}"
+        else:
+            user_id, instructor_id = row.owner_id, row.counterpart_id
+            user_name = f"{row.owner_firstname} {row.owner_lastname}"
+            user_picture = picture_variant(row.owner_profile_picture, row.owner_profile_picture_variants)
+            instructor_name = f"{row.counterpart_firstname} {row.counterpart_lastname}"
+            instructor_picture = picture_variant(row.counterpart_profile_picture, row.counterpart_profile_picture_variants)
+            group_id = f"instructor_{instructor_id}"
+
+        last_message = None
+        if row.last_message_id is not None:
+            last_message = {
+                "id": row.last_message_id,
+                "conversation_id": row.last_conversation_id,
+                "content": row.last_content,
+                "message_type": row.last_message_type,
+                "created_at": row.last_created_at,
+                "sender_id": row.last_sender_id,
+                "sender_name": f"{row.sender_firstname} {row.sender_lastname}",
+                "sender_profile_picture": picture_variant(row.sender_profile_picture, row.sender_profile_picture_variants),
+                "is_read": row.last_is_read
+            }
+
+        return {
+            "id": group_id,
+            "user_id": user_id,
+            "instructor_id": instructor_id,
+            "instructor_name": instructor_name,
+            "instructor_profile_picture": instructor_picture,
+            "user_name": user_name,
+            "user_profile_picture": user_picture,
+            "course_titles": list(row.course_titles or []),
+            "last_message": last_message,
+            "unread_count": int(row.unread_count or 0),
+            "created_at": row.created_at,
+            "updated_at": row.latest_activity,
+            "conversation_count": row.conversation_count
+        }
+
+    async def get_inbox(
+        self,
+        viewer_id: int,
+        as_instructor: bool,
+        page: int = 1,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> dict:
+        """Get one inbox page grouped by counterpart, newest activity first"""
+        query, groups = self._page_query(viewer_id, as_instructor)
+        query = query.order_by(groups.c.latest_activity.desc(), groups.c.counterpart_id.desc())
+
+        if cursor:
+            latest_activity, counterpart_id = decode_inbox_cursor(cursor)
+            query = query.where(
+                tuple_(groups.c.latest_activity, groups.c.counterpart_id) < tuple_(latest_activity, counterpart_id)
+            )
+        else:
+            query = query.offset((page - 1) * limit)
+
+        # One extra row tells whether there is a next page
+        rows = (await self.db.execute(query.limit(limit + 1))).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        owner_col, counterpart_col = self._columns(as_instructor)
+        total = (await self.db.execute(
+            select(func.count(func.distinct(counterpart_col))).where(owner_col == viewer_id)
+        )).scalar() or 0
+
+        conversations = [self._row_to_dict(row, as_instructor) for row in rows]
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_inbox_cursor(rows[-1].latest_activity, rows[-1].counterpart_id)
+
+        return {
+            "conversations": conversations,
+            "total": total,
+            "next_cursor": next_cursor
+        }
+
+    async def get_thread_summary(self, viewer_id: int, counterpart_id: int, as_instructor: bool) -> Optional[Dict[str, Any]]:
+        """Get the grouped inbox entry for a single counterpart (None if there is no conversation)"""
+        query, _ = self._page_query(viewer_id, as_instructor, counterpart_id=counterpart_id)
+        row = (await self.db.execute(query)).first()
+        if row is None:
+            return None
+        return self._row_to_dict(row, as_instructor)
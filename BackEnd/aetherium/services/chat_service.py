@@ -1,6 +1,7 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, desc
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, func, desc, select, update
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status,Depends
 from datetime import datetime
 from aetherium.models.chat import Conversation, Message
@@ -10,53 +11,116 @@ from aetherium.models.user_course import Purchase
 from aetherium.models.enum import PurchaseStatus
 from aetherium.schemas.chat import MessageCreate, ConversationCreate
 from aetherium.services.cloudinary_service import cloudinary_service
+from aetherium.services.chat_inbox_service import ChatInboxService
+from aetherium.services.conversation_summary_service import ConversationSummaryService
+from aetherium.services.media_index import MediaIndex
+from aetherium.services.image_pipeline import CHAT_IMAGE_MAX_EDGE, CHAT_PREVIEW_SIZE, ImagePipelineUnavailable, ImageRejected, avatar_variant, get_image_pipeline
 import os
 import uuid
+import hashlib
 import io
 
 from datetime import datetime
 from aetherium.core.dependency import get_manager
 from aetherium.sockets.websocket import NotificationManager
 from aetherium.core.logger import logger
+from aetherium.utils.pagination import Keyset, count_statement, resolve_count
+
+# Media index kind of chat images; images are never released since messages are kept
+CHAT_IMAGE_KIND = "chat_image"
+
 
 class ChatService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_or_create_conversation(self, user_id: int, course_id: int) -> Conversation:
+    async def _get_conversation(self, *conditions) -> Optional[Conversation]:
+        """Load a conversation together with the course and participants used in responses"""
+        result = await self.db.execute(
+            select(Conversation).options(
+                selectinload(Conversation.course),
+                selectinload(Conversation.instructor),
+                selectinload(Conversation.user)
+            ).where(*conditions).execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def _get_conversations_between(self, user_id: int, instructor_id: int) -> List[Conversation]:
+        """All conversations between a user and an instructor, most recently updated first"""
+        result = await self.db.execute(
+            select(Conversation).where(
+                and_(
+                    Conversation.user_id == user_id,
+                    Conversation.instructor_id == instructor_id
+                )
+            ).order_by(Conversation.updated_at.desc())
+        )
+        return list(result.scalars().all())
+
+    async def _get_message_page(self, conversation_ids: List[int], page: int, limit: int,
+                                cursor: Optional[str] = None, count: str = "exact"):
+        """Newest-first page of messages across conversations, plus total/total_estimated/next_cursor"""
+        keyset = Keyset(Message.created_at, Message.id)
+        listing = select(Message).where(Message.conversation_id.in_(conversation_ids))
+        result = await self.db.execute(
+            keyset.paginate(listing.options(selectinload(Message.sender)), cursor, page, limit)
+        )
+        messages, next_cursor = keyset.split(list(result.scalars().all()), limit, lambda msg: (msg.created_at, msg.id))
+
+        total, total_estimated = resolve_count(
+            (await self.db.execute(count_statement(listing, count))).scalar(), count
+        )
+
+        return messages, {"total": total, "total_estimated": total_estimated, "next_cursor": next_cursor}
+
+    def _message_to_dict(self, msg: Message) -> dict:
+        return {
+            "id": msg.id,
+            "conversation_id": msg.conversation_id,
+            "sender_id": msg.sender_id,
+            "sender_name": f"{msg.sender.firstname} {msg.sender.lastname}",
+            "sender_profile_picture": avatar_variant(msg.sender),
+            "message_type": msg.message_type,
+            "image_variants": msg.image_variants,
+            "content": msg.content,
+            "is_read": msg.is_read,
+            "created_at": msg.created_at
+        }
+
+    async def get_or_create_conversation(self, user_id: int, course_id: int) -> Conversation:
         """Get existing conversation or create new one if user has purchased the course"""
-        
+
         # Check if user has purchased the course
-        purchase = self.db.query(Purchase).filter(
-            and_(
-                Purchase.user_id == user_id,
-                Purchase.course_id == course_id,
-                Purchase.status == PurchaseStatus.COMPLETED
-            )
-        ).first()
-        
+        purchase = (await self.db.execute(
+            select(Purchase.id).where(
+                and_(
+                    Purchase.user_id == user_id,
+                    Purchase.course_id == course_id,
+                    Purchase.status == PurchaseStatus.COMPLETED
+                )
+            ).limit(1)
+        )).first()
+
         if not purchase:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You must purchase this course to chat with the instructor"
             )
-        
+
         # Get course to find instructor
-        course = self.db.query(Course).filter(Course.id == course_id).first()
+        course = await self.db.get(Course, course_id)
         if not course:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Course not found"
             )
-        
+
         # Check if conversation already exists
-        conversation = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.course_id == course_id
-            )
-        ).first()
-        
+        conversation = await self._get_conversation(
+            Conversation.user_id == user_id,
+            Conversation.course_id == course_id
+        )
+
         if not conversation:
             # Create new conversation
             conversation = Conversation(
@@ -66,33 +130,37 @@ class ChatService:
                 updated_at=datetime.utcnow()
             )
             self.db.add(conversation)
-            self.db.commit()
-            self.db.refresh(conversation)
-        
+            await self.db.commit()
+            conversation = await self._get_conversation(Conversation.id == conversation.id)
+
         return conversation
 
-    def get_conversation_details(self, conversation: Conversation, user_id: int) -> dict:
+    async def get_conversation_details(self, conversation: Conversation, user_id: int) -> dict:
         """Get conversation details in the format expected by ConversationResponse"""
-        
+
         # Get last message
-        last_message = self.db.query(Message).options(
-            joinedload(Message.sender)
-        ).filter(
-            Message.conversation_id == conversation.id
-        ).order_by(Message.created_at.desc()).first()
-        
+        last_message = (await self.db.execute(
+            select(Message).options(
+                selectinload(Message.sender)
+            ).where(
+                Message.conversation_id == conversation.id
+            ).order_by(Message.created_at.desc()).limit(1)
+        )).scalars().first()
+
         # Get unread count
-        unread_count = self.db.query(Message).filter(
-            and_(
-                Message.conversation_id == conversation.id,
-                Message.sender_id != user_id,
-                Message.is_read == False
+        unread_count = (await self.db.execute(
+            select(func.count(Message.id)).where(
+                and_(
+                    Message.conversation_id == conversation.id,
+                    Message.sender_id != user_id,
+                    Message.is_read == False
+                )
             )
-        ).count()
-        
+        )).scalar()
+
         # Ensure updated_at is never None
         updated_at = conversation.updated_at or conversation.created_at
-        
+
         return {
             "id": conversation.id,
             "user_id": conversation.user_id,
@@ -100,18 +168,19 @@ class ChatService:
             "course_id": conversation.course_id,
             "course_title": conversation.course.title,
             "instructor_name": f"{conversation.instructor.firstname} {conversation.instructor.lastname}",
-            "instructor_profile_picture": conversation.instructor.profile_picture,
+            "instructor_profile_picture": avatar_variant(conversation.instructor),
             "user_name": f"{conversation.user.firstname} {conversation.user.lastname}",
-            "user_profile_picture": conversation.user.profile_picture,
+            "user_profile_picture": avatar_variant(conversation.user),
             "last_message": {
                 "id": last_message.id,
                 "conversation_id": conversation.id,
                 "content": last_message.content,
                 "message_type": last_message.message_type,
+                "image_variants": last_message.image_variants,
                 "created_at": last_message.created_at,
                 "sender_id": last_message.sender_id,
                 "sender_name": f"{last_message.sender.firstname} {last_message.sender.lastname}",
-                "sender_profile_picture": last_message.sender.profile_picture,
+                "sender_profile_picture": avatar_variant(last_message.sender),
                 "is_read": last_message.is_read
             } if last_message else None,
             "unread_count": unread_count,
@@ -119,363 +188,80 @@ class ChatService:
             "updated_at": updated_at
         }
 
-    def get_user_conversations(self, user_id: int, page: int = 1, limit: int = 20) -> dict:
+    async def get_user_conversations(self, user_id: int, page: int = 1, limit: int = 20, cursor: Optional[str] = None) -> dict:
         """Get all conversations for a user, grouped by instructor"""
-        
-        offset = (page - 1) * limit
-        
-        # Get all conversations for the user
-        all_conversations = self.db.query(Conversation).options(
-            joinedload(Conversation.course),
-            joinedload(Conversation.instructor),
-            joinedload(Conversation.user),
-            joinedload(Conversation.messages)
-        ).filter(
-            Conversation.user_id == user_id
-        ).all()
-        
-        # Group conversations by instructor
-        instructor_conversations = {}
-        for conv in all_conversations:
-            instructor_id = conv.instructor_id
-            if instructor_id not in instructor_conversations:
-                instructor_conversations[instructor_id] = {
-                    "instructor_id": instructor_id,
-                    "instructor_name": f"{conv.instructor.firstname} {conv.instructor.lastname}",
-                    "instructor_profile_picture": conv.instructor.profile_picture,
-                    "user_id": conv.user_id,
-                    "user_name": f"{conv.user.firstname} {conv.user.lastname}",
-                    "user_profile_picture": conv.user.profile_picture,
-                    "conversations": [],
-                    "total_unread": 0,
-                    "latest_message": None,
-                    "latest_updated_at": conv.created_at
-                }
-            
-            # Get last message for this conversation
-            last_message = self.db.query(Message).options(
-                joinedload(Message.sender)
-            ).filter(
-                Message.conversation_id == conv.id
-            ).order_by(Message.created_at.desc()).first()
-            
-            # Get unread count for this conversation
-            unread_count = self.db.query(Message).filter(
-                and_(
-                    Message.conversation_id == conv.id,
-                    Message.sender_id != user_id,
-                    Message.is_read == False
-                )
-            ).count()
-            
-            # Add conversation to instructor's list
-            instructor_conversations[instructor_id]["conversations"].append({
-                "id": conv.id,
-                "course_id": conv.course_id,
-                "course_title": conv.course.title,
-                "last_message": {
-                    "id": last_message.id,
-                    "conversation_id": conv.id,
-                    "content": last_message.content,
-                    "message_type": last_message.message_type,
-                    "created_at": last_message.created_at,
-                    "sender_id": last_message.sender_id,
-                    "sender_name": f"{last_message.sender.firstname} {last_message.sender.lastname}",
-                    "sender_profile_picture": last_message.sender.profile_picture,
-                    "is_read": last_message.is_read
-                } if last_message else None,
-                "unread_count": unread_count,
-                "created_at": conv.created_at,
-                "updated_at": conv.updated_at or conv.created_at
-            })
-            
-            # Update total unread count
-            instructor_conversations[instructor_id]["total_unread"] += unread_count
-            
-            # Update latest message and updated_at
-            if last_message and (instructor_conversations[instructor_id]["latest_message"] is None or 
-                               last_message.created_at > instructor_conversations[instructor_id]["latest_message"]["created_at"]):
-                instructor_conversations[instructor_id]["latest_message"] = {
-                    "id": last_message.id,
-                    "conversation_id": conv.id,
-                    "content": last_message.content,
-                    "message_type": last_message.message_type,
-                    "created_at": last_message.created_at,
-                    "sender_id": last_message.sender_id,
-                    "sender_name": f"{last_message.sender.firstname} {last_message.sender.lastname}",
-                    "sender_profile_picture": last_message.sender.profile_picture,
-                    "is_read": last_message.is_read
-                }
-                instructor_conversations[instructor_id]["latest_updated_at"] = last_message.created_at
-            
-            if conv.updated_at and conv.updated_at > instructor_conversations[instructor_id]["latest_updated_at"]:
-                instructor_conversations[instructor_id]["latest_updated_at"] = conv.updated_at
-        
-        # Convert to list and sort by latest activity
-        result = []
-        for instructor_data in instructor_conversations.values():
-            result.append({
-                "id": f"instructor_{instructor_data['instructor_id']}",  # Use instructor ID as conversation ID
-                "user_id": instructor_data["user_id"],
-                "instructor_id": instructor_data["instructor_id"],
-                "instructor_name": instructor_data["instructor_name"],
-                "instructor_profile_picture": instructor_data["instructor_profile_picture"],
-                "user_name": instructor_data["user_name"],
-                "user_profile_picture": instructor_data["user_profile_picture"],
-                "course_titles": [conv["course_title"] for conv in instructor_data["conversations"]],
-                "last_message": instructor_data["latest_message"],
-                "unread_count": instructor_data["total_unread"],
-                "created_at": instructor_data["conversations"][0]["created_at"],
-                "updated_at": instructor_data["latest_updated_at"],
-                "conversation_count": len(instructor_data["conversations"])
-            })
-        
-        # Sort by latest activity and apply pagination
-        result.sort(key=lambda x: x["updated_at"], reverse=True)
-        paginated_result = result[offset:offset + limit]
-        
-        return {
-            "conversations": paginated_result,
-            "total": len(result)
-        }
+        return await ChatInboxService(self.db).get_inbox(user_id, as_instructor=False, page=page, limit=limit, cursor=cursor)
 
-    def get_instructor_messages(self, user_id: int, instructor_id: int, page: int = 1, limit: int = 50) -> dict:
+    async def get_instructor_messages(self, user_id: int, instructor_id: int, page: int = 1, limit: int = 50,
+                                      cursor: Optional[str] = None, count: str = "exact") -> dict:
         """Get all messages from all conversations with a specific instructor"""
-        
-        offset = (page - 1) * limit
-        
+
         # Get all conversations between user and instructor
-        conversations = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.instructor_id == instructor_id
-            )
-        ).all()
-        
+        conversations = await self._get_conversations_between(user_id, instructor_id)
+
         if not conversations:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No conversations found with this instructor"
             )
-        
-        # Get all messages from all conversations
+
+        # Get all messages from all conversations (newest first)
         conversation_ids = [conv.id for conv in conversations]
-        messages = self.db.query(Message).options(
-            joinedload(Message.sender)
-        ).filter(
-            Message.conversation_id.in_(conversation_ids)
-        ).order_by(Message.created_at.desc()).offset(offset).limit(limit).all()  # Changed to desc() to get newest first
-        
-        total = self.db.query(Message).filter(
-            Message.conversation_id.in_(conversation_ids)
-        ).count()
-        
+        messages, page_info = await self._get_message_page(conversation_ids, page, limit, cursor, count)
+
         # Mark messages as read
-        self.db.query(Message).filter(
-            and_(
-                Message.conversation_id.in_(conversation_ids),
-                Message.sender_id != user_id,
-                Message.is_read == False
-            )
-        ).update({"is_read": True})
-        self.db.commit()
-        
-        result = []
-        for msg in messages:
-            result.append({
-                "id": msg.id,
-                "conversation_id": msg.conversation_id,
-                "sender_id": msg.sender_id,
-                "sender_name": f"{msg.sender.firstname} {msg.sender.lastname}",
-                "sender_profile_picture": msg.sender.profile_picture,
-                "message_type": msg.message_type,
-                "content": msg.content,
-                "is_read": msg.is_read,
-                "created_at": msg.created_at
-            })
-        
-        # Get instructor details for conversation info
-        instructor = self.db.query(User).filter(User.id == instructor_id).first()
-        user = self.db.query(User).filter(User.id == user_id).first()
-        
-        # Get course titles
-        course_titles = []
-        for conv in conversations:
-            course = self.db.query(Course).filter(Course.id == conv.course_id).first()
-            if course:
-                course_titles.append(course.title)
-        
-        # Get the latest message across all conversations
-        latest_message = None
-        latest_message_time = None
-        total_unread = 0
-        
-        for conv in conversations:
-            # Get last message for this conversation
-            last_msg = self.db.query(Message).options(
-                joinedload(Message.sender)
-            ).filter(
-                Message.conversation_id == conv.id
-            ).order_by(Message.created_at.desc()).first()
-            
-            if last_msg and (latest_message is None or last_msg.created_at > latest_message_time):
-                latest_message = {
-                    "id": last_msg.id,
-                    "conversation_id": conv.id,
-                    "content": last_msg.content,
-                    "message_type": last_msg.message_type,
-                    "created_at": last_msg.created_at,
-                    "sender_id": last_msg.sender_id,
-                    "sender_name": f"{last_msg.sender.firstname} {last_msg.sender.lastname}",
-                    "sender_profile_picture": last_msg.sender.profile_picture,
-                    "is_read": last_msg.is_read
-                }
-                latest_message_time = last_msg.created_at
-            
-            # Get unread count for this conversation
-            unread_count = self.db.query(Message).filter(
+        await self.db.execute(
+            update(Message).where(
                 and_(
-                    Message.conversation_id == conv.id,
+                    Message.conversation_id.in_(conversation_ids),
                     Message.sender_id != user_id,
                     Message.is_read == False
                 )
-            ).count()
-            total_unread += unread_count
-        
-        conv_details = {
-            "id": f"instructor_{instructor_id}",
-            "user_id": user_id,
-            "instructor_id": instructor_id,
-            "course_titles": course_titles,
-            "instructor_name": f"{instructor.firstname} {instructor.lastname}",
-            "instructor_profile_picture": instructor.profile_picture,
-            "user_name": f"{user.firstname} {user.lastname}",
-            "user_profile_picture": user.profile_picture,
-            "last_message": latest_message,
-            "unread_count": total_unread,
-            "conversation_count": len(conversations),
-            "created_at": conversations[0].created_at,
-            "updated_at": max([conv.updated_at or conv.created_at for conv in conversations])
-        }
-        
+            ).values(is_read=True)
+        )
+        await ConversationSummaryService(self.db).mark_read(conversation_ids, user_id)
+        await self.db.commit()
+
+        result = [self._message_to_dict(msg) for msg in messages]
+
+        # Grouped conversation details (last message, unread total, course titles)
+        conv_details = await ChatInboxService(self.db).get_thread_summary(
+            user_id, instructor_id, as_instructor=False
+        )
+
         return {
             "messages": result,
-            "total": total,
+            **page_info,
             "conversation": conv_details
         }
 
-    def get_instructor_user_messages(self, user_id: int, instructor_id: int, page: int = 1, limit: int = 50) -> dict:
+    async def get_instructor_user_messages(self, user_id: int, instructor_id: int, page: int = 1, limit: int = 50,
+                                           cursor: Optional[str] = None, count: str = "exact") -> dict:
         """Get all messages from all conversations with a specific user (for instructors)"""
-        
-        offset = (page - 1) * limit
-        
+
         # Get all conversations between user and instructor
-        conversations = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.instructor_id == instructor_id
-            )
-        ).order_by(Conversation.updated_at.desc()).all()
-        
+        conversations = await self._get_conversations_between(user_id, instructor_id)
+
         if not conversations:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No conversations found with this user"
             )
-        
-        # Get all messages from all conversations
+
+        # Get all messages from all conversations (newest first)
         conversation_ids = [conv.id for conv in conversations]
-        messages = self.db.query(Message).options(
-            joinedload(Message.sender)
-        ).filter(
-            Message.conversation_id.in_(conversation_ids)
-        ).order_by(Message.created_at.desc()).offset(offset).limit(limit).all()  # Changed to desc() to get newest first
-        
-        total = self.db.query(Message).filter(
-            Message.conversation_id.in_(conversation_ids)
-        ).count()
-        
-        result = []
-        for msg in messages:
-            result.append({
-                "id": msg.id,
-                "conversation_id": msg.conversation_id,
-                "sender_id": msg.sender_id,
-                "sender_name": f"{msg.sender.firstname} {msg.sender.lastname}",
-                "sender_profile_picture": msg.sender.profile_picture,
-                "message_type": msg.message_type,
-                "content": msg.content,
-                "is_read": msg.is_read,
-                "created_at": msg.created_at
-            })
-        
-        # Get instructor details for conversation info
-        instructor = self.db.query(User).filter(User.id == instructor_id).first()
-        user = self.db.query(User).filter(User.id == user_id).first()
-        
-        # Get course titles
-        course_titles = []
-        for conv in conversations:
-            course = self.db.query(Course).filter(Course.id == conv.course_id).first()
-            if course:
-                course_titles.append(course.title)
-        
-        # Get the latest message across all conversations
-        latest_message = None
-        latest_message_time = None
-        total_unread = 0
-        
-        for conv in conversations:
-            # Get last message for this conversation
-            last_msg = self.db.query(Message).options(
-                joinedload(Message.sender)
-            ).filter(
-                Message.conversation_id == conv.id
-            ).order_by(Message.created_at.desc()).first()
-            
-            if last_msg and (latest_message is None or last_msg.created_at > latest_message_time):
-                latest_message = {
-                    "id": last_msg.id,
-                    "conversation_id": conv.id,
-                    "content": last_msg.content,
-                    "message_type": last_msg.message_type,
-                    "created_at": last_msg.created_at,
-                    "sender_id": last_msg.sender_id,
-                    "sender_name": f"{last_msg.sender.firstname} {last_msg.sender.lastname}",
-                    "sender_profile_picture": last_msg.sender.profile_picture,
-                    "is_read": last_msg.is_read
-                }
-                latest_message_time = last_msg.created_at
-            
-            # Get unread count for this conversation
-            unread_count = self.db.query(Message).filter(
-                and_(
-                    Message.conversation_id == conv.id,
-                    Message.sender_id != instructor_id,
-                    Message.is_read == False
-                )
-            ).count()
-            total_unread += unread_count
-        
-        conv_details = {
-            "id": f"user_{user_id}",
-            "user_id": user_id,
-            "instructor_id": instructor_id,
-            "course_titles": course_titles,
-            "instructor_name": f"{instructor.firstname} {instructor.lastname}",
-            "instructor_profile_picture": instructor.profile_picture,
-            "user_name": f"{user.firstname} {user.lastname}",
-            "user_profile_picture": user.profile_picture,
-            "last_message": latest_message,
-            "unread_count": total_unread,
-            "conversation_count": len(conversations),
-            "created_at": conversations[0].created_at,
-            "updated_at": max([conv.updated_at or conv.created_at for conv in conversations])
-        }
-        
+        messages, page_info = await self._get_message_page(conversation_ids, page, limit, cursor, count)
+
+        result = [self._message_to_dict(msg) for msg in messages]
+
+        # Grouped conversation details (last message, unread total, course titles)
+        conv_details = await ChatInboxService(self.db).get_thread_summary(
+            instructor_id, user_id, as_instructor=True
+        )
+
         return {
             "messages": result,
-            "total": total,
+            **page_info,
             "conversation": conv_details
         }
 
@@ -487,12 +273,7 @@ class ChatService:
         from datetime import datetime
 
         # Get all conversations between user and instructor
-        conversations = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.instructor_id == instructor_id
-            )
-        ).order_by(Conversation.updated_at.desc()).all()
+        conversations = await self._get_conversations_between(user_id, instructor_id)
 
         if not conversations:
             raise HTTPException(
@@ -526,10 +307,13 @@ class ChatService:
 
         self.db.add(message)
         conversation.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(message)
+        await self.db.flush()
+        await ConversationSummaryService(self.db).record_message(conversation, message)
+
+        await self.db.commit()
+        await self.db.refresh(message)
 
-        sender = self.db.query(User).filter(User.id == sender_id).first()
+        sender = await self.db.get(User, sender_id)
 
         # Send WebSocket notification to both participants
         ws_message = {
@@ -538,8 +322,9 @@ class ChatService:
             "conversation_id": message.conversation_id,
             "sender_id": message.sender_id,
             "sender_name": f"{sender.firstname} {sender.lastname}",
-            "sender_profile_picture": sender.profile_picture,
+            "sender_profile_picture": avatar_variant(sender),
             "message_type": message.message_type,
+            "image_variants": message.image_variants,
             "content": message.content,
             "is_read": message.is_read,
             "created_at": message.created_at.isoformat()
@@ -553,13 +338,13 @@ class ChatService:
             else:
                 # Instructor is sending to user
                 recipient_id = user_id
-            
+
             # Simple WebSocket message sending - import at function level
             try:
                 from aetherium.sockets.websocket import manager
                 # Use asyncio to send message without making function async
                 import asyncio
-                
+
                 # Try to get the current event loop
                 try:
                     loop = asyncio.get_running_loop()
@@ -569,11 +354,11 @@ class ChatService:
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     print(f"✅ Created new event loop for WebSocket message to user {recipient_id}")
-                
+
                 # Send the WebSocket message
                 task = loop.create_task(manager.send_chat_message(recipient_id, ws_message))
                 print(f"✅ WebSocket message task created for user {recipient_id}")
-                
+
                 # Wait for the task to complete (with timeout)
                 try:
                     await asyncio.wait_for(task, timeout=5.0)
@@ -582,13 +367,13 @@ class ChatService:
                     print(f"⚠️ WebSocket message timeout for user {recipient_id}")
                 except Exception as task_error:
                     print(f"❌ WebSocket message task error for user {recipient_id}: {task_error}")
-                    
+
             except Exception as ws_error:
                 print(f"❌ WebSocket error (non-critical): {ws_error}")
                 import traceback
                 traceback.print_exc()
                 # Continue anyway - message was saved to DB
-                
+
         except Exception as e:
             print(f"❌ Error in message processing: {e}")
             import traceback
@@ -604,12 +389,7 @@ class ChatService:
         from aetherium.services.cloudinary_service import cloudinary_service
 
         # Get all conversations between user and instructor
-        conversations = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.instructor_id == instructor_id
-            )
-        ).order_by(Conversation.updated_at.desc()).all()
+        conversations = await self._get_conversations_between(user_id, instructor_id)
 
         if not conversations:
             raise HTTPException(
@@ -637,12 +417,8 @@ class ChatService:
             # read file content
             file_content = await file.read()
 
-            # wrap into BytesIO
-            file_stream = io.BytesIO(file_content)
-            file_stream.seek(0)
-
-            # pass file stream to service
-            upload_result = await cloudinary_service.upload_image(file_stream, folder="chat_images")
+            # pass file content to service
+            upload_result, image_variants = await self._upload_chat_image(file_content)
 
             image_url = upload_result.get("secure_url")
             if not image_url:
@@ -651,6 +427,8 @@ class ChatService:
                     detail="Failed to upload image"
                 )
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -662,14 +440,18 @@ class ChatService:
             conversation_id=conversation.id,
             sender_id=sender_id,
             content=image_url,
-            message_type="image"
+            message_type="image",
+            image_variants=image_variants
         )
         self.db.add(message)
         conversation.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(message)
+        await self.db.flush()
+        await ConversationSummaryService(self.db).record_message(conversation, message)
 
-        sender = self.db.query(User).filter(User.id == sender_id).first()
+        await self.db.commit()
+        await self.db.refresh(message)
+
+        sender = await self.db.get(User, sender_id)
 
         ws_message = {
             "type": "chat_message",
@@ -677,8 +459,9 @@ class ChatService:
             "conversation_id": message.conversation_id,
             "sender_id": message.sender_id,
             "sender_name": f"{sender.firstname} {sender.lastname}",
-            "sender_profile_picture": sender.profile_picture,
+            "sender_profile_picture": avatar_variant(sender),
             "message_type": message.message_type,
+            "image_variants": message.image_variants,
             "content": message.content,
             "is_read": message.is_read,
             "created_at": message.created_at.isoformat()
@@ -691,13 +474,13 @@ class ChatService:
             else:
                 # Instructor is sending to user
                 recipient_id = user_id
-            
+
             # Simple WebSocket message sending - import at function level
             try:
                 from aetherium.sockets.websocket import manager
                 # Use asyncio to send message without making function async
                 import asyncio
-                
+
                 # Try to get the current event loop
                 try:
                     loop = asyncio.get_running_loop()
@@ -707,11 +490,11 @@ class ChatService:
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     print(f"✅ Created new event loop for WebSocket image message to user {recipient_id}")
-                
+
                 # Send the WebSocket message
                 task = loop.create_task(manager.send_chat_message(recipient_id, ws_message))
                 print(f"✅ WebSocket image message task created for user {recipient_id}")
-                
+
                 # Wait for the task to complete (with timeout)
                 try:
                     await asyncio.wait_for(task, timeout=5.0)
@@ -720,193 +503,56 @@ class ChatService:
                     print(f"⚠️ WebSocket image message timeout for user {recipient_id}")
                 except Exception as task_error:
                     print(f"❌ WebSocket image message task error for user {recipient_id}: {task_error}")
-                    
+
             except Exception as ws_error:
                 print(f"❌ WebSocket error (non-critical): {ws_error}")
                 import traceback
                 traceback.print_exc()
                 # Continue anyway - message was saved to DB
-                
+
         except Exception as e:
             print(f"Error in image message processing: {e}")
 
         return ws_message
 
-    def get_instructor_conversations(self, instructor_id: int, page: int = 1, limit: int = 20) -> dict:
+    async def get_instructor_conversations(self, instructor_id: int, page: int = 1, limit: int = 20, cursor: Optional[str] = None) -> dict:
         """Get all conversations for an instructor, grouped by user"""
-        
-        # Get all conversations for the instructor
-        all_conversations = self.db.query(Conversation).options(
-            joinedload(Conversation.course),
-            joinedload(Conversation.instructor),
-            joinedload(Conversation.user),
-            joinedload(Conversation.messages)
-        ).filter(
-            Conversation.instructor_id == instructor_id
-        ).all()
-        
-        # Group conversations by user
-        user_conversations = {}
-        for conv in all_conversations:
-            user_id = conv.user_id
-            if user_id not in user_conversations:
-                user_conversations[user_id] = {
-                    "user_id": user_id,
-                    "user_name": f"{conv.user.firstname} {conv.user.lastname}",
-                    "user_profile_picture": conv.user.profile_picture,
-                    "instructor_id": conv.instructor_id,
-                    "instructor_name": f"{conv.instructor.firstname} {conv.instructor.lastname}",
-                    "instructor_profile_picture": conv.instructor.profile_picture,
-                    "conversations": [],
-                    "total_unread": 0,
-                    "latest_message": None,
-                    "latest_updated_at": conv.created_at
-                }
-            
-            # Get last message for this conversation
-            last_message = self.db.query(Message).options(
-                joinedload(Message.sender)
-            ).filter(
-                Message.conversation_id == conv.id
-            ).order_by(Message.created_at.desc()).first()
-            
-            # Get unread count for this conversation
-            unread_count = self.db.query(Message).filter(
-                and_(
-                    Message.conversation_id == conv.id,
-                    Message.sender_id != instructor_id,
-                    Message.is_read == False
-                )
-            ).count()
-            
-            # Add conversation to user's list
-            user_conversations[user_id]["conversations"].append({
-                "id": conv.id,
-                "course_id": conv.course_id,
-                "course_title": conv.course.title,
-                "last_message": {
-                    "id": last_message.id,
-                    "conversation_id": conv.id,
-                    "content": last_message.content,
-                    "message_type": last_message.message_type,
-                    "created_at": last_message.created_at,
-                    "sender_id": last_message.sender_id,
-                    "sender_name": f"{last_message.sender.firstname} {last_message.sender.lastname}",
-                    "sender_profile_picture": last_message.sender.profile_picture,
-                    "is_read": last_message.is_read
-                } if last_message else None,
-                "unread_count": unread_count,
-                "created_at": conv.created_at,
-                "updated_at": conv.updated_at or conv.created_at
-            })
-            
-            # Update total unread count
-            user_conversations[user_id]["total_unread"] += unread_count
-            
-            # Update latest message and updated_at
-            if last_message and (user_conversations[user_id]["latest_message"] is None or 
-                               last_message.created_at > user_conversations[user_id]["latest_message"]["created_at"]):
-                user_conversations[user_id]["latest_message"] = {
-                    "id": last_message.id,
-                    "conversation_id": conv.id,
-                    "content": last_message.content,
-                    "message_type": last_message.message_type,
-                    "created_at": last_message.created_at,
-                    "sender_id": last_message.sender_id,
-                    "sender_name": f"{last_message.sender.firstname} {last_message.sender.lastname}",
-                    "sender_profile_picture": last_message.sender.profile_picture,
-                    "is_read": last_message.is_read
-                }
-                user_conversations[user_id]["latest_updated_at"] = last_message.created_at
-            
-            if conv.updated_at and conv.updated_at > user_conversations[user_id]["latest_updated_at"]:
-                user_conversations[user_id]["latest_updated_at"] = conv.updated_at
-        
-        # Convert to list and sort by latest activity
-        result = []
-        for user_data in user_conversations.values():
-            result.append({
-                "id": f"user_{user_data['user_id']}",  # Use user ID as conversation ID
-                "user_id": user_data["user_id"],
-                "instructor_id": user_data["instructor_id"],
-                "instructor_name": user_data["instructor_name"],
-                "instructor_profile_picture": user_data["instructor_profile_picture"],
-                "user_name": user_data["user_name"],
-                "user_profile_picture": user_data["user_profile_picture"],
-                "course_titles": [conv["course_title"] for conv in user_data["conversations"]],
-                "last_message": user_data["latest_message"],
-                "unread_count": user_data["total_unread"],
-                "created_at": user_data["conversations"][0]["created_at"],
-                "updated_at": user_data["latest_updated_at"],
-                "conversation_count": len(user_data["conversations"])
-            })
-        
-        # Sort by latest activity and apply pagination
-        result.sort(key=lambda x: x["updated_at"], reverse=True)
-        total = len(result)
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        result = result[start_idx:end_idx]
-        
-        return {
-            "conversations": result,
-            "total": total
-        }
+        return await ChatInboxService(self.db).get_inbox(instructor_id, as_instructor=True, page=page, limit=limit, cursor=cursor)
 
-    def get_conversation_messages(self, conversation_id: int, user_id: int, page: int = 1, limit: int = 50) -> dict:
+    async def get_conversation_messages(self, conversation_id: int, user_id: int, page: int = 1, limit: int = 50,
+                                        cursor: Optional[str] = None, count: str = "exact") -> dict:
         """Get messages for a specific conversation"""
-        
+
         # Verify user has access to this conversation
-        conversation = self.db.query(Conversation).filter(
-            and_(
-                Conversation.id == conversation_id,
-                (Conversation.user_id == user_id) | (Conversation.instructor_id == user_id)
-            )
-        ).first()
-        
+        conversation = await self._get_conversation(
+            Conversation.id == conversation_id,
+            (Conversation.user_id == user_id) | (Conversation.instructor_id == user_id)
+        )
+
         if not conversation:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
-        
-        offset = (page - 1) * limit
-        
-        # Get messages with sender info
-        messages = self.db.query(Message).options(
-            joinedload(Message.sender)
-        ).filter(
-            Message.conversation_id == conversation_id
-        ).order_by(Message.created_at.desc()).offset(offset).limit(limit).all()  # Changed to desc() to get newest first
-        
-        total = self.db.query(Message).filter(
-            Message.conversation_id == conversation_id
-        ).count()
-        
+
+        # Get messages with sender info (newest first)
+        messages, page_info = await self._get_message_page([conversation_id], page, limit, cursor, count)
+
         # Mark messages as read
-        self.db.query(Message).filter(
-            and_(
-                Message.conversation_id == conversation_id,
-                Message.sender_id != user_id,
-                Message.is_read == False
-            )
-        ).update({"is_read": True})
-        self.db.commit()
-        
-        result = []
-        for msg in messages:
-            result.append({
-                "id": msg.id,
-                "conversation_id": msg.conversation_id,
-                "sender_id": msg.sender_id,
-                "sender_name": f"{msg.sender.firstname} {msg.sender.lastname}",
-                "sender_profile_picture": msg.sender.profile_picture,
-                "message_type": msg.message_type,
-                "content": msg.content,
-                "is_read": msg.is_read,
-                "created_at": msg.created_at
-            })
-        
+        await self.db.execute(
+            update(Message).where(
+                and_(
+                    Message.conversation_id == conversation_id,
+                    Message.sender_id != user_id,
+                    Message.is_read == False
+                )
+            ).values(is_read=True)
+        )
+        await ConversationSummaryService(self.db).mark_read([conversation_id], user_id)
+        await self.db.commit()
+
+        result = [self._message_to_dict(msg) for msg in messages]
+
         # Get conversation details
         conv_details = {
             "id": conversation.id,
@@ -915,79 +561,78 @@ class ChatService:
             "course_id": conversation.course_id,
             "course_title": conversation.course.title,
             "instructor_name": f"{conversation.instructor.firstname} {conversation.instructor.lastname}",
-            "instructor_profile_picture": conversation.instructor.profile_picture,
+            "instructor_profile_picture": avatar_variant(conversation.instructor),
             "user_name": f"{conversation.user.firstname} {conversation.user.lastname}",
-            "user_profile_picture": conversation.user.profile_picture,
+            "user_profile_picture": avatar_variant(conversation.user),
             "created_at": conversation.created_at,
             "updated_at": conversation.updated_at
         }
-        
+
         return {
             "messages": result,
-            "total": total,
+            **page_info,
             "conversation": conv_details
         }
 
-    def mark_conversation_messages_as_read(self, conversation_id: int, user_id: int) -> dict:
+    async def mark_conversation_messages_as_read(self, conversation_id: int, user_id: int) -> dict:
         """Mark all messages in a conversation as read"""
         # Mark all messages from other users as read
-        self.db.query(Message).filter(
-            and_(
-                Message.conversation_id == conversation_id,
-                Message.sender_id != user_id,
-                Message.is_read == False
-            )
-        ).update({"is_read": True})
-        
-        self.db.commit()
+        await self.db.execute(
+            update(Message).where(
+                and_(
+                    Message.conversation_id == conversation_id,
+                    Message.sender_id != user_id,
+                    Message.is_read == False
+                )
+            ).values(is_read=True)
+        )
+
+        await ConversationSummaryService(self.db).mark_read([conversation_id], user_id)
+        await self.db.commit()
         return {"message": "Messages marked as read"}
 
-    def mark_instructor_messages_as_read(self, instructor_id: int, user_id: int) -> dict:
+    async def mark_instructor_messages_as_read(self, instructor_id: int, user_id: int) -> dict:
         """Mark all messages from an instructor as read (for users)"""
         # Get all conversations between user and instructor
-        conversations = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.instructor_id == instructor_id
-            )
-        ).all()
-        
+        conversations = await self._get_conversations_between(user_id, instructor_id)
+
         conversation_ids = [conv.id for conv in conversations]
-        
+
         # Mark all messages from instructor as read
-        self.db.query(Message).filter(
-            and_(
-                Message.conversation_id.in_(conversation_ids),
-                Message.sender_id == instructor_id,
-                Message.is_read == False
-            )
-        ).update({"is_read": True})
-        
-        self.db.commit()
+        await self.db.execute(
+            update(Message).where(
+                and_(
+                    Message.conversation_id.in_(conversation_ids),
+                    Message.sender_id == instructor_id,
+                    Message.is_read == False
+                )
+            ).values(is_read=True)
+        )
+
+        await ConversationSummaryService(self.db).mark_read(conversation_ids, user_id)
+        await self.db.commit()
         return {"message": "Messages marked as read"}
 
-    def mark_user_messages_as_read(self, user_id: int, instructor_id: int) -> dict:
+    async def mark_user_messages_as_read(self, user_id: int, instructor_id: int) -> dict:
         """Mark all messages from a user as read (for instructors)"""
         # Get all conversations between user and instructor
-        conversations = self.db.query(Conversation).filter(
-            and_(
-                Conversation.user_id == user_id,
-                Conversation.instructor_id == instructor_id
-            )
-        ).all()
-        
+        conversations = await self._get_conversations_between(user_id, instructor_id)
+
         conversation_ids = [conv.id for conv in conversations]
-        
+
         # Mark all messages from user as read
-        self.db.query(Message).filter(
-            and_(
-                Message.conversation_id.in_(conversation_ids),
-                Message.sender_id == user_id,
-                Message.is_read == False
-            )
-        ).update({"is_read": True})
-        
-        self.db.commit()
+        await self.db.execute(
+            update(Message).where(
+                and_(
+                    Message.conversation_id.in_(conversation_ids),
+                    Message.sender_id == user_id,
+                    Message.is_read == False
+                )
+            ).values(is_read=True)
+        )
+
+        await ConversationSummaryService(self.db).mark_read(conversation_ids, instructor_id)
+        await self.db.commit()
         return {"message": "Messages marked as read"}
 
     # async def send_message(self, message_data: MessageCreate, sender_id: int,manager:NotificationManager) -> dict:
@@ -1053,27 +698,30 @@ class ChatService:
         
     #     return message_response
 
+
     async def send_message(
-    self, 
-    message_data: MessageCreate, 
+    self,
+    message_data: MessageCreate,
     sender_id: int,
     manager: NotificationManager  # Now properly passed from endpoint
 ) -> dict:
         """Send a new message"""
         # Verify sender has access to this conversation
-        conversation = self.db.query(Conversation).filter(
-            and_(
-                Conversation.id == message_data.conversation_id,
-                (Conversation.user_id == sender_id) | (Conversation.instructor_id == sender_id)
+        conversation = (await self.db.execute(
+            select(Conversation).where(
+                and_(
+                    Conversation.id == message_data.conversation_id,
+                    (Conversation.user_id == sender_id) | (Conversation.instructor_id == sender_id)
+                )
             )
-        ).first()
-        
+        )).scalars().first()
+
         if not conversation:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
-        
+
         # Create new message
         message = Message(
             conversation_id=message_data.conversation_id,
@@ -1081,33 +729,37 @@ class ChatService:
             message_type=message_data.message_type,
             content=message_data.content
         )
-        
+
         self.db.add(message)
-        
+
         # Update conversation timestamp
         conversation.updated_at = func.now()
-        
-        self.db.commit()
-        self.db.refresh(message)
-        
+
+        await self.db.flush()
+        await ConversationSummaryService(self.db).record_message(conversation, message)
+
+        await self.db.commit()
+        await self.db.refresh(message)
+
         # Get sender info
-        sender = self.db.query(User).filter(User.id == sender_id).first()
-        
+        sender = await self.db.get(User, sender_id)
+
         message_response = {
             "id": message.id,
             "conversation_id": message.conversation_id,
             "sender_id": message.sender_id,
                             "sender_name": f"{sender.firstname} {sender.lastname}",
-                "sender_profile_picture": sender.profile_picture,
+                "sender_profile_picture": avatar_variant(sender),
                 "message_type": message.message_type,
+                "image_variants": message.image_variants,
                 "content": message.content,
                 "is_read": message.is_read,
                 "created_at": message.created_at
             }
-            
+
             # Send WebSocket notification to the other participant
         recipient_id = conversation.user_id if sender_id == conversation.instructor_id else conversation.instructor_id
-        
+
         try:
             # Simple WebSocket message sending - import at function level
             try:
@@ -1119,92 +771,139 @@ class ChatService:
         except Exception as e:
             logger.error(f"Failed to send WebSocket notification: {e}")
             # Continue anyway - the message was saved to DB
-        
+
         return message_response
 
-    def upload_image(self, file, conversation_id: int, sender_id: int) -> dict:
+    async def _upload_chat_image(self, file_content: bytes) -> Tuple[dict, dict]:
+        """
+        Upload a chat image re-encoded without its metadata and capped at
+        CHAT_IMAGE_MAX_EDGE, plus a preview; returns the image's upload result and the
+        message's image_variants.
+        """
+        try:
+            rendered = await get_image_pipeline().render(file_content, CHAT_IMAGE_MAX_EDGE, [CHAT_PREVIEW_SIZE])
+        except ImageRejected as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except ImagePipelineUnavailable as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+        upload_result = await self._store_chat_image(rendered["main"], "image.webp")
+        preview = await self._store_chat_image(rendered["variants"][CHAT_PREVIEW_SIZE], "preview.webp")
+        image_variants = {
+            "preview": preview.get("secure_url"),
+            "blurhash": rendered["blurhash"],
+            "width": rendered["width"],
+            "height": rendered["height"],
+        }
+        return upload_result, image_variants
+
+    async def _store_chat_image(self, data: bytes, filename: str) -> dict:
+        """
+        Upload an image, or link the copy already uploaded when the same image was
+        sent before. The media reference is committed with the message.
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        size = len(data)
+        reused = await self.db.run_sync(MediaIndex.reuse, sha256, size, CHAT_IMAGE_KIND)
+        if reused is not None:
+            return reused
+
+        upload_result = await cloudinary_service.upload_image(io.BytesIO(data), folder="chat_images", filename=filename)
+        if not upload_result.get("public_id"):
+            return upload_result
+        upload_result, duplicate_public_id = await self.db.run_sync(
+            MediaIndex.record_upload, sha256, size, CHAT_IMAGE_KIND, upload_result
+        )
+        if duplicate_public_id:
+            try:
+                await cloudinary_service.delete_file(duplicate_public_id, "image")
+            except HTTPException as e:
+                logger.warning(f"Could not delete duplicate chat image {duplicate_public_id}: {e.detail}")
+        return upload_result
+
+    async def upload_image(self, file, conversation_id: int, sender_id: int) -> dict:
         """Upload and send an image message"""
-        
+
         # Verify sender has access to this conversation
-        conversation = self.db.query(Conversation).filter(
-            and_(
-                Conversation.id == conversation_id,
-                (Conversation.user_id == sender_id) | (Conversation.instructor_id == sender_id)
+        conversation = (await self.db.execute(
+            select(Conversation).where(
+                and_(
+                    Conversation.id == conversation_id,
+                    (Conversation.user_id == sender_id) | (Conversation.instructor_id == sender_id)
+                )
             )
-        ).first()
-        
+        )).scalars().first()
+
         if not conversation:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
-        
+
         # Upload to Cloudinary
         try:
-            upload_result = cloudinary_service.upload_file(file, folder="chat_images")
+            upload_result, image_variants = await self._upload_chat_image(await file.read())
             image_url = upload_result.get('secure_url')
-            
+
             if not image_url:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to upload image"
                 )
-            
+
             # Create message with image URL
             message = Message(
                 conversation_id=conversation_id,
                 sender_id=sender_id,
                 message_type="image",
-                content=image_url
+                content=image_url,
+                image_variants=image_variants
             )
-            
+
             self.db.add(message)
-            
+
             # Update conversation timestamp
             conversation.updated_at = func.now()
-            
-            self.db.commit()
-            self.db.refresh(message)
-            
+
+            await self.db.flush()
+            await ConversationSummaryService(self.db).record_message(conversation, message)
+
+            await self.db.commit()
+            await self.db.refresh(message)
+
             # Get sender info
-            sender = self.db.query(User).filter(User.id == sender_id).first()
-            
+            sender = await self.db.get(User, sender_id)
+
             message_response = {
                 "id": message.id,
                 "conversation_id": message.conversation_id,
                 "sender_id": message.sender_id,
                 "sender_name": f"{sender.firstname} {sender.lastname}",
-                "sender_profile_picture": sender.profile_picture,
+                "sender_profile_picture": avatar_variant(sender),
                 "message_type": message.message_type,
+                "image_variants": message.image_variants,
                 "content": message.content,
                 "is_read": message.is_read,
                 "created_at": message.created_at
             }
-            
+
             # Send WebSocket notification to the other participant
             recipient_id = conversation.user_id if sender_id == conversation.instructor_id else conversation.instructor_id
-            
-            # Use asyncio to send WebSocket message without making function async
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
+
             # Import manager and send WebSocket message
             from aetherium.sockets.websocket import manager
             try:
-            # Send WebSocket message
-                loop.create_task(manager.send_chat_message(recipient_id, message_response))
+                await manager.send_chat_message(recipient_id, message_response)
             except Exception as e:
                 print(f"Failed to send WebSocket notification: {e}")
                 # Continue anyway - the message was saved to DB
-            
+
             return message_response
-            
+
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to upload image: {str(e)}"
-            ) 
\ No newline at end of file
+            )
@@ -8,6 +8,8 @@ import os,time,io,asyncio
 from pathlib import Path
 from aetherium.config import settings
 from aetherium.core.logger import logger
+from aetherium.services.media_storage import get_media_storage
+from aetherium.services.upload_executor import get_upload_executor
 
 class CloudinaryService:
     def __init__(self):
@@ -27,15 +29,14 @@ class CloudinaryService:
     folder: str = "elearning/videos") -> Dict[str, Any]:
         """Robust video upload with chunking support"""
         try:
-            # Create isolated copy of the stream
-            file_stream.seek(0)
-            file_content = file_stream.read()
-            new_stream = io.BytesIO(file_content)
+            # Upload straight from the stream (may be a staged file); no in-memory copy
+            file_stream.seek(0, 2)
+            file_size = file_stream.tell()
 
             def _upload():
-                new_stream.seek(0)
-                return cloudinary.uploader.upload(
-                    new_stream,
+                file_stream.seek(0)
+                return get_media_storage().upload(
+                    file_stream,
                     resource_type="video",
                     folder=folder,
                     filename=filename,
@@ -53,7 +54,7 @@ class CloudinaryService:
                     ]
                 )
 
-            result = await asyncio.get_event_loop().run_in_executor(None, _upload)
+            result = await get_upload_executor().run("video", _upload, timeout=300)
 
             # Ensure we have required fields
             if not all(k in result for k in ['secure_url', 'public_id']):
@@ -63,7 +64,8 @@ class CloudinaryService:
                 "public_id": result["public_id"],
                 "url": result["secure_url"],
                 "file_type": "video",
-                "file_size": result.get("bytes", len(file_content)),
+                "resource_type": result.get("resource_type", "video"),
+                "file_size": result.get("bytes", file_size),
                 "duration": result.get("duration", 0),
                 "thumbnail": result.get("thumbnail_url", "")
             }
@@ -95,12 +97,17 @@ class CloudinaryService:
                 }
             }
             
-            result = cloudinary.uploader.upload(file_stream, **upload_params)
+            # Off the event loop; the SDK call blocks for the whole transfer
+            result = await get_upload_executor().run(
+                "raw", lambda: get_media_storage().upload(file_stream, **upload_params), timeout=upload_params['timeout']
+            )
             
             return {
                 'public_id': result['public_id'],
                 'url': result['secure_url'],
                 'format': result.get('format', 'pdf'),
+                # "auto" lands PDFs under image; deletes need the actual type
+                'resource_type': result.get('resource_type', 'image'),
                 'bytes': result.get('bytes', 0),
                 'pages': result.get('pages', 1)  # Number of pages in PDF
             }
@@ -150,7 +157,7 @@ class CloudinaryService:
         """Upload general file from stream"""
         try:
             def _upload():
-                return cloudinary.uploader.upload(
+                return get_media_storage().upload(
                     file_stream,
                     resource_type="raw",
                     folder=folder,
@@ -160,7 +167,7 @@ class CloudinaryService:
                     filename=filename
                 )
             
-            result = await asyncio.get_event_loop().run_in_executor(None, _upload)
+            result = await get_upload_executor().run("raw", _upload, timeout=60)
 
             return {
                 "public_id": result.get("public_id", ""),
@@ -183,10 +190,12 @@ class CloudinaryService:
         file_stream = io.BytesIO(file_content)
         return await self.upload_video_from_stream(file_stream, file.filename, folder)
     
-    def upload_pdf(self, file: UploadFile, folder: str = "elearning/pdfs") -> Dict[str, Any]:
+    async def upload_pdf(self, file: UploadFile, folder: str = "elearning/pdfs") -> Dict[str, Any]:
         """Upload PDF file"""
         try:
-            result = cloudinary.uploader.upload(
+            result = await get_upload_executor().run(
+                "raw",
+                get_media_storage().upload,
                 file.file,
                 resource_type="raw",
                 folder=folder,
@@ -213,13 +222,15 @@ class CloudinaryService:
         """Delete file from Cloudinary"""
         try:
             def _delete():
-                return cloudinary.uploader.destroy(
+                return get_media_storage().destroy(
                     public_id,
                     resource_type=resource_type,
-                    invalidate=True
+                    invalidate=True,
+                    timeout=30
                 )
             
-            result = await asyncio.get_event_loop().run_in_executor(None, _delete)
+            # Deletes are short API calls: the raw bucket, not a video or image upload slot
+            result = await get_upload_executor().run("raw", _delete, timeout=30)
             return result.get("result") == "ok"
             
         except Exception as e:
@@ -228,10 +239,12 @@ class CloudinaryService:
                 detail=f"Failed to delete file: {str(e)}"
             )
     
-    def get_file_info(self, public_id: str, resource_type: str = "auto") -> Dict[str, Any]:
+    async def get_file_info(self, public_id: str, resource_type: str = "auto") -> Dict[str, Any]:
         """Get file information from Cloudinary"""
         try:
-            result = cloudinary.api.resource(public_id, resource_type=resource_type)
+            result = await get_upload_executor().run(
+                "raw", cloudinary.api.resource, public_id, resource_type=resource_type, timeout=30
+            )
             return result
             
         except Exception as e:
@@ -266,18 +279,21 @@ class CloudinaryService:
                 detail=f"Failed to generate signed URL: {str(e)}"
             )
         
-    async def upload_image(self, file_stream: io.BytesIO, folder: str = "chat_images"):
+    async def upload_image(self, file_stream: io.BytesIO, folder: str = "chat_images", filename: str = "image"):
         def _upload():
-            return cloudinary.uploader.upload(
+            return get_media_storage().upload(
                 file_stream,
                 resource_type="image",
                 folder=folder,
+                filename=filename,
                 use_filename=True,
                 unique_filename=True,
-                overwrite=False
+                overwrite=False,
+                timeout=60
             )
 
-        return await asyncio.get_event_loop().run_in_executor(None, _upload)
+        # Own cap: chat images are not held up by lesson uploads
+        return await get_upload_executor().run("image", _upload, timeout=60)
 
 # Initialize service
 cloudinary_service = CloudinaryService()
\ No newline at end of file
@@ -0,0 +1,197 @@
+# services/conversation_summary_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select, update, true, literal
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Dict, Any
+
+from aetherium.models.chat import Conversation, Message, ConversationSummary
+from aetherium.core.logger import logger
+
+PREVIEW_LENGTH = 200
+# Image previews keep their URL, cut only to what last_message_preview can store
+PREVIEW_COLUMN_LENGTH = ConversationSummary.__table__.c.last_message_preview.type.length
+
+SUMMARY_FIELDS = (
+    "last_message_id",
+    "last_sender_id",
+    "last_message_type",
+    "last_message_preview",
+    "last_message_at",
+    "user_unread_count",
+    "instructor_unread_count",
+)
+
+
+def message_preview(message_type: str, content: str) -> str:
+    """Inbox snippet for a message; image messages keep their URL"""
+    if message_type == "image":
+        return (content or "")[:PREVIEW_COLUMN_LENGTH]
+    return (content or "")[:PREVIEW_LENGTH]
+
+
+class ConversationSummaryService:
+    """
+    Keeps `conversation_summaries` in step with `messages`.
+
+    Every write goes through the caller's session and is committed together
+    with the message / read-flag change that caused it.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_message(self, conversation: Conversation, message: Message) -> None:
+        """Upsert the summary for a new message (message must be flushed)"""
+        sender_is_user = message.sender_id == conversation.user_id
+        stmt = insert(ConversationSummary).values(
+            conversation_id=conversation.id,
+            last_message_id=message.id,
+            last_sender_id=message.sender_id,
+            last_message_type=message.message_type,
+            last_message_preview=message_preview(message.message_type, message.content),
+            # Same transaction timestamp as the message's server default
+            last_message_at=func.now(),
+            user_unread_count=0 if sender_is_user else 1,
+            instructor_unread_count=1 if sender_is_user else 0,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ConversationSummary.conversation_id],
+            set_={
+                "last_message_id": stmt.excluded.last_message_id,
+                "last_sender_id": stmt.excluded.last_sender_id,
+                "last_message_type": stmt.excluded.last_message_type,
+                "last_message_preview": stmt.excluded.last_message_preview,
+                "last_message_at": stmt.excluded.last_message_at,
+                "user_unread_count": ConversationSummary.user_unread_count + stmt.excluded.user_unread_count,
+                "instructor_unread_count": ConversationSummary.instructor_unread_count + stmt.excluded.instructor_unread_count,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+
+    async def mark_read(self, conversation_ids: List[int], reader_id: int) -> None:
+        """Reset the reader's unread counter on the given conversations"""
+        if not conversation_ids:
+            return
+        await self.db.execute(
+            update(ConversationSummary)
+            .where(
+                and_(
+                    ConversationSummary.conversation_id.in_(conversation_ids),
+                    ConversationSummary.conversation_id == Conversation.id
+                )
+            )
+            .values(
+                user_unread_count=case(
+                    (Conversation.user_id == reader_id, 0),
+                    else_=ConversationSummary.user_unread_count
+                ),
+                instructor_unread_count=case(
+                    (Conversation.instructor_id == reader_id, 0),
+                    else_=ConversationSummary.instructor_unread_count
+                ),
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def _computed(self, conversation_ids: Optional[List[int]] = None):
+        """Summaries recomputed from the messages table (source of truth)"""
+        last_message = (
+            select(
+                Message.id.label("id"),
+                Message.sender_id.label("sender_id"),
+                Message.message_type.label("message_type"),
+                Message.content.label("content"),
+                Message.created_at.label("created_at"),
+            )
+            .where(Message.conversation_id == Conversation.id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+            .lateral("last_message")
+        )
+        unread = (
+            select(
+                func.count(Message.id).filter(Message.sender_id != Conversation.user_id).label("user_unread_count"),
+                func.count(Message.id).filter(Message.sender_id != Conversation.instructor_id).label("instructor_unread_count"),
+            )
+            .where(
+                and_(
+                    Message.conversation_id == Conversation.id,
+                    Message.is_read == False
+                )
+            )
+            .lateral("unread")
+        )
+
+        query = (
+            select(
+                Conversation.id.label("conversation_id"),
+                last_message.c.id.label("last_message_id"),
+                last_message.c.sender_id.label("last_sender_id"),
+                last_message.c.message_type.label("last_message_type"),
+                case(
+                    (last_message.c.message_type == "image", func.left(last_message.c.content, PREVIEW_COLUMN_LENGTH)),
+                    else_=func.left(last_message.c.content, PREVIEW_LENGTH)
+                ).label("last_message_preview"),
+                last_message.c.created_at.label("last_message_at"),
+                unread.c.user_unread_count,
+                unread.c.instructor_unread_count,
+            )
+            .select_from(Conversation)
+            .outerjoin(last_message, true())
+            .join(unread, true())
+        )
+        if conversation_ids is not None:
+            query = query.where(Conversation.id.in_(conversation_ids))
+        return query
+
+    async def rebuild(self, conversation_ids: Optional[List[int]] = None) -> int:
+        """Recompute summaries from messages (all conversations by default) and commit"""
+        computed = self._computed(conversation_ids).subquery()
+        stmt = insert(ConversationSummary).from_select(
+            list(("conversation_id",) + SUMMARY_FIELDS),
+            select(computed.c.conversation_id, *[computed.c[field] for field in SUMMARY_FIELDS]),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ConversationSummary.conversation_id],
+            set_={field: stmt.excluded[field] for field in SUMMARY_FIELDS} | {"updated_at": func.now()},
+        )
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        logger.info(f"Rebuilt {result.rowcount} conversation summaries")
+        return result.rowcount
+
+    async def check_consistency(self, conversation_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """List conversations whose stored summary differs from the messages table"""
+        computed = self._computed(conversation_ids).subquery("computed")
+        stored = {}
+        for field in SUMMARY_FIELDS:
+            column = getattr(ConversationSummary, field)
+            # A missing summary row is equivalent to zero unread messages
+            stored[field] = func.coalesce(column, 0) if field.endswith("_unread_count") else column
+
+        mismatch = literal(False)
+        for field in SUMMARY_FIELDS:
+            mismatch = mismatch | stored[field].is_distinct_from(computed.c[field])
+
+        rows = (await self.db.execute(
+            select(
+                computed,
+                *[stored[field].label(f"stored_{field}") for field in SUMMARY_FIELDS],
+            )
+            .select_from(computed)
+            .outerjoin(ConversationSummary, ConversationSummary.conversation_id == computed.c.conversation_id)
+            .where(mismatch)
+        )).all()
+
+        problems = []
+        for row in rows:
+            mapping = row._mapping
+            fields = {
+                field: {"stored": mapping[f"stored_{field}"], "expected": mapping[field]}
+                for field in SUMMARY_FIELDS
+                if mapping[f"stored_{field}"] != mapping[field]
+            }
+            problems.append({"conversation_id": row.conversation_id, "fields": fields})
+        return problems
@@ -0,0 +1,112 @@
+# services/course_graph_cache.py
+from sqlalchemy.orm import Session, noload, selectinload
+from sqlalchemy import select, update
+from fastapi import Request, Response
+from typing import Union
+import hashlib
+import redis
+
+from aetherium.core.logger import logger
+from aetherium.core.redis_client import get_async_redis
+from aetherium.models.courses import Course, Lesson, Section
+from aetherium.schemas.course import CourseResponse
+from aetherium.services.course_loaders import COURSE_REFERENCES, course_detail_options
+
+COURSE_GRAPH_PREFIX = "course:graph:"
+# Versions make entries immutable; the TTL only bounds staleness of instructor/category
+# details, which are not versioned, and lets old versions age out
+COURSE_GRAPH_TTL = 60 * 60
+
+# Served to buyers who have not purchased the course: no curriculum
+PUBLIC = "public"
+# Curriculum included (purchasers, admin/instructor review)
+FULL = "full"
+
+def course_graph_key(course_id: int, version: int, variant: str) -> str:
+    return f"{COURSE_GRAPH_PREFIX}{course_id}:{version}:{variant}"
+
+
+def section_course(section_id: int):
+    return select(Section.course_id).where(Section.id == section_id).scalar_subquery()
+
+
+def lesson_course(lesson_id: int):
+    return (
+        select(Section.course_id)
+        .join(Lesson, Lesson.section_id == Section.id)
+        .where(Lesson.id == lesson_id)
+        .scalar_subquery()
+    )
+
+
+def bump_content_version(db: Session, course_id: Union[int, object]) -> None:
+    """
+    Invalidate cached graphs of a course inside the caller's transaction.
+    course_id may be an id or section_course()/lesson_course().
+    """
+    db.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        # Keep updated_at as is; the version is bookkeeping
+        .values(content_version=Course.content_version + 1, updated_at=Course.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+class CourseGraph:
+    """Serialized CourseResponse of one (course, content_version, variant)"""
+
+    def __init__(self, course_id: int, version: int, variant: str, body: str):
+        self.course_id = course_id
+        self.version = version
+        self.variant = variant
+        self.body = body
+
+    @property
+    def etag(self) -> str:
+        # From the body: instructor/category details are serialized but not versioned
+        digest = hashlib.blake2b(self.body.encode(), digest_size=16).hexdigest()
+        return f'"course-{self.course_id}-{self.variant}-{digest}"'
+
+    def to_response(self, request: Request) -> Response:
+        # Clients revalidate every time; an unchanged course costs a 304 without a body
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def build_course_graph(db: Session, course_id: int, variant: str) -> str:
+    if variant == FULL:
+        options = course_detail_options()
+    else:
+        options = [
+            *COURSE_REFERENCES,
+            selectinload(Course.learning_objectives),
+            selectinload(Course.target_audiences),
+            selectinload(Course.requirements),
+            noload(Course.sections),
+        ]
+    course = db.query(Course).options(*options).filter(Course.id == course_id).one()
+
+    return CourseResponse.model_validate(course).model_dump_json()
+
+
+async def get_course_graph(db: Session, course_id: int, version: int, variant: str) -> CourseGraph:
+    """Read-through: the cached JSON of this version, or build and cache it"""
+    key = course_graph_key(course_id, version, variant)
+    cache = get_async_redis()
+    try:
+        body = await cache.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Course graph cache unavailable: {e}")
+        return CourseGraph(course_id, version, variant, build_course_graph(db, course_id, variant))
+
+    if body is None:
+        body = build_course_graph(db, course_id, variant)
+        try:
+            await cache.setex(key, COURSE_GRAPH_TTL, body)
+        except redis.RedisError as e:
+            logger.warning(f"Course graph cache unavailable: {e}")
+    return CourseGraph(course_id, version, variant, body)
@@ -0,0 +1,63 @@
+# services/course_loaders.py
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from aetherium.models.courses import Assessment, Course, Lesson, Section
+from aetherium.models.user import User
+
+# Columns of a course list card (CourseListResponse); long text is left for the detail view
+COURSE_LIST_COLUMNS = (
+    Course.id,
+    Course.title,
+    Course.subtitle,
+    Course.category_id,
+    Course.topic_id,
+    Course.language,
+    Course.level,
+    Course.duration,
+    Course.duration_unit,
+    Course.cover_image,
+    Course.trailer_video,
+    Course.price,
+    Course.instructor_id,
+    Course.verification_status,
+    Course.is_published,
+    Course.admin_response,
+    Course.created_at,
+    Course.updated_at,
+)
+INSTRUCTOR_COLUMNS = (
+    User.id,
+    User.firstname,
+    User.lastname,
+    User.username,
+    User.title,
+    User.profile_picture,
+)
+
+# Many-to-one: one joined row per course, no fan-out
+COURSE_REFERENCES = (
+    joinedload(Course.category),
+    joinedload(Course.topic),
+    joinedload(Course.instructor).load_only(*INSTRUCTOR_COLUMNS),
+)
+
+
+def course_list_options() -> list:
+    """Listing cards: one statement whatever the number of courses; no collections"""
+    return [load_only(*COURSE_LIST_COLUMNS), *COURSE_REFERENCES]
+
+
+def course_detail_options() -> list:
+    """
+    Full course graph. Every collection is a separate SELECT ... IN (selectin),
+    so rows grow with the sum of the collections, not their product.
+    """
+    lessons = selectinload(Course.sections).selectinload(Section.lessons)
+    return [
+        *COURSE_REFERENCES,
+        selectinload(Course.learning_objectives),
+        selectinload(Course.target_audiences),
+        selectinload(Course.requirements),
+        lessons.selectinload(Lesson.lesson_content),
+        lessons.selectinload(Lesson.assessments).selectinload(Assessment.questions),
+    ]
@@ -10,8 +10,12 @@ from aetherium.schemas.course import (
 from aetherium.schemas.category import CategoryCreate, CategoryResponse
 from aetherium.schemas.topic import TopicCreate
 from fastapi import HTTPException
-from typing import List,Optional
+from typing import List,Optional,Tuple
 from aetherium.core.logger import logger
+from aetherium.services.curriculum_merge import CurriculumMerge
+from aetherium.services.course_loaders import course_detail_options, course_list_options
+from aetherium.services.course_graph_cache import CourseGraph, FULL, bump_content_version, get_course_graph
+from aetherium.services.search import get_course_search
 from sqlalchemy.orm import selectinload, with_loader_criteria
 from sqlalchemy import asc
 
@@ -37,6 +41,8 @@ class CourseService:
             if value is not None:
                 setattr(course, field, value)
 
+        db.flush()
+        get_course_search().refresh_course(db, course.id)
         db.commit()
         db.refresh(course)
         return course
@@ -85,6 +91,9 @@ class CourseService:
                     requirement = Requirement(course_id=course_id, description=req_desc.strip())
                     db.add(requirement)
 
+        db.flush()
+        get_course_search().refresh_course(db, course_id)
+        bump_content_version(db, course_id)
         db.commit()
         db.refresh(course)
         return course
@@ -103,6 +112,7 @@ class CourseService:
             if value is not None:
                 setattr(course, field, value)
 
+        bump_content_version(db, course_id)
         db.commit()
         db.refresh(course)
         return course
@@ -172,21 +182,14 @@ class CourseService:
             course.price = price_value
         
         course.verification_status = VerificationStatus.PENDING
+        bump_content_version(db, course_id)
         db.commit()
         db.refresh(course)
         return course
 
     @staticmethod
     def get_instructor_drafts(db: Session, instructor_id: int):
-        return db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(
+        return db.query(Course).options(*course_list_options()).filter(
             Course.instructor_id == instructor_id,
             Course.verification_status == VerificationStatus.DRAFT,
             Course.is_published == False
@@ -194,15 +197,7 @@ class CourseService:
 
     @staticmethod
     def get_instructor_pending_courses(db: Session, instructor_id: int):
-        return db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(
+        return db.query(Course).options(*course_list_options()).filter(
             Course.instructor_id == instructor_id,
             Course.verification_status.in_([VerificationStatus.PENDING, VerificationStatus.REJECTED])
             # Course.verification_status == VerificationStatus.PENDING or Course.verification_status == VerificationStatus.REJECTED
@@ -210,15 +205,7 @@ class CourseService:
 
     @staticmethod
     def get_instructor_published_courses(db: Session, instructor_id: int):
-        return db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(
+        return db.query(Course).options(*course_list_options()).filter(
             Course.instructor_id == instructor_id,
             Course.verification_status == VerificationStatus.VERIFIED
         ).all()
@@ -226,63 +213,31 @@ class CourseService:
     @staticmethod
     def get_all_courses(db: Session):
         try:
-            courses = db.query(Course).options(
-                joinedload(Course.learning_objectives),
-                joinedload(Course.target_audiences),
-                joinedload(Course.requirements),
-                joinedload(Course.sections),
-                joinedload(Course.category),
-                joinedload(Course.topic),
-                joinedload(Course.instructor)
-            ).all()
-            print(f"Fetched {len(courses)} courses: {[c.__dict__ for c in courses]}")
+            courses = db.query(Course).options(*course_list_options()).all()
+            logger.info(f"Fetched {len(courses)} courses")
             return courses
         except Exception as e:
-            print(f"Error fetching courses: {str(e)}")
+            logger.error(f"Error fetching courses: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error fetching courses: {str(e)}")
 
     @staticmethod
     def get_pending_courses(db: Session):
-        return db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(
+        return db.query(Course).options(*course_list_options()).filter(
             Course.verification_status == VerificationStatus.PENDING
         ).all()
 
     @staticmethod
-    def get_course_by_id(db: Session, course_id: int):
-        course = db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections).joinedload(Section.lessons),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(Course.id == course_id).first()
+    async def get_course_by_id(db: Session, course_id: int) -> CourseGraph:
+        content_version = db.query(Course.content_version).filter(Course.id == course_id).scalar()
         
-        if not course:
+        if content_version is None:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        return course
+        return await get_course_graph(db, course_id, content_version, FULL)
 
     @staticmethod
     def get_instructor_course(db: Session, course_id: int, instructor_id: int):
-        course = db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections).joinedload(Section.lessons),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(
+        course = db.query(Course).options(*course_detail_options()).filter(
             Course.id == course_id,
             Course.instructor_id == instructor_id
         ).first()
@@ -307,6 +262,7 @@ class CourseService:
         elif status == "published" and course.verification_status == VerificationStatus.VERIFIED:
             course.is_published = True
         
+        bump_content_version(db, course_id)
         db.commit()
         db.refresh(course)
         return course
@@ -365,6 +321,7 @@ class CourseService:
             course.is_published = False
             course.verification_status = VerificationStatus.REJECTED
         
+        bump_content_version(db, course_id)
         db.commit()
         db.refresh(course)
         return course
@@ -405,15 +362,7 @@ class CourseService:
         """Get paginated courses for a specific instructor with optional status filter"""
         offset = (page - 1) * limit
         
-        query = db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(Course.instructor_id == instructor_id)
+        query = db.query(Course).options(*course_list_options()).filter(Course.instructor_id == instructor_id)
         
         # Filter by status if provided
         if status:
@@ -431,16 +380,7 @@ class CourseService:
     @staticmethod
     def get_instructor_course_detail(db: Session, course_id: int, instructor_id: int):
         """Get detailed information about a specific course owned by the instructor"""
-        from aetherium.models.courses.lesson import Lesson
-        course = db.query(Course).options(
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements),
-            joinedload(Course.sections).joinedload(Section.lessons).joinedload(Lesson.lesson_content),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.instructor)
-        ).filter(
+        course = db.query(Course).options(*course_detail_options()).filter(
             Course.id == course_id,
             Course.instructor_id == instructor_id
         ).first()
@@ -497,8 +437,14 @@ class CourseService:
 
    
     @staticmethod
-    def update_course_step3_with_lessons(db: Session, course_id: int, course_data: CourseCreateStep3, instructor_id: int):
-        course = db.query(Course).filter(
+    def update_course_step3_with_lessons(db: Session, course_id: int, course_data: CourseCreateStep3, instructor_id: int) -> Tuple[dict, List[Tuple[str, str]]]:
+        """
+        Save the curriculum as a diff; an unchanged tree (autosave) writes nothing.
+        Returns the save result and the files of deleted lessons, which the caller
+        removes from the media host (MediaIndex.delete_unused_async) after invalidating
+        the curriculum totals.
+        """
+        course = db.query(Course.id).filter(
             Course.id == course_id, 
             Course.instructor_id == instructor_id
         ).first()
@@ -506,28 +452,11 @@ class CourseService:
         if not course:
             raise HTTPException(status_code=404, detail="Course not found or not authorized")
 
-       
-        db.query(Section).filter(Section.course_id == course_id).delete()
-
-        for section_data in course_data.sections:
-            if section_data.name.strip():
-                section = Section(course_id=course_id, name=section_data.name.strip())
-                db.add(section)
-                db.flush() 
-                
-                if hasattr(section_data, 'lessons') and section_data.lessons:
-                    for lesson_data in section_data.lessons:
-                        if lesson_data.name.strip():
-                            lesson = Lesson(
-                                section_id=section.id,
-                                name=lesson_data.name.strip(),
-                                content_type=lesson_data.content_type or ContentType.DESCRIPTION,
-                                content_url=lesson_data.content_url,
-                                duration=lesson_data.duration,
-                                description=lesson_data.description
-                            )
-                            db.add(lesson)
+        merge = CurriculumMerge(db, course_id)
+        result = merge.apply(course_data)
 
-        db.commit()
-        db.refresh(course)
-        return course
+        if merge.changed:
+            bump_content_version(db, course_id)
+            db.commit()
+            logger.info(f"Curriculum of course {course_id} saved: {merge.changes}")
+        return result, merge.unused_media
@@ -0,0 +1,73 @@
+# services/curriculum_cache.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from redis.asyncio import Redis
+from typing import Dict, Optional
+import json
+
+from aetherium.core.redis_client import get_async_redis, get_sync_redis
+from aetherium.models.courses.lesson import Lesson
+from aetherium.models.courses.section import Section
+
+CURRICULUM_TOTALS_PREFIX = "curriculum:totals:"
+CURRICULUM_TOTALS_TTL = 60 * 60
+
+
+def curriculum_totals_key(course_id: int) -> str:
+    return f"{CURRICULUM_TOTALS_PREFIX}{course_id}"
+
+
+class CurriculumTotals:
+    """Lesson count per section of one course; the denominators of progress rollups"""
+
+    def __init__(self, section_lessons: Dict[int, int]):
+        self.section_lessons = section_lessons
+
+    @property
+    def total_sections(self) -> int:
+        return len(self.section_lessons)
+
+    @property
+    def total_lessons(self) -> int:
+        return sum(self.section_lessons.values())
+
+    def lessons_in(self, section_id: int) -> int:
+        return self.section_lessons.get(section_id, 0)
+
+    def to_json(self) -> str:
+        return json.dumps({str(section_id): count for section_id, count in self.section_lessons.items()})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CurriculumTotals":
+        return cls({int(section_id): count for section_id, count in json.loads(raw).items()})
+
+
+async def get_curriculum_totals(db: AsyncSession, course_id: int, cache: Optional[Redis] = None) -> CurriculumTotals:
+    """Per-section lesson totals of a course, from Redis when cached"""
+    key = curriculum_totals_key(course_id)
+    if cache is not None:
+        raw = await cache.get(key)
+        if raw:
+            return CurriculumTotals.from_json(raw)
+
+    rows = (await db.execute(
+        select(Section.id, func.count(Lesson.id))
+        .outerjoin(Lesson, Lesson.section_id == Section.id)
+        .where(Section.course_id == course_id)
+        .group_by(Section.id)
+    )).all()
+    totals = CurriculumTotals({section_id: count for section_id, count in rows})
+
+    if cache is not None:
+        await cache.setex(key, CURRICULUM_TOTALS_TTL, totals.to_json())
+    return totals
+
+
+def invalidate_curriculum_totals(course_id: int) -> None:
+    """Call after adding or removing sections or lessons of a course"""
+    get_sync_redis().delete(curriculum_totals_key(course_id))
+
+
+async def invalidate_curriculum_totals_async(course_id: int) -> None:
+    """invalidate_curriculum_totals for async request paths"""
+    await get_async_redis().delete(curriculum_totals_key(course_id))
@@ -0,0 +1,177 @@
+# services/curriculum_merge.py
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import insert, update
+from fastapi import HTTPException
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from aetherium.models.courses import Lesson, Section
+from aetherium.schemas.course import CourseCreateStep3, CurriculumLesson
+from aetherium.services.lesson_service import LessonService
+from aetherium.services.media_index import MediaIndex
+from aetherium.services.progress_service import discount_removed_lessons
+
+# Lesson columns a curriculum save owns; content and assessments of existing lessons are edited per lesson
+LESSON_FIELDS = ("section_id", "name", "content_type", "duration", "description", "order_index")
+
+
+class CurriculumMerge:
+    """
+    Applies a step-3 curriculum save as a diff against the stored sections and lessons.
+
+    Entries keep their row (and with it lesson progress and comments) when the payload
+    carries its id or, failing that, the same name (lessons: within the same section).
+    Only differences are written: one INSERT ... RETURNING and one executemany UPDATE
+    per table, and deletes for what the payload no longer contains. Lesson order_index
+    follows the payload order. Blank names are skipped as unfinished rows unless the
+    entry carries an id; then it keeps its stored name (autosave while a name is retyped).
+    """
+
+    def __init__(self, db: Session, course_id: int):
+        self.db = db
+        self.course_id = course_id
+        self.changes = {
+            "sections_created": 0, "sections_updated": 0, "sections_deleted": 0,
+            "lessons_created": 0, "lessons_updated": 0, "lessons_deleted": 0,
+        }
+        # Files of deleted lessons to remove from the media host after the commit
+        self.unused_media: List[Tuple[str, str]] = []
+
+    @property
+    def changed(self) -> bool:
+        return any(self.changes.values())
+
+    def apply(self, course_data: CourseCreateStep3) -> dict:
+        db = self.db
+        stored_sections = {
+            row.id: row for row in
+            db.query(Section.id, Section.name).filter(Section.course_id == self.course_id)
+        }
+        stored_lessons = {
+            row.id: row for row in
+            db.query(Lesson.id, *[getattr(Lesson, field) for field in LESSON_FIELDS])
+            .join(Section, Section.id == Lesson.section_id)
+            .filter(Section.course_id == self.course_id)
+        }
+
+        # Match everything before writing, so an invalid payload changes nothing
+        sections = [section for section in course_data.sections if section.name.strip() or section.id is not None]
+        section_names = [
+            section.name.strip() or getattr(stored_sections.get(section.id), "name", "")
+            for section in sections
+        ]
+        section_ids = self._match(
+            "Section",
+            [(section.id, name) for section, name in zip(sections, section_names)],
+            {section_id: row.name for section_id, row in stored_sections.items()}
+        )
+        lessons: List[Tuple[int, CurriculumLesson, str]] = []
+        lesson_keys = []
+        for position, (section, section_id) in enumerate(zip(sections, section_ids)):
+            scope = section_id if section_id is not None else ("new", position)
+            for lesson in section.lessons:
+                if not lesson.name.strip() and lesson.id is None:
+                    continue
+                name = lesson.name.strip() or getattr(stored_lessons.get(lesson.id), "name", "")
+                lessons.append((position, lesson, name))
+                lesson_keys.append((lesson.id, (scope, name)))
+        lesson_ids = self._match(
+            "Lesson", lesson_keys,
+            {lesson_id: (row.section_id, row.name) for lesson_id, row in stored_lessons.items()}
+        )
+
+        # Sections
+        new_positions = [position for position, section_id in enumerate(section_ids) if section_id is None]
+        if new_positions:
+            created = db.execute(
+                insert(Section).returning(Section.id, sort_by_parameter_order=True),
+                [{"course_id": self.course_id, "name": section_names[position]} for position in new_positions]
+            ).scalars().all()
+            for position, section_id in zip(new_positions, created):
+                section_ids[position] = section_id
+        renamed = [
+            {"id": section_id, "name": name}
+            for name, section_id in zip(section_names, section_ids)
+            if section_id in stored_sections and stored_sections[section_id].name != name
+        ]
+        if renamed:
+            db.execute(update(Section), renamed)
+        self.changes["sections_created"] = len(new_positions)
+        self.changes["sections_updated"] = len(renamed)
+
+        # Lessons
+        tree = [{"id": section_id, "name": name, "lessons": []} for name, section_id in zip(section_names, section_ids)]
+        new_lessons, new_refs, updated = [], [], []
+        for (position, lesson, name), lesson_id in zip(lessons, lesson_ids):
+            siblings = tree[position]["lessons"]
+            values = {
+                "section_id": section_ids[position],
+                "name": name,
+                "content_type": lesson.content_type,
+                "duration": lesson.duration,
+                "description": lesson.description,
+                "order_index": len(siblings),
+            }
+            ref = {"id": lesson_id, "name": values["name"], "order_index": values["order_index"]}
+            siblings.append(ref)
+            if lesson_id is None:
+                new_lessons.append((values, lesson))
+                new_refs.append(ref)
+            elif any(getattr(stored_lessons[lesson_id], field) != values[field] for field in LESSON_FIELDS):
+                updated.append({"id": lesson_id, **values})
+
+        if new_lessons:
+            for ref, lesson_id in zip(new_refs, LessonService(db).insert_lessons(new_lessons)):
+                ref["id"] = lesson_id
+        if updated:
+            db.execute(update(Lesson), updated)
+        self.changes["lessons_created"] = len(new_lessons)
+        self.changes["lessons_updated"] = len(updated)
+
+        # Deletes go through the ORM so progress, comments and content cascade as in delete_lesson
+        removed_lessons = set(stored_lessons) - set(lesson_ids)
+        removed_sections = set(stored_sections) - set(section_ids)
+        discount_removed_lessons(db, removed_lessons, removed_sections)
+        if removed_lessons:
+            self.unused_media = MediaIndex.release_lessons(db, removed_lessons)
+            for lesson in db.query(Lesson).options(selectinload(Lesson.assessments)).filter(Lesson.id.in_(removed_lessons)):
+                for assessment in lesson.assessments:
+                    db.delete(assessment)
+                db.delete(lesson)
+            db.flush()
+        if removed_sections:
+            for section in db.query(Section).filter(Section.id.in_(removed_sections)):
+                db.delete(section)
+            db.flush()
+        self.changes["lessons_deleted"] = len(removed_lessons)
+        self.changes["sections_deleted"] = len(removed_sections)
+
+        return {"changed": self.changed, "changes": self.changes, "sections": tree}
+
+    @staticmethod
+    def _match(kind: str, items: List[Tuple[Optional[int], Hashable]], stored: Dict[int, Hashable]) -> List[Optional[int]]:
+        """
+        Stored id each payload entry keeps (None: insert it). items are (id, key) per entry;
+        entries without an id take the oldest unclaimed stored row with the same key.
+        """
+        claimed = set()
+        for item_id, _ in items:
+            if item_id is None:
+                continue
+            if item_id not in stored:
+                raise HTTPException(status_code=400, detail=f"{kind} {item_id} does not belong to this course")
+            if item_id in claimed:
+                raise HTTPException(status_code=400, detail=f"{kind} {item_id} appears more than once")
+            claimed.add(item_id)
+
+        unclaimed = defaultdict(list)
+        for stored_id in sorted(stored, reverse=True):
+            if stored_id not in claimed:
+                unclaimed[stored[stored_id]].append(stored_id)
+
+        matched = []
+        for item_id, key in items:
+            if item_id is None and unclaimed.get(key):
+                item_id = unclaimed[key].pop()
+            matched.append(item_id)
+        return matched
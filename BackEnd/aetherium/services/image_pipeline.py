@@ -0,0 +1,118 @@
+# services/image_pipeline.py
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Optional, Sequence
+import asyncio
+import multiprocessing
+import threading
+
+from aetherium.config import settings
+from aetherium.core.logger import logger
+from aetherium.utils.image_processing import ImageRejected, render_image
+
+# Avatar derivatives (square WebP, px); lists and threads show AVATAR_LIST_SIZE
+AVATAR_SIZES = (48, 96, 256)
+AVATAR_LIST_SIZE = 96
+AVATAR_MAX_EDGE = 1024
+# Chat images: the sent image is capped, the preview is what threads show inline
+CHAT_IMAGE_MAX_EDGE = 2048
+CHAT_PREVIEW_SIZE = 480
+# Seconds a render may take, queueing included
+RENDER_TIMEOUT = 30
+
+
+class ImagePipelineUnavailable(Exception):
+    """The render timed out or the pool lost a worker; the image itself may be fine"""
+
+
+class ImagePipeline:
+    """
+    Decodes, strips and resizes uploaded images (utils.image_processing) in a process
+    pool, so Pillow's CPU work neither blocks the event loop nor holds the GIL of the
+    API process.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # render_sync runs in threadpool threads, so the pool may be asked for concurrently
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process with running threads and an event loop is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool (a worker died, e.g. OOM-killed) so the next render starts a new one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Image process pool broken, replaced on next use")
+
+    @staticmethod
+    def _job(data: bytes, max_edge: int, sizes: Sequence[int], square: bool, main_format: str):
+        return partial(render_image, data, max_edge, tuple(sizes), square, main_format, settings.IMAGE_MAX_PIXELS)
+
+    async def render(self, data: bytes, max_edge: int, sizes: Sequence[int], square: bool = False, main_format: str = "webp") -> Dict:
+        """utils.image_processing.render_image in the pool; raises ImageRejected or ImagePipelineUnavailable"""
+        loop = asyncio.get_running_loop()
+        job = self._job(data, max_edge, sizes, square, main_format)
+        pool = self._executor()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(pool, job), RENDER_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ImagePipelineUnavailable(f"Image processing took longer than {RENDER_TIMEOUT}s")
+        except BrokenProcessPool:
+            self._discard(pool)
+            raise ImagePipelineUnavailable("Image processing failed")
+
+    def render_sync(self, data: bytes, max_edge: int, sizes: Sequence[int], square: bool = False, main_format: str = "webp") -> Dict:
+        """render() for sync endpoints (running in the threadpool)"""
+        job = self._job(data, max_edge, sizes, square, main_format)
+        pool = self._executor()
+        try:
+            return pool.submit(job).result(timeout=RENDER_TIMEOUT)
+        except FutureTimeoutError:
+            raise ImagePipelineUnavailable(f"Image processing took longer than {RENDER_TIMEOUT}s")
+        except BrokenProcessPool:
+            self._discard(pool)
+            raise ImagePipelineUnavailable("Image processing failed")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.info("Image process pool stopped")
+
+
+_image_pipeline: Optional[ImagePipeline] = None
+
+
+def get_image_pipeline() -> ImagePipeline:
+    global _image_pipeline
+    if _image_pipeline is None:
+        _image_pipeline = ImagePipeline(settings.IMAGE_PROCESS_WORKERS)
+    return _image_pipeline
+
+
+def picture_variant(picture: Optional[str], variants: Optional[Dict[str, str]], size: int = AVATAR_LIST_SIZE) -> Optional[str]:
+    """The smallest derivative at least size px, or the picture itself (no derivatives, e.g. Google avatars)"""
+    if variants:
+        for bucket in sorted(int(key) for key in variants):
+            if bucket >= size:
+                return variants[str(bucket)]
+    return picture
+
+
+def avatar_variant(user, size: int = AVATAR_LIST_SIZE) -> Optional[str]:
+    """picture_variant of a User's profile picture"""
+    if user is None:
+        return None
+    return picture_variant(user.profile_picture, user.profile_picture_variants, size)
+
@@ -13,6 +13,7 @@ from aetherium.models.user_course import Purchase
 from aetherium.schemas.lesson_comment import LessonCommentCreate, LessonCommentUpdate, LessonCommentResponse, LessonCommentListResponse
 
 from aetherium.core.logger import logger
+from aetherium.services.image_pipeline import avatar_variant
 
 class LessonCommentService:
     def __init__(self, db: Session):
@@ -215,6 +216,6 @@ class LessonCommentService:
             updated_at=comment.updated_at,
             user_firstname=comment.user.firstname,
             user_lastname=comment.user.lastname,
-            user_profile_picture=comment.user.profile_picture,
+            user_profile_picture=avatar_variant(comment.user),
             replies=replies
         )
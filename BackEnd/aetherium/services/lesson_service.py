@@ -1,22 +1,33 @@
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import Integer, and_, column, func, insert, update, values
 from typing import List, Optional, Dict, Any,Union
+from collections import defaultdict
 from fastapi import HTTPException, UploadFile
 from datetime import datetime
 from aetherium.core.logger import logger
 from aetherium.models.courses.lesson import Lesson, LessonContent, Assessment, Question
 from aetherium.models.courses.section import Section
+from aetherium.models.courses.course import Course
 from aetherium.models.courses.progress import LessonProgress, SectionProgress, CourseProgress
 from aetherium.schemas.lesson import (
     LessonCreate, LessonUpdate, LessonResponse,
-    LessonContentCreate, AssessmentCreate
+    LessonContentCreate, AssessmentCreate,
+    LessonBatchCreate, LessonOrder
 )
 from aetherium.models.enum import ContentType
 from aetherium.services.cloudinary_service import cloudinary_service
+from aetherium.utils.upload_staging import StagedFile
+from aetherium.services.upload_progress import UploadProgress
+from aetherium.services.media_index import UPLOAD_RESOURCE_TYPES, MediaIndex
+from aetherium.services.progress_service import discount_removed_lessons
+from aetherium.config import settings
+from aetherium.services.curriculum_cache import invalidate_curriculum_totals_async
+from aetherium.services.course_graph_cache import bump_content_version, lesson_course, section_course
 import os
 import io
 import tempfile
+import uuid
 import shutil
 from pathlib import Path
 from aetherium.utils.tasks import upload_file_task
@@ -76,10 +87,133 @@ class LessonService:
                     order_index=question_data.order_index
                 )
                 self.db.add(question)
+        bump_content_version(self.db, section_course(section_id))
         self.db.commit()
         self.db.refresh(lesson)
+        await self._invalidate_curriculum(section_id)
         return lesson
 
+    def insert_lessons(self, lessons: List[tuple]) -> List[int]:
+        """
+        Insert (values, payload) pairs: lesson column values plus the LessonCreate-like
+        payload whose content/assessment go with it. One INSERT per table
+        (lessons/contents/assessments ... RETURNING, questions executemany), no commit.
+        """
+        lesson_ids = self.db.execute(
+            insert(Lesson).returning(Lesson.id, sort_by_parameter_order=True),
+            [values for values, _ in lessons]
+        ).scalars().all()
+
+        contents = [
+            {"lesson_id": lesson_id, **payload.content.model_dump(exclude_none=True)}
+            for (_, payload), lesson_id in zip(lessons, lesson_ids)
+            if payload.content and payload.content_type != ContentType.ASSESSMENT
+        ]
+        if contents:
+            self.db.execute(insert(LessonContent), contents)
+
+        assessments = [
+            (payload.assessment, lesson_id)
+            for (_, payload), lesson_id in zip(lessons, lesson_ids)
+            if payload.assessment and payload.content_type == ContentType.ASSESSMENT
+        ]
+        if assessments:
+            assessment_ids = self.db.execute(
+                insert(Assessment).returning(Assessment.id, sort_by_parameter_order=True),
+                [{"lesson_id": lesson_id, "is_active": True, **assessment.model_dump(exclude={"questions"})}
+                 for assessment, lesson_id in assessments]
+            ).scalars().all()
+            questions = [
+                {"assessment_id": assessment_id, **question.model_dump()}
+                for (assessment, _), assessment_id in zip(assessments, assessment_ids)
+                for question in assessment.questions
+            ]
+            if questions:
+                self.db.execute(insert(Question), questions)
+        return lesson_ids
+
+    async def bulk_create_lessons(self, lessons: List[LessonBatchCreate], instructor_id: Optional[int] = None) -> List[Lesson]:
+        """
+        Create lessons across sections in one transaction (course imports). With
+        instructor_id, every target section must belong to one of that instructor's courses.
+        """
+        if not lessons:
+            return []
+        section_ids = {lesson.section_id for lesson in lessons}
+        sections = self.db.query(Section.id, Section.course_id, Course.instructor_id).join(
+            Course, Course.id == Section.course_id
+        ).filter(Section.id.in_(section_ids)).all()
+        section_courses = {section_id: course_id for section_id, course_id, _ in sections}
+        missing = section_ids - set(section_courses)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Section not found: {', '.join(map(str, sorted(missing)))}")
+        if instructor_id is not None:
+            foreign = sorted(section_id for section_id, _, owner_id in sections if owner_id != instructor_id)
+            if foreign:
+                raise HTTPException(
+                    status_code=403,
+                    detail=f"Not authorized to add lessons to section: {', '.join(map(str, foreign))}"
+                )
+
+        # order_index must be unique per section, among the new lessons and against the existing ones;
+        # lessons sent without one are appended in payload order
+        taken = set()
+        next_index = defaultdict(int)
+        for section_id, order_index in self.db.query(Lesson.section_id, Lesson.order_index).filter(
+            Lesson.section_id.in_(section_ids)
+        ).all():
+            order_index = order_index or 0
+            taken.add((section_id, order_index))
+            next_index[section_id] = max(next_index[section_id], order_index + 1)
+
+        rows = []
+        for lesson in lessons:
+            if "order_index" in lesson.model_fields_set:
+                order_index = lesson.order_index
+            else:
+                order_index = next_index[lesson.section_id]
+            if (lesson.section_id, order_index) in taken:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"order_index {order_index} is used more than once in section {lesson.section_id}"
+                )
+            taken.add((lesson.section_id, order_index))
+            next_index[lesson.section_id] = max(next_index[lesson.section_id], order_index + 1)
+            rows.append((
+                {
+                    "section_id": lesson.section_id,
+                    "name": lesson.name,
+                    "content_type": lesson.content_type,
+                    "duration": lesson.duration,
+                    "description": lesson.description,
+                    "order_index": order_index,
+                },
+                lesson
+            ))
+
+        lesson_ids = self.insert_lessons(rows)
+        course_ids = set(section_courses.values())
+        for course_id in course_ids:
+            bump_content_version(self.db, course_id)
+        self.db.commit()
+        for course_id in course_ids:
+            await invalidate_curriculum_totals_async(course_id)
+
+        created = {
+            lesson.id: lesson for lesson in
+            self.db.query(Lesson).options(
+                selectinload(Lesson.lesson_content),
+                selectinload(Lesson.assessments).selectinload(Assessment.questions)
+            ).filter(Lesson.id.in_(lesson_ids))
+        }
+        return [created[lesson_id] for lesson_id in lesson_ids]
+
+    async def _invalidate_curriculum(self, section_id: int):
+        """Drop cached lesson totals of the section's course"""
+        course_id = self.db.query(Section.course_id).filter(Section.id == section_id).scalar()
+        if course_id:
+            await invalidate_curriculum_totals_async(course_id)
+
 
 
     # async def upload_lesson_file(self, lesson_id: int, file: UploadFile, file_type: str) -> Dict[str, Any]:
@@ -119,8 +253,8 @@ class LessonService:
     #     finally:
     #         file_stream.close()
 
-    async def upload_lesson_file(self,lesson_id: int,file_stream: io.BytesIO,file_type: str,filename: str) -> Dict[str, Any]:
-        """Upload file for lesson content - direct upload"""
+    async def upload_lesson_file(self,lesson_id: int,file_stream: io.BytesIO,file_type: str,filename: str,sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Upload file for lesson content - direct upload; with sha256 the upload is indexed for deduplication"""
         try:
             # Verify stream content
             current_pos = file_stream.tell()
@@ -140,7 +274,8 @@ class LessonService:
  
 
             # Update database
-            return await self._update_lesson_content(lesson_id, upload_result, file_type)
+            content_key = (sha256, file_size) if sha256 else None
+            return await self._update_lesson_content(lesson_id, upload_result, file_type, content_key)
         except Exception as e:
             self.db.rollback()
             raise HTTPException(
@@ -149,11 +284,63 @@ class LessonService:
             )
 
 
-    async def _update_lesson_content(self, lesson_id: int, upload_result: Dict[str, Any], file_type: str) -> Dict[str, Any]:
-        """Robust database update with proper error handling"""
+    async def upload_staged_file(self, lesson_id: int, staged: StagedFile, file_type: str, filename: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Upload a staged file as the lesson's content: within the request up to
+        DIRECT_UPLOAD_MAX_BYTES, through a Celery task above. Takes ownership of the staged file.
+        """
+        handed_off = False
+        try:
+            if staged.size == 0:
+                raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+            # Verify PDF header if it's a PDF
+            if file_type == "pdf" and not staged.head(5).startswith(b'%PDF-'):
+                raise HTTPException(status_code=400, detail="Invalid PDF file format")
+
+            if staged.size > settings.DIRECT_UPLOAD_MAX_BYTES:
+                # The task removes the staged file when done
+                result = await self.upload_lesson_file_async(
+                    lesson_id=lesson_id,
+                    staged=staged,
+                    file_type=file_type,
+                    filename=filename,
+                    user_id=user_id
+                )
+                handed_off = True
+                return result
+
+            # Same content already on the host: link it instead of uploading it again
+            reused = MediaIndex.reuse(self.db, staged.sha256, staged.size, file_type)
+            if reused is not None:
+                result = await self._update_lesson_content(lesson_id, reused, file_type)
+            else:
+                with staged.open() as file_stream:
+                    result = await self.upload_lesson_file(
+                        lesson_id=lesson_id,
+                        file_stream=file_stream,
+                        file_type=file_type,
+                        filename=filename,
+                        sha256=staged.sha256
+                    )
+            result["status"] = "completed"
+            return result
+        finally:
+            if not handed_off:
+                staged.remove()
+
+    async def _update_lesson_content(self, lesson_id: int, upload_result: Dict[str, Any], file_type: str, content_key: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Robust database update with proper error handling. content_key (sha256, size)
+        registers a fresh upload in the media index.
+        """
         db = self.db
         logger.info(f"Updating lesson content for lesson_id {lesson_id} with upload_result {upload_result}")
         try:
+            duplicate_public_id = None
+            if content_key:
+                upload_result, duplicate_public_id = MediaIndex.record_upload(db, *content_key, file_type, upload_result)
+
             content = db.query(LessonContent).filter(
                 LessonContent.lesson_id == lesson_id
             ).first()
@@ -162,19 +349,34 @@ class LessonService:
                 content = LessonContent(lesson_id=lesson_id)
                 db.add(content)
             
+            previous_public_id = content.file_public_id
+            previous_resource_type = MediaIndex.resource_type_of(db, previous_public_id, content.file_type) if previous_public_id else None
+            # The replaced file goes with its last reference
+            delete_previous = bool(previous_public_id) and MediaIndex.release(db, previous_public_id) \
+                and previous_public_id != upload_result['public_id']
+
             # Required fields
             content.file_url = upload_result.get('url','')
             content.file_public_id = upload_result['public_id']
             content.file_type = file_type
-            content.file_size = upload_result.get('bytes', 0)
+            # upload_video_from_stream reports file_size, the other helpers bytes
+            content.file_size = upload_result.get('bytes', upload_result.get('file_size', 0))
             # content.upload_status = "completed"
             # Video-specific fields
             if file_type == "video":
                 content.video_duration = upload_result.get('duration', 0)
-                content.video_thumbnail = upload_result.get('thumbnail_url', '')
+                content.video_thumbnail = upload_result.get('thumbnail_url', upload_result.get('thumbnail', ''))
             
+            bump_content_version(db, lesson_course(lesson_id))
             db.commit()  # Explicit commit
             logger.info(f"Successfully updated lesson {lesson_id} content")
+
+            unused = []
+            if duplicate_public_id:
+                unused.append((duplicate_public_id, upload_result.get('resource_type') or UPLOAD_RESOURCE_TYPES.get(file_type, "raw")))
+            if delete_previous:
+                unused.append((previous_public_id, previous_resource_type))
+            await MediaIndex.delete_unused_async(unused)
             return upload_result
             
         except Exception as e:
@@ -182,29 +384,16 @@ class LessonService:
             logger.error(f"Failed to update lesson content: {str(e)}")
             raise Exception(f"Database update failed: {str(e)}")
 
-    async def upload_lesson_file_async(self,lesson_id: int,file_stream: io.BytesIO,file_type: str,filename: str) -> Dict[str, Any]:
-        """Async upload for large files (>10MB) with better error handling"""
+    async def upload_lesson_file_async(self,lesson_id: int,staged: StagedFile,file_type: str,filename: str,user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Async upload for large files: the Celery task streams the staged file from disk and removes it"""
         lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
         if not lesson:
             raise HTTPException(status_code=404, detail="Lesson not found")
 
         try:
-            # Verify stream content
-            original_position = file_stream.tell()
-            file_stream.seek(0, 2)  # Seek to end to check size
-            file_size = file_stream.tell()
-            file_stream.seek(original_position)  # Reset to original position
-
-            if file_size == 0:
+            if staged.size == 0:
                 raise ValueError("Cannot process empty file")
 
-            # Read all content for Celery task
-            file_stream.seek(0)  # Ensure we're at the beginning
-            file_content = file_stream.read()
-
-            if len(file_content) == 0:
-                raise ValueError("Failed to read file content")
-
             # Create or update processing record
             content = self.db.query(LessonContent).filter(
                 LessonContent.lesson_id == lesson_id
@@ -221,17 +410,28 @@ class LessonService:
                 content.upload_status = "processing"
                 content.file_type = file_type
 
+            bump_content_version(self.db, lesson_course(lesson_id))
             self.db.commit()
 
             # Import here to avoid circular imports
             from aetherium.utils.tasks import upload_file_task
 
-            # Start Celery task with proper parameters
-            task = upload_file_task.delay(
-                lesson_id=lesson_id,
-                file_content=file_content,
-                file_type=file_type,
-                filename=filename or f"file_{lesson_id}"
+            # The snapshot exists before the task can overwrite it with its own progress
+            task_id = str(uuid.uuid4())
+            UploadProgress(task_id, lesson_id, user_id, staged.size).publish("queued", bytes_sent=0)
+
+            # Only a reference to the staged file goes through the broker
+            task = upload_file_task.apply_async(
+                kwargs={
+                    "lesson_id": lesson_id,
+                    "staged_path": staged.path,
+                    "file_type": file_type,
+                    "filename": filename or f"file_{lesson_id}",
+                    "file_size": staged.size,
+                    "sha256": staged.sha256,
+                    "user_id": user_id
+                },
+                task_id=task_id
             )
 
             logger.info(f"Started async upload task {task.id} for lesson {lesson_id}")
@@ -239,9 +439,9 @@ class LessonService:
             return {
                 "task_id": task.id,
                 "status": "processing",
-                "message": "File upload started. Please check status using the task_id.",
+                "message": "File upload started. Progress is sent over the WebSocket as upload_progress events; status is also available by task_id.",
                 "lesson_id": lesson_id,
-                "file_size": len(file_content)
+                "file_size": staged.size
             }
 
         except Exception as e:
@@ -252,6 +452,7 @@ class LessonService:
                 ).first()
                 if content:
                     content.upload_status = "failed"
+                    bump_content_version(self.db, lesson_course(lesson_id))
                     self.db.commit()
             except Exception as db_err:
                 logger.error(f"Failed to update status to failed: {str(db_err)}")
@@ -396,6 +597,7 @@ class LessonService:
                     )
                     self.db.add(question)
     
+        bump_content_version(self.db, lesson_course(lesson_id))
         self.db.commit()
         self.db.refresh(lesson)
         return LessonResponse.model_validate(lesson)
@@ -407,34 +609,44 @@ class LessonService:
         if not lesson:
             return False
         
-        # Delete associated file from Cloudinary
-        content = self.db.query(LessonContent).filter(
-            LessonContent.lesson_id == lesson_id
-        ).first()
-        
-        if content and content.file_public_id:
-            await cloudinary_service.delete_file(
-                content.file_public_id, 
-                content.file_type or "auto"
-            )
+        # Other lessons may link the same file; it goes with its last reference
+        unused_media = MediaIndex.release_lessons(self.db, [lesson_id])
+        discount_removed_lessons(self.db, [lesson_id])
         
+        section_id = lesson.section_id
         self.db.delete(lesson)
+        bump_content_version(self.db, section_course(section_id))
         self.db.commit()
+        await self._invalidate_curriculum(section_id)
+        await MediaIndex.delete_unused_async(unused_media)
         
         return True
     
     """Reorder lessons in a section"""
-    def reorder_lessons(self, section_id: int, lesson_orders: List[Dict[str, int]]) -> bool:
-        for order_data in lesson_orders:
-            lesson_id = order_data["lesson_id"]
-            new_order = order_data["order_index"]
-            
-            lesson = self.db.query(Lesson).filter(
-                and_(Lesson.id == lesson_id, Lesson.section_id == section_id)
-            ).first()
-            
-            if lesson:
-                lesson.order_index = new_order
-        
+    def reorder_lessons(self, section_id: int, lesson_orders: List[LessonOrder]) -> bool:
+        lesson_ids = [order.lesson_id for order in lesson_orders]
+        order_indexes = [order.order_index for order in lesson_orders]
+        if len(set(lesson_ids)) != len(lesson_ids):
+            raise HTTPException(status_code=400, detail="A lesson appears more than once")
+        if len(set(order_indexes)) != len(order_indexes):
+            raise HTTPException(status_code=400, detail="order_index values must be unique")
+        if not lesson_orders:
+            return True
+
+        # UPDATE lessons SET order_index = v.order_index FROM (VALUES ...) v WHERE lessons.id = v.lesson_id
+        new_orders = values(
+            column("lesson_id", Integer), column("order_index", Integer), name="new_orders"
+        ).data([(order.lesson_id, order.order_index) for order in lesson_orders])
+        result = self.db.execute(
+            update(Lesson)
+            .where(Lesson.id == new_orders.c.lesson_id, Lesson.section_id == section_id)
+            .values(order_index=new_orders.c.order_index)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(lesson_orders):
+            # Lessons of other sections are skipped, as before
+            logger.warning(f"Reorder of section {section_id}: {len(lesson_orders) - result.rowcount} lessons not in the section")
+
+        bump_content_version(self.db, section_course(section_id))
         self.db.commit()
-        return True
\ No newline at end of file
+        return True
@@ -0,0 +1,179 @@
+# services/media_index.py
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import update
+from fastapi import HTTPException
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from aetherium.core.logger import logger
+from aetherium.models.media import MediaAsset
+from aetherium.models.courses.lesson import LessonContent
+from aetherium.services.media_storage import get_media_storage
+from aetherium.services.cloudinary_service import cloudinary_service
+
+# Cloudinary resource type each lesson file type is uploaded as
+UPLOAD_RESOURCE_TYPES = {"video": "video", "pdf": "image"}
+
+
+class MediaIndex:
+    """
+    Content-addressed index of uploaded media: (sha256, size, kind) -> the file on the
+    media host. Consulted before an upload so repeated content is linked instead of
+    transferred again; references are counted so the file is only deleted from the
+    host with its last user. Nothing here commits; callers own the transaction.
+    """
+
+    @staticmethod
+    def lookup(db: Session, sha256: str, size: int, kind: str) -> Optional[MediaAsset]:
+        return db.query(MediaAsset).filter(
+            MediaAsset.sha256 == sha256,
+            MediaAsset.size == size,
+            MediaAsset.kind == kind
+        ).first()
+
+    @staticmethod
+    def register(db: Session, sha256: str, size: int, kind: str, upload_result: Dict[str, Any]) -> Tuple[MediaAsset, bool]:
+        """
+        Record a fresh upload; returns (asset, created). When the same content was
+        registered concurrently, the existing asset is returned and the caller should
+        delete its own copy from the host.
+        """
+        asset = MediaAsset(
+            sha256=sha256,
+            size=size,
+            kind=kind,
+            public_id=upload_result["public_id"],
+            secure_url=upload_result.get("secure_url") or upload_result.get("url"),
+            resource_type=upload_result.get("resource_type"),
+            duration=upload_result.get("duration"),
+            thumbnail=upload_result.get("thumbnail_url") or upload_result.get("thumbnail"),
+            ref_count=0,
+        )
+        try:
+            with db.begin_nested():
+                db.add(asset)
+            return asset, True
+        except IntegrityError:
+            existing = MediaIndex.lookup(db, sha256, size, kind)
+            if existing is None:
+                raise
+            return existing, False
+
+    @staticmethod
+    def acquire(db: Session, public_id: str) -> bool:
+        """Add a reference; False if the asset is gone (released meanwhile), so upload again"""
+        result = db.execute(
+            update(MediaAsset)
+            .where(MediaAsset.public_id == public_id)
+            .values(ref_count=MediaAsset.ref_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def resource_type_of(db: Session, public_id: str, file_type: Optional[str]) -> str:
+        """Resource type to delete a file with: the one recorded at upload, else the lesson file type's"""
+        resource_type = db.query(MediaAsset.resource_type).filter(MediaAsset.public_id == public_id).scalar()
+        return resource_type or UPLOAD_RESOURCE_TYPES.get(file_type, "raw")
+
+    @staticmethod
+    def release(db: Session, public_id: str) -> bool:
+        """
+        Drop one reference; True when the file should now be deleted from the host
+        (last reference, or a file uploaded before the index existed).
+        """
+        remaining = db.execute(
+            update(MediaAsset)
+            .where(MediaAsset.public_id == public_id)
+            .values(ref_count=MediaAsset.ref_count - 1)
+            .returning(MediaAsset.ref_count)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if remaining is None:
+            return True
+        if remaining > 0:
+            logger.info(f"Media {public_id} kept, still used {remaining} times")
+            return False
+        # Only if nobody acquired it in between
+        deleted = db.query(MediaAsset).filter(
+            MediaAsset.public_id == public_id,
+            MediaAsset.ref_count <= 0
+        ).delete(synchronize_session=False)
+        return deleted == 1
+
+    @staticmethod
+    def reuse(db: Session, sha256: str, size: int, kind: str) -> Optional[Dict[str, Any]]:
+        """Take a reference on an existing copy of this content; its upload result, or None to upload"""
+        asset = MediaIndex.lookup(db, sha256, size, kind)
+        if asset is None or not MediaIndex.acquire(db, asset.public_id):
+            return None
+        logger.info(f"Reusing media {asset.public_id} for {kind} {sha256[:12]}")
+        return MediaIndex.as_upload_result(asset)
+
+    @staticmethod
+    def record_upload(db: Session, sha256: str, size: int, kind: str, upload_result: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Register a fresh upload and take a reference on it. Returns the upload result to
+        store and, if another copy won a concurrent registration, the public_id of this
+        now redundant upload to delete from the host.
+        """
+        asset, created = MediaIndex.register(db, sha256, size, kind, upload_result)
+        MediaIndex.acquire(db, asset.public_id)
+        if created:
+            return upload_result, None
+        return MediaIndex.as_upload_result(asset), upload_result["public_id"]
+
+    @staticmethod
+    def as_upload_result(asset: MediaAsset) -> Dict[str, Any]:
+        """The asset in the shape of an upload result, for code that records uploads"""
+        return {
+            "public_id": asset.public_id,
+            "secure_url": asset.secure_url,
+            "url": asset.secure_url,
+            "bytes": asset.size,
+            "file_size": asset.size,
+            "resource_type": asset.resource_type,
+            "duration": asset.duration or 0,
+            "thumbnail_url": asset.thumbnail or "",
+            "thumbnail": asset.thumbnail or "",
+            "deduplicated": True,
+        }
+
+    @staticmethod
+    def release_lessons(db: Session, lesson_ids: Iterable[int]) -> List[Tuple[str, str]]:
+        """
+        Release the files of lessons about to be deleted. Returns (public_id,
+        resource_type) of the files to delete from the host once the deletes are committed.
+        """
+        lesson_ids = list(lesson_ids)
+        if not lesson_ids:
+            return []
+        files = db.query(LessonContent.file_public_id, LessonContent.file_type, MediaAsset.resource_type).outerjoin(
+            MediaAsset, MediaAsset.public_id == LessonContent.file_public_id
+        ).filter(
+            LessonContent.lesson_id.in_(lesson_ids),
+            LessonContent.file_public_id.isnot(None)
+        ).all()
+        unused = []
+        for public_id, file_type, resource_type in files:
+            if MediaIndex.release(db, public_id):
+                unused.append((public_id, resource_type or UPLOAD_RESOURCE_TYPES.get(file_type, "raw")))
+        return unused
+
+    @staticmethod
+    def delete_unused(files: Iterable[Tuple[str, str]]) -> None:
+        """Best effort: the rows are already gone, a leftover file only costs storage"""
+        for public_id, resource_type in files:
+            try:
+                get_media_storage().destroy(public_id, resource_type=resource_type, invalidate=True)
+            except Exception as e:
+                logger.warning(f"Could not delete unused media {public_id}: {e}")
+
+    @staticmethod
+    async def delete_unused_async(files: Iterable[Tuple[str, str]]) -> None:
+        """delete_unused on the upload executor, for async callers"""
+        for public_id, resource_type in files:
+            try:
+                await cloudinary_service.delete_file(public_id, resource_type)
+            except HTTPException as e:
+                logger.warning(f"Could not delete unused media {public_id}: {e.detail}")
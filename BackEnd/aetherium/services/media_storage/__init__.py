@@ -0,0 +1,19 @@
+from aetherium.config import settings
+from aetherium.services.media_storage.cloudinary_backend import CloudinaryMediaStorage
+from aetherium.services.media_storage.local_backend import LocalMediaStorage
+
+MEDIA_STORAGE_BACKENDS = {
+    "cloudinary": CloudinaryMediaStorage,
+    "local": LocalMediaStorage,
+}
+
+_media_storage = {}
+
+def get_media_storage():
+    """Storage driver for MEDIA_UPLOAD_BACKEND; created on first use"""
+    backend = settings.MEDIA_UPLOAD_BACKEND
+    if backend not in _media_storage:
+        _media_storage[backend] = MEDIA_STORAGE_BACKENDS[backend]()
+    return _media_storage[backend]
+
+__all__ = ["CloudinaryMediaStorage", "LocalMediaStorage", "get_media_storage"]
@@ -0,0 +1,18 @@
+import cloudinary.uploader
+from typing import Any, Dict
+
+
+class CloudinaryMediaStorage:
+    """
+    Media on Cloudinary, which also serves and transforms it. The upload calls take
+    cloudinary.uploader's options and return its response.
+    """
+
+    def upload(self, file, **options) -> Dict[str, Any]:
+        return cloudinary.uploader.upload(file, **options)
+
+    def upload_large(self, file, **options) -> Dict[str, Any]:
+        return cloudinary.uploader.upload_large(file, **options)
+
+    def destroy(self, public_id: str, **options) -> Dict[str, Any]:
+        return cloudinary.uploader.destroy(public_id, **options)
@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import glob
+import os
+import shutil
+import uuid
+
+from aetherium.config import settings
+
+# main.py serves uploads/ at /uploads (utils.media_files); LOCAL_MEDIA_DIR must be inside it
+LOCAL_MEDIA_URL = "/uploads/" + Path(os.path.relpath(settings.LOCAL_MEDIA_DIR, "uploads")).as_posix()
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".mkv", ".avi", ".m4v"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+
+class LocalMediaStorage:
+    """
+    Media on local disk (MEDIA_UPLOAD_BACKEND=local), for self-hosted deployments,
+    development and tests without a Cloudinary account. Accepts cloudinary.uploader's
+    calls and returns the fields the upload code reads; transformations are ignored.
+
+    Every upload gets a new public_id and files are never rewritten, so they can be
+    served with long-lived cache headers.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.LOCAL_MEDIA_DIR)
+
+    def upload(self, file, **options) -> Dict[str, Any]:
+        filename = options.get("filename") or getattr(file, "name", None) or (file if isinstance(file, str) else "file")
+        suffix = Path(str(filename)).suffix.lower()
+        stem = Path(str(filename)).stem if options.get("use_filename") else "file"
+        folder = options.get("folder", "").strip("/")
+        public_id = "/".join(filter(None, [folder, f"{stem}_{uuid.uuid4().hex[:12]}"]))
+
+        destination = self.root / f"{public_id}{suffix}"
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a file is never served half written
+        partial = destination.with_name(f".{destination.name}.partial")
+        chunk_size = options.get("chunk_size") or 1024 * 1024
+        try:
+            if isinstance(file, (str, os.PathLike)):
+                with open(file, "rb") as source, open(partial, "wb") as target:
+                    shutil.copyfileobj(source, target, chunk_size)
+            else:
+                with open(partial, "wb") as target:
+                    shutil.copyfileobj(file, target, chunk_size)
+            os.replace(partial, destination)
+        finally:
+            if partial.exists():
+                partial.unlink()
+
+        resource_type = options.get("resource_type", "auto")
+        if resource_type == "auto":
+            if suffix in VIDEO_EXTENSIONS:
+                resource_type = "video"
+            elif suffix in IMAGE_EXTENSIONS:
+                resource_type = "image"
+            else:
+                resource_type = "raw"
+        url = f"{LOCAL_MEDIA_URL}/{public_id}{suffix}"
+        return {
+            "public_id": public_id,
+            "secure_url": url,
+            "url": url,
+            "bytes": destination.stat().st_size,
+            "resource_type": resource_type,
+            "format": suffix.lstrip("."),
+            "duration": 0,
+            "thumbnail_url": "",
+        }
+
+    def upload_large(self, file, **options) -> Dict[str, Any]:
+        return self.upload(file, **options)
+
+    def destroy(self, public_id: str, **options) -> Dict[str, str]:
+        # public_ids keep the uploaded file's name, which may contain glob characters
+        for path in self.root.glob(f"{glob.escape(public_id)}.*"):
+            path.unlink()
+            return {"result": "ok"}
+        return {"result": "not found"}
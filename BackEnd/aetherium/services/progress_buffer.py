@@ -0,0 +1,248 @@
+# services/progress_buffer.py
+from sqlalchemy import Float, Integer, column, false, func, select, values
+from sqlalchemy.dialects.postgresql import insert
+from redis.asyncio import Redis
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import time
+import uuid
+
+from aetherium.config import settings
+from aetherium.core.logger import logger
+from aetherium.database.db import AsyncSessionLocal
+from aetherium.models.courses.lesson import Lesson
+from aetherium.models.courses.progress import LessonProgress
+from aetherium.models.user import User
+
+# Hash of pending heartbeats: field "<user_id>:<lesson_id>", value "<time_spent>:<progress_percentage>"
+HEARTBEAT_BUFFER_KEY = "progress:heartbeats"
+# A flush renames the live hash to one of these ("<prefix><claimed at>:<uuid>") before writing it,
+# so new heartbeats start a fresh hash
+HEARTBEAT_FLUSHING_PREFIX = "progress:heartbeats:flushing:"
+FLUSH_BATCH_SIZE = 1000
+# Seconds after which a claimed hash is taken to belong to a worker that died mid-flush
+FLUSH_ORPHAN_AFTER = 300
+
+# Keep the highest value seen for both fields; heartbeats from several workers arrive in any order
+RECORD_HEARTBEAT_SCRIPT = """
+local time_spent = tonumber(ARGV[2])
+local progress = tonumber(ARGV[3])
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current then
+    local sep = string.find(current, ':', 1, true)
+    time_spent = math.max(time_spent, tonumber(string.sub(current, 1, sep - 1)))
+    progress = math.max(progress, tonumber(string.sub(current, sep + 1)))
+end
+redis.call('HSET', KEYS[1], ARGV[1], time_spent .. ':' .. progress)
+return 1
+"""
+
+# Merge an orphaned flushing hash (KEYS[1]) back into the live one (KEYS[2]) with the same max rule
+RESTORE_FLUSHING_SCRIPT = """
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    local value = entries[i + 1]
+    local sep = string.find(value, ':', 1, true)
+    local time_spent = tonumber(string.sub(value, 1, sep - 1))
+    local progress = tonumber(string.sub(value, sep + 1))
+    local current = redis.call('HGET', KEYS[2], entries[i])
+    if current then
+        sep = string.find(current, ':', 1, true)
+        time_spent = math.max(time_spent, tonumber(string.sub(current, 1, sep - 1)))
+        progress = math.max(progress, tonumber(string.sub(current, sep + 1)))
+    end
+    redis.call('HSET', KEYS[2], entries[i], time_spent .. ':' .. progress)
+end
+redis.call('DEL', KEYS[1])
+return #entries / 2
+"""
+
+
+class ProgressHeartbeatBuffer:
+    """
+    Write-behind buffer for lesson time/progress heartbeats.
+
+    Heartbeats are coalesced per (user, lesson) in a Redis hash and written
+    to lesson_progress every PROGRESS_FLUSH_INTERVAL seconds with one
+    INSERT ... ON CONFLICT per FLUSH_BATCH_SIZE rows. Values only move
+    forward (GREATEST), so late or reordered pings cannot undo progress.
+    Completion changes never go through here; ProgressService applies them
+    immediately together with the section/course rollup.
+    """
+
+    def __init__(self):
+        self.redis: Optional[Redis] = None
+        self._record = None
+        self._restore = None
+        self._task: Optional[asyncio.Task] = None
+        # metrics
+        self.recorded = 0
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush: Optional[float] = None
+
+    async def start(self, redis: Redis):
+        self.redis = redis
+        self._record = redis.register_script(RECORD_HEARTBEAT_SCRIPT)
+        self._restore = redis.register_script(RESTORE_FLUSHING_SCRIPT)
+        try:
+            await self.restore_orphans()
+        except Exception as e:
+            logger.error(f"Could not restore orphaned progress heartbeats: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.redis:
+            # Hand what this worker buffered to the database before going away
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Final progress heartbeat flush failed: {e}")
+        self.redis = None
+
+    async def record(self, user_id: int, lesson_id: int, time_spent: Optional[int], progress_percentage: Optional[float]):
+        await self._record(
+            keys=[HEARTBEAT_BUFFER_KEY],
+            args=[f"{user_id}:{lesson_id}", time_spent or 0, progress_percentage or 0],
+        )
+        self.recorded += 1
+
+    async def pending(self, user_id: int, lesson_id: int) -> Optional[Tuple[int, float]]:
+        """Buffered (time_spent, progress_percentage) not yet written to the database"""
+        raw = await self.redis.hget(HEARTBEAT_BUFFER_KEY, f"{user_id}:{lesson_id}")
+        return _parse_value(raw) if raw else None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.PROGRESS_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress heartbeat flush failed: {e}")
+
+    async def restore_orphans(self) -> int:
+        """
+        Merge back hashes claimed by a flush that never finished (the worker died
+        between RENAME and DELETE); returns the number of heartbeats restored.
+        """
+        restored = 0
+        cutoff = time.time() - FLUSH_ORPHAN_AFTER
+        async for key in self.redis.scan_iter(match=f"{HEARTBEAT_FLUSHING_PREFIX}*", count=100):
+            claimed_at = key[len(HEARTBEAT_FLUSHING_PREFIX):].split(":")[0]
+            # Recent claims are most likely a flush still running on another worker
+            if claimed_at.isdigit() and int(claimed_at) > cutoff:
+                continue
+            restored += await self._restore(keys=[key, HEARTBEAT_BUFFER_KEY])
+        if restored:
+            logger.warning(f"Restored {restored} progress heartbeats from interrupted flushes")
+        return restored
+
+    async def flush(self) -> int:
+        """Write every buffered heartbeat to lesson_progress; returns the number of rows"""
+        await self.restore_orphans()
+        claimed = f"{HEARTBEAT_FLUSHING_PREFIX}{int(time.time())}:{uuid.uuid4().hex}"
+        try:
+            await self.redis.rename(HEARTBEAT_BUFFER_KEY, claimed)
+        except Exception:
+            # Nothing buffered (RENAME fails on a missing key)
+            return 0
+
+        entries = await self.redis.hgetall(claimed)
+        rows = [_parse_entry(field, value) for field, value in entries.items()]
+        try:
+            for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+                await _write_batch(rows[start:start + FLUSH_BATCH_SIZE])
+        except Exception:
+            self.failed_flushes += 1
+            # Put the batch back; the max-merge makes replaying already written rows harmless
+            for field, value in entries.items():
+                time_spent, progress = _parse_value(value)
+                await self._record(keys=[HEARTBEAT_BUFFER_KEY], args=[field, time_spent, progress])
+            await self.redis.delete(claimed)
+            raise
+
+        await self.redis.delete(claimed)
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        self.last_flush = time.time()
+        return len(rows)
+
+    def metrics(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "last_flush": self.last_flush,
+            "flush_interval": settings.PROGRESS_FLUSH_INTERVAL,
+        }
+
+
+def _parse_value(raw: str) -> Tuple[int, float]:
+    time_spent, progress = raw.split(":")
+    return int(float(time_spent)), float(progress)
+
+
+def _parse_entry(field: str, value: str) -> Dict:
+    user_id, lesson_id = field.split(":")
+    time_spent, progress = _parse_value(value)
+    return {
+        "user_id": int(user_id),
+        "lesson_id": int(lesson_id),
+        "time_spent": time_spent,
+        "progress_percentage": progress,
+    }
+
+
+async def _write_batch(rows: List[Dict]):
+    heartbeats = values(
+        column("user_id", Integer),
+        column("lesson_id", Integer),
+        column("time_spent", Integer),
+        column("progress_percentage", Float),
+        name="heartbeats",
+    ).data([(r["user_id"], r["lesson_id"], r["time_spent"], r["progress_percentage"]) for r in rows])
+
+    # Joining users/lessons drops heartbeats for rows deleted since the ping instead of failing the batch
+    stmt = insert(LessonProgress).from_select(
+        ["user_id", "lesson_id", "time_spent", "progress_percentage", "is_completed"],
+        select(
+            heartbeats.c.user_id,
+            heartbeats.c.lesson_id,
+            heartbeats.c.time_spent,
+            heartbeats.c.progress_percentage,
+            false(),
+        )
+        .join(Lesson, Lesson.id == heartbeats.c.lesson_id)
+        .join(User, User.id == heartbeats.c.user_id)
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="unique_user_lesson_progress",
+        set_={
+            "time_spent": func.greatest(func.coalesce(LessonProgress.time_spent, 0), stmt.excluded.time_spent),
+            "progress_percentage": func.greatest(
+                func.coalesce(LessonProgress.progress_percentage, 0), stmt.excluded.progress_percentage
+            ),
+            "last_accessed": func.now(),
+        },
+    )
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(stmt)
+        await db.commit()
+
+
+progress_buffer = ProgressHeartbeatBuffer()
+
+def get_progress_buffer() -> ProgressHeartbeatBuffer:
+    return progress_buffer
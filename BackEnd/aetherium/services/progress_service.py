@@ -1,7 +1,10 @@
 # services/progress_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, case, delete, false, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from redis.asyncio import Redis
+from typing import Iterable, List, Optional, Dict, Any, Union
 from fastapi import HTTPException
 from datetime import datetime
 
@@ -9,268 +12,409 @@ from aetherium.models.courses.lesson import Lesson
 from aetherium.models.courses.section import Section
 from aetherium.models.courses.course import Course
 from aetherium.models.courses.progress import LessonProgress, SectionProgress, CourseProgress
+from aetherium.services.curriculum_cache import get_curriculum_totals
+from aetherium.services.progress_buffer import ProgressHeartbeatBuffer
 from aetherium.schemas.progress import (
-    LessonProgressCreate, LessonProgressUpdate, LessonProgressResponse,
+    LessonProgressCreate, LessonProgressUpdate, LessonProgressResponse, LessonHeartbeatResponse,
     SectionProgressResponse, CourseProgressResponse
 )
 
+def _percentage(completed, total: int):
+    """completed / total as a percentage, capped at 100 (completed may be a SQL expression)"""
+    if total <= 0:
+        return 0.0
+    if isinstance(completed, int):
+        return min(completed * 100.0 / total, 100.0)
+    return func.least(completed * 100.0 / total, 100.0)
+
+
+def _completed(completed, total: int):
+    if total <= 0:
+        return false()
+    return completed >= total
+
+
+def discount_removed_lessons(db: Session, lesson_ids: Iterable[int], section_ids: Iterable[int] = ()) -> None:
+    """
+    Take lessons and sections that are about to be deleted out of the section/course
+    counters, in the caller's (sync) transaction. Call it before the deletes: counters
+    only move on completion transitions, so a deleted completed lesson would otherwise
+    stay counted. section_ids are sections deleted as a whole; their lessons must be
+    in lesson_ids.
+    """
+    lesson_ids, section_ids = list(lesson_ids), list(section_ids)
+    if not lesson_ids and not section_ids:
+        return
+    course_ids = db.execute(
+        select(Section.course_id).distinct().where(
+            Section.id.in_(section_ids) | Section.id.in_(select(Lesson.section_id).where(Lesson.id.in_(lesson_ids)))
+        )
+    ).scalars().all()
+    removed = (
+        select(Lesson.id, Lesson.section_id, Section.course_id)
+        .join(Section, Section.id == Lesson.section_id)
+        .where(Lesson.id.in_(lesson_ids))
+        .subquery()
+    )
+
+    def completed_per_user(scope):
+        return (
+            select(LessonProgress.user_id, scope, func.count().label("count"))
+            .join(removed, removed.c.id == LessonProgress.lesson_id)
+            .where(LessonProgress.is_completed.is_(True))
+            .group_by(LessonProgress.user_id, scope)
+            .subquery()
+        )
+
+    # Sections that keep existing: drop the deleted lessons from both counters
+    completed = completed_per_user(removed.c.section_id)
+    db.execute(
+        update(SectionProgress)
+        .where(SectionProgress.user_id == completed.c.user_id, SectionProgress.section_id == completed.c.section_id)
+        .values(lessons_completed=func.greatest(func.coalesce(SectionProgress.lessons_completed, 0) - completed.c.count, 0))
+        .execution_options(synchronize_session=False)
+    )
+    lessons_per_section = select(removed.c.section_id, func.count().label("count")).group_by(removed.c.section_id).subquery()
+    section_total = func.greatest(func.coalesce(SectionProgress.total_lessons, 0) - lessons_per_section.c.count, 0)
+    section_count = func.coalesce(SectionProgress.lessons_completed, 0)
+    section_done = and_(section_total > 0, section_count >= section_total)
+    db.execute(
+        update(SectionProgress)
+        .where(SectionProgress.section_id == lessons_per_section.c.section_id)
+        .values(
+            total_lessons=section_total,
+            progress_percentage=case((section_total > 0, func.least(section_count * 100.0 / section_total, 100.0)), else_=0.0),
+            is_completed=section_done,
+            completed_at=case((and_(section_done, SectionProgress.completed_at.is_(None)), func.now()), else_=SectionProgress.completed_at),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if section_ids:
+        db.execute(delete(SectionProgress).where(SectionProgress.section_id.in_(section_ids)).execution_options(synchronize_session=False))
+
+    # Courses: lessons by the same decrement, totals and completed sections from what remains
+    completed = completed_per_user(removed.c.course_id)
+    db.execute(
+        update(CourseProgress)
+        .where(CourseProgress.user_id == completed.c.user_id, CourseProgress.course_id == completed.c.course_id)
+        .values(lessons_completed=func.greatest(func.coalesce(CourseProgress.lessons_completed, 0) - completed.c.count, 0))
+        .execution_options(synchronize_session=False)
+    )
+    course_total = (
+        select(func.count(Lesson.id))
+        .join(Section, Section.id == Lesson.section_id)
+        .where(Section.course_id == CourseProgress.course_id, Lesson.id.not_in(lesson_ids))
+        .scalar_subquery()
+    )
+    course_count = func.coalesce(CourseProgress.lessons_completed, 0)
+    course_done = and_(course_total > 0, course_count >= course_total)
+    db.execute(
+        update(CourseProgress)
+        .where(CourseProgress.course_id.in_(course_ids))
+        .values(
+            total_lessons=course_total,
+            total_sections=(
+                select(func.count(Section.id))
+                .where(Section.course_id == CourseProgress.course_id, Section.id.not_in(section_ids))
+                .scalar_subquery()
+            ),
+            sections_completed=(
+                select(func.count(SectionProgress.id))
+                .join(Section, Section.id == SectionProgress.section_id)
+                .where(
+                    Section.course_id == CourseProgress.course_id,
+                    SectionProgress.user_id == CourseProgress.user_id,
+                    SectionProgress.is_completed.is_(True)
+                )
+                .scalar_subquery()
+            ),
+            progress_percentage=case((course_total > 0, func.least(course_count * 100.0 / course_total, 100.0)), else_=0.0),
+            is_completed=course_done,
+            completed_at=case((and_(course_done, CourseProgress.completed_at.is_(None)), func.now()), else_=CourseProgress.completed_at),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def remove_course_progress(db: Session, course_id: int) -> None:
+    """Delete the section/course counters of a course that is being deleted, in the caller's transaction"""
+    db.execute(
+        delete(SectionProgress)
+        .where(SectionProgress.section_id.in_(select(Section.id).where(Section.course_id == course_id)))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(CourseProgress).where(CourseProgress.course_id == course_id).execution_options(synchronize_session=False))
+
+
 class ProgressService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, cache: Optional[Redis] = None):
         self.db = db
+        # Redis for cached curriculum totals; without it totals are read from the database
+        self.cache = cache
+
+    async def _scalar(self, query):
+        return (await self.db.execute(query)).scalar()
+
+    async def _first(self, query):
+        return (await self.db.execute(query)).scalars().first()
 
     """Update lesson progress for a user"""
     async def update_lesson_progress(self, user_id: int, lesson_id: int, progress_data: LessonProgressUpdate) -> LessonProgressResponse:
-        
-        # Get or create lesson progress
-        progress = self.db.query(LessonProgress).filter(and_(LessonProgress.user_id == user_id,LessonProgress.lesson_id == lesson_id)).first()
-        
-        if not progress:
-            lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
-            if not lesson:
+
+        # Existing progress (row-locked so concurrent updates see each other's transitions) with the lesson's location
+        row = (await self.db.execute(
+            select(LessonProgress, Lesson.section_id, Section.course_id)
+            .join(Lesson, Lesson.id == LessonProgress.lesson_id)
+            .join(Section, Section.id == Lesson.section_id)
+            .where(and_(LessonProgress.user_id == user_id, LessonProgress.lesson_id == lesson_id))
+            .with_for_update(of=LessonProgress)
+        )).first()
+
+        if row:
+            progress, section_id, course_id = row
+        else:
+            location = (await self.db.execute(
+                select(Lesson.section_id, Section.course_id)
+                .join(Section, Section.id == Lesson.section_id)
+                .where(Lesson.id == lesson_id)
+            )).first()
+            if not location:
                 raise HTTPException(status_code=404, detail="Lesson not found")
-            
+            section_id, course_id = location
+
             progress = LessonProgress(
                 user_id=user_id,
-                lesson_id=lesson_id
+                lesson_id=lesson_id,
+                is_completed=False,
+                progress_percentage=0.0,
+                time_spent=0
             )
             self.db.add(progress)
-        
+
+        was_completed = bool(progress.is_completed)
+
         # Update progress fields
         update_data = progress_data.model_dump(exclude_none=True)
         for key, value in update_data.items():
             setattr(progress, key, value)
-        
+
         # Mark as completed if 100% progress
-        if progress.progress_percentage >= 100.0:
+        if (progress.progress_percentage or 0) >= 100.0:
             progress.is_completed = True
+
+        is_completed = bool(progress.is_completed)
+        if is_completed and not was_completed:
             progress.completed_at = datetime.now()
-        
-        self.db.commit()
-        self.db.refresh(progress)
-        
-        # Update section and course progress
-        await self._update_section_progress(user_id, lesson_id)
-        
+
+        # Only completion transitions move section/course counters; heartbeats stop here
+        if is_completed != was_completed:
+            await self._apply_completion_delta(user_id, section_id, course_id, 1 if is_completed else -1)
+
+        await self.db.commit()
+        if not row:
+            # Load server defaults (last_accessed) of the new row
+            await self.db.refresh(progress)
+
         return LessonProgressResponse.model_validate(progress)
-    
-    """Update section progress based on lesson completion"""
-    async def _update_section_progress(self, user_id: int, lesson_id: int):
-        
-        lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
-        if not lesson:
-            return
-        
-        section_id = lesson.section_id
-        
-        # Get total lessons in section
-        total_lessons = self.db.query(func.count(Lesson.id)).filter(
-            Lesson.section_id == section_id
-        ).scalar()
-        
-        # Get completed lessons in section
-        completed_lessons = self.db.query(func.count(LessonProgress.id)).filter(
-            and_(
-                LessonProgress.user_id == user_id,
-                LessonProgress.is_completed == True,
-                LessonProgress.lesson_id.in_(
-                    self.db.query(Lesson.id).filter(Lesson.section_id == section_id)
-                )
-            )
-        ).scalar()
-        
-        # Progress percentage calculation
-        progress_percentage = (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0
-        
-        # Get or create section progress
-        section_progress = self.db.query(SectionProgress).filter(
-            and_(
-                SectionProgress.user_id == user_id,
-                SectionProgress.section_id == section_id
-            )
-        ).first()
-        
-        if not section_progress:
-            section_progress = SectionProgress(
-                user_id=user_id,
-                section_id=section_id
-            )
-            self.db.add(section_progress)
-        
-        # Update section progress
-        section_progress.lessons_completed = completed_lessons
-        section_progress.total_lessons = total_lessons
-        section_progress.progress_percentage = progress_percentage
-        section_progress.is_completed = progress_percentage >= 100.0
-        
-        if section_progress.is_completed and not section_progress.completed_at:
-            section_progress.completed_at = datetime.now()
-        
-        self.db.commit()
-        
-        # Update course progress
-        await self._update_course_progress(user_id, section_id)
-    
-    async def _update_course_progress(self, user_id: int, section_id: int):
-        """Update course progress based on section completion"""
-        # Get section and course info
-        section = self.db.query(Section).filter(Section.id == section_id).first()
-        if not section:
-            return
-        
-        course_id = section.course_id
-        
-        # Get total sections in course
-        total_sections = self.db.query(func.count(Section.id)).filter(
-            Section.course_id == course_id
-        ).scalar()
-        
-        # Get completed sections in course
-        completed_sections = self.db.query(func.count(SectionProgress.id)).filter(
-            and_(
-                SectionProgress.user_id == user_id,
-                SectionProgress.is_completed == True,
-                SectionProgress.section_id.in_(
-                    self.db.query(Section.id).filter(Section.course_id == course_id)
-                )
-            )
-        ).scalar()
-        
-        # Get total lessons in course
-        total_lessons = self.db.query(func.count(Lesson.id)).filter(
-            Lesson.section_id.in_(
-                self.db.query(Section.id).filter(Section.course_id == course_id)
-            )
-        ).scalar()
-        
-        # Get completed lessons in course
-        completed_lessons = self.db.query(func.count(LessonProgress.id)).filter(
-            and_(
-                LessonProgress.user_id == user_id,
-                LessonProgress.is_completed == True,
-                LessonProgress.lesson_id.in_(
-                    self.db.query(Lesson.id).filter(
-                        Lesson.section_id.in_(
-                            self.db.query(Section.id).filter(Section.course_id == course_id)
-                        )
-                    )
-                )
-            )
-        ).scalar()
-        
-        # Calculate progress percentage
-        progress_percentage = (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0
-        
-        # Get or create course progress
-        course_progress = self.db.query(CourseProgress).filter(
-            and_(
-                CourseProgress.user_id == user_id,
-                CourseProgress.course_id == course_id
-            )
-        ).first()
-        
-        if not course_progress:
-            course_progress = CourseProgress(
-                user_id=user_id,
-                course_id=course_id
-            )
-            self.db.add(course_progress)
-        
-        # Update course progress
-        course_progress.sections_completed = completed_sections
-        course_progress.total_sections = total_sections
-        course_progress.lessons_completed = completed_lessons
-        course_progress.total_lessons = total_lessons
-        course_progress.progress_percentage = progress_percentage
-        course_progress.is_completed = progress_percentage >= 100.0
-        
-        if course_progress.is_completed and not course_progress.completed_at:
-            course_progress.completed_at = datetime.now()
-        
-        self.db.commit()
-    
-    def get_lesson_progress(self, user_id: int, lesson_id: int) -> Optional[LessonProgressResponse]:
+
+    async def record_heartbeat(self, user_id: int, lesson_id: int, progress_data: LessonProgressUpdate, buffer: ProgressHeartbeatBuffer) -> Union[LessonProgressResponse, LessonHeartbeatResponse]:
+        """Buffer a time/progress ping; completion changes are applied immediately"""
+        if progress_data.is_completed is not None or (progress_data.progress_percentage or 0) >= 100.0:
+            return await self.update_lesson_progress(user_id, lesson_id, progress_data)
+
+        # No database read: the flush's INSERT ... ON CONFLICT creates rows that do not exist yet
+        await buffer.record(user_id, lesson_id, progress_data.time_spent, progress_data.progress_percentage)
+        return self.buffered(user_id, lesson_id, await buffer.pending(user_id, lesson_id))
+
+    @staticmethod
+    def buffered(user_id: int, lesson_id: int, pending) -> LessonHeartbeatResponse:
+        """The heartbeat values waiting for the next flush"""
+        time_spent, progress_percentage = pending or (0, 0.0)
+        return LessonHeartbeatResponse(
+            user_id=user_id,
+            lesson_id=lesson_id,
+            time_spent=time_spent,
+            progress_percentage=progress_percentage
+        )
+
+    @staticmethod
+    def with_pending(progress: LessonProgress, pending) -> LessonProgressResponse:
+        """The stored progress merged with heartbeats still waiting for the next flush"""
+        response = LessonProgressResponse.model_validate(progress)
+        if not pending:
+            return response
+        time_spent, progress_percentage = pending
+        return response.model_copy(update={
+            "time_spent": max(response.time_spent, time_spent),
+            "progress_percentage": max(response.progress_percentage, progress_percentage)
+        })
+
+    async def _apply_completion_delta(self, user_id: int, section_id: int, course_id: int, delta: int):
+        """Shift section and course counters by one completed lesson (+1 / -1), in the caller's transaction"""
+        totals = await get_curriculum_totals(self.db, course_id, self.cache)
+
+        section_total = totals.lessons_in(section_id)
+        section_count = func.greatest(func.coalesce(SectionProgress.lessons_completed, 0) + delta, 0)
+        section_stmt = insert(SectionProgress).values(
+            user_id=user_id,
+            section_id=section_id,
+            lessons_completed=max(delta, 0),
+            total_lessons=section_total,
+            progress_percentage=_percentage(max(delta, 0), section_total),
+            is_completed=section_total > 0 and max(delta, 0) >= section_total,
+            completed_at=func.now() if section_total > 0 and max(delta, 0) >= section_total else None
+        )
+        section_done = _completed(section_count, section_total)
+        section_stmt = section_stmt.on_conflict_do_update(
+            constraint="unique_user_section_progress",
+            set_={
+                "lessons_completed": section_count,
+                "total_lessons": section_total,
+                "progress_percentage": _percentage(section_count, section_total),
+                "is_completed": section_done,
+                "completed_at": case(
+                    (and_(section_done, SectionProgress.completed_at.is_(None)), func.now()),
+                    else_=SectionProgress.completed_at
+                ),
+                "last_accessed": func.now(),
+            }
+        ).returning(SectionProgress.lessons_completed)
+        lessons_completed = (await self.db.execute(section_stmt)).scalar_one()
+
+        # Did this lesson complete (or reopen) the section?
+        previous = lessons_completed - delta
+        if previous < section_total <= lessons_completed:
+            section_delta = 1
+        elif lessons_completed < section_total <= previous:
+            section_delta = -1
+        else:
+            section_delta = 0
+
+        course_total = totals.total_lessons
+        course_count = func.greatest(func.coalesce(CourseProgress.lessons_completed, 0) + delta, 0)
+        course_done = _completed(course_count, course_total)
+        course_stmt = insert(CourseProgress).values(
+            user_id=user_id,
+            course_id=course_id,
+            lessons_completed=max(delta, 0),
+            total_lessons=course_total,
+            sections_completed=max(section_delta, 0),
+            total_sections=totals.total_sections,
+            progress_percentage=_percentage(max(delta, 0), course_total),
+            is_completed=course_total > 0 and max(delta, 0) >= course_total,
+            completed_at=func.now() if course_total > 0 and max(delta, 0) >= course_total else None
+        )
+        course_stmt = course_stmt.on_conflict_do_update(
+            constraint="unique_user_course_progress",
+            set_={
+                "lessons_completed": course_count,
+                "total_lessons": course_total,
+                "sections_completed": func.greatest(func.coalesce(CourseProgress.sections_completed, 0) + section_delta, 0),
+                "total_sections": totals.total_sections,
+                "progress_percentage": _percentage(course_count, course_total),
+                "is_completed": course_done,
+                "completed_at": case(
+                    (and_(course_done, CourseProgress.completed_at.is_(None)), func.now()),
+                    else_=CourseProgress.completed_at
+                ),
+                "last_accessed": func.now(),
+            }
+        )
+        await self.db.execute(course_stmt)
+
+    async def get_lesson_progress(self, user_id: int, lesson_id: int) -> Optional[LessonProgressResponse]:
         """Get lesson progress for a user"""
-        progress = self.db.query(LessonProgress).filter(
-            and_(
-                LessonProgress.user_id == user_id,
-                LessonProgress.lesson_id == lesson_id
+        progress = await self._first(
+            select(LessonProgress).where(
+                and_(
+                    LessonProgress.user_id == user_id,
+                    LessonProgress.lesson_id == lesson_id
+                )
             )
-        ).first()
-        
+        )
+
         if not progress:
             return None
-        
+
         return progress
-    
-    def get_section_progress(self, user_id: int, section_id: int) -> Optional[SectionProgressResponse]:
+
+    async def get_section_progress(self, user_id: int, section_id: int) -> Optional[SectionProgressResponse]:
         """Get section progress for a user"""
-        progress = self.db.query(SectionProgress).filter(
-            and_(
-                SectionProgress.user_id == user_id,
-                SectionProgress.section_id == section_id
+        progress = await self._first(
+            select(SectionProgress).where(
+                and_(
+                    SectionProgress.user_id == user_id,
+                    SectionProgress.section_id == section_id
+                )
             )
-        ).first()
-        
+        )
+
         if not progress:
             return None
-        
+
         return progress
-    
-    def get_course_progress(self, user_id: int, course_id: int):
+
+    async def get_course_progress(self, user_id: int, course_id: int):
         """Get course progress for a user"""
-        progress = self.db.query(CourseProgress).filter(
-            and_(
-                CourseProgress.user_id == user_id,
-                CourseProgress.course_id == course_id
+        progress = await self._first(
+            select(CourseProgress).where(
+                and_(
+                    CourseProgress.user_id == user_id,
+                    CourseProgress.course_id == course_id
+                )
             )
-        ).first()
-        
+        )
+
         if not progress:
             return None
-        
+
         return progress
-    
-    def get_user_course_progress_summary(self, user_id: int) -> List[CourseProgressResponse]:
+
+    async def get_user_course_progress_summary(self, user_id: int) -> List[CourseProgressResponse]:
         """Get all course progress for a user"""
-        progress_list = self.db.query(CourseProgress).filter(
-            CourseProgress.user_id == user_id
-        ).all()
-        
-        return [CourseProgressResponse.from_orm(progress) for progress in progress_list]
-    
-    def get_course_analytics(self, course_id: int) -> Dict[str, Any]:
+        result = await self.db.execute(
+            select(CourseProgress).where(CourseProgress.user_id == user_id)
+        )
+
+        return [CourseProgressResponse.model_validate(progress) for progress in result.scalars().all()]
+
+    async def get_course_analytics(self, course_id: int) -> Dict[str, Any]:
         """Get course analytics (completion rates, etc.)"""
         # Total enrolled users
-        total_users = self.db.query(func.count(CourseProgress.user_id.distinct())).filter(
-            CourseProgress.course_id == course_id
-        ).scalar()
-        
+        total_users = await self._scalar(
+            select(func.count(CourseProgress.user_id.distinct())).where(CourseProgress.course_id == course_id)
+        )
+
         # Completed users
-        completed_users = self.db.query(func.count(CourseProgress.user_id)).filter(
-            and_(
-                CourseProgress.course_id == course_id,
-                CourseProgress.is_completed == True
+        completed_users = await self._scalar(
+            select(func.count(CourseProgress.user_id)).where(
+                and_(
+                    CourseProgress.course_id == course_id,
+                    CourseProgress.is_completed == True
+                )
             )
-        ).scalar()
-        
+        )
+
         # Average progress
-        avg_progress = self.db.query(func.avg(CourseProgress.progress_percentage)).filter(
-            CourseProgress.course_id == course_id
-        ).scalar() or 0
-        
+        avg_progress = await self._scalar(
+            select(func.avg(CourseProgress.progress_percentage)).where(CourseProgress.course_id == course_id)
+        ) or 0
+
         # Most common stopping point (section with lowest completion rate)
-        section_completion = self.db.query(
-            SectionProgress.section_id,
-            func.count(SectionProgress.id).label('total'),
-            func.count(
-                func.case([(SectionProgress.is_completed == True, 1)])
-            ).label('completed')
-        ).filter(
-            SectionProgress.section_id.in_(
-                self.db.query(Section.id).filter(Section.course_id == course_id)
-            )
-        ).group_by(SectionProgress.section_id).all()
-        
+        section_completion = (await self.db.execute(
+            select(
+                SectionProgress.section_id,
+                func.count(SectionProgress.id).label('total'),
+                func.count(
+                    case((SectionProgress.is_completed == True, 1))
+                ).label('completed')
+            ).where(
+                SectionProgress.section_id.in_(
+                    select(Section.id).where(Section.course_id == course_id)
+                )
+            ).group_by(SectionProgress.section_id)
+        )).all()
+
         return {
             "total_enrolled": total_users,
             "completed_users": completed_users,
@@ -283,4 +427,4 @@ class ProgressService:
                 }
                 for sc in section_completion
             ]
-        }
\ No newline at end of file
+        }
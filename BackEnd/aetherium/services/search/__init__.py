@@ -0,0 +1,15 @@
+from aetherium.config import settings
+from aetherium.services.search.postgres_backend import PostgresCourseSearch
+from aetherium.services.search.memory_backend import InMemoryCourseSearch
+
+SEARCH_BACKENDS = {
+    "postgres": PostgresCourseSearch,
+    "memory": InMemoryCourseSearch,
+}
+
+course_search = SEARCH_BACKENDS[settings.SEARCH_BACKEND]()
+
+def get_course_search():
+    return course_search
+
+__all__ = ["PostgresCourseSearch", "InMemoryCourseSearch", "get_course_search"]
@@ -0,0 +1,162 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import case, false, literal, select
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+import bisect
+import threading
+
+from aetherium.models.courses import Course, LearningObjective
+from aetherium.services.search.postgres_backend import query_terms, words
+
+# Same relative weights as Postgres ts_rank for A/B/C/D
+FIELD_WEIGHTS = {"title": 1.0, "subtitle": 0.4, "description": 0.2, "objectives": 0.1}
+# pg_trgm's default similarity threshold
+TRIGRAM_THRESHOLD = 0.3
+PREFIX_FACTOR = 0.8
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+class InMemoryCourseSearch:
+    """
+    Pure-Python inverted index approximating PostgresCourseSearch (no stemming).
+
+    Every query word must match an indexed word exactly, as a prefix, or (when
+    neither exists) by trigram similarity. Meant for development and tests
+    without pg_trgm; each worker holds its own copy, built on first search and
+    kept current by refresh_course.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._documents: Dict[int, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+
+    def index_course(self, course_id: int, fields: Dict[str, Optional[str]]):
+        with self._lock:
+            self._remove(course_id)
+            indexed = set()
+            for field, text in fields.items():
+                for word in words(text):
+                    postings = self._postings[word]
+                    postings[course_id] = postings.get(course_id, 0.0) + FIELD_WEIGHTS[field]
+                    indexed.add(word)
+            self._documents[course_id] = indexed
+            for word in indexed:
+                if len(self._postings[word]) == 1:
+                    bisect.insort(self._vocabulary, word)
+                    for gram in trigrams(word):
+                        self._trigrams[gram].add(word)
+
+    def remove_course(self, course_id: int):
+        with self._lock:
+            self._remove(course_id)
+
+    def _remove(self, course_id: int):
+        for word in self._documents.pop(course_id, ()):
+            postings = self._postings[word]
+            postings.pop(course_id, None)
+            if not postings:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+                for gram in trigrams(word):
+                    self._trigrams[gram].discard(word)
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Indexed words a query word matches, with a score factor"""
+        matches = {}
+        start = bisect.bisect_left(self._vocabulary, term)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(term):
+                break
+            matches[word] = 1.0 if word == term else PREFIX_FACTOR
+        if matches:
+            return matches
+
+        candidates = set()
+        for gram in trigrams(term):
+            candidates |= self._trigrams.get(gram, set())
+        for word in candidates:
+            similarity = trigram_similarity(term, word)
+            if similarity >= TRIGRAM_THRESHOLD:
+                matches[word] = similarity
+        return matches
+
+    def search(self, term: str) -> Dict[int, float]:
+        """course_id -> score for courses matching every word of term"""
+        scores: Optional[Dict[int, float]] = None
+        with self._lock:
+            for query_word in query_terms(term):
+                word_scores: Dict[int, float] = {}
+                for word, factor in self._expand(query_word).items():
+                    for course_id, weight in self._postings[word].items():
+                        word_scores[course_id] = max(word_scores.get(course_id, 0.0), weight * factor)
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {course_id: score + word_scores[course_id] for course_id, score in scores.items() if course_id in word_scores}
+                if not scores:
+                    break
+        return scores or {}
+
+    async def rebuild(self, db: AsyncSession):
+        courses = (await db.execute(
+            select(Course.id, Course.title, Course.subtitle, Course.description)
+        )).all()
+        objectives = defaultdict(list)
+        for course_id, description in (await db.execute(
+            select(LearningObjective.course_id, LearningObjective.description)
+        )).all():
+            objectives[course_id].append(description)
+
+        with self._lock:
+            self._reset()
+        for course in courses:
+            self.index_course(course.id, _fields(course, objectives[course.id]))
+        self._loaded = True
+
+    def refresh_course(self, db: Session, course_id: int):
+        course = db.query(Course.id, Course.title, Course.subtitle, Course.description).filter(Course.id == course_id).first()
+        if not course:
+            self.remove_course(course_id)
+            return
+        objectives = [
+            description for (description,) in
+            db.query(LearningObjective.description).filter(LearningObjective.course_id == course_id).all()
+        ]
+        self.index_course(course_id, _fields(course, objectives))
+
+    async def match(self, db: AsyncSession, term: str):
+        if not query_terms(term):
+            return None
+        if not self._loaded:
+            await self.rebuild(db)
+
+        scores = self.search(term)
+        if not scores:
+            return false(), literal(0.0)
+        return Course.id.in_(scores), case(scores, value=Course.id, else_=0.0)
+
+
+def _fields(course, objectives: List[str]) -> Dict[str, Optional[str]]:
+    return {
+        "title": course.title,
+        "subtitle": course.subtitle,
+        "description": course.description,
+        "objectives": " ".join(objectives),
+    }
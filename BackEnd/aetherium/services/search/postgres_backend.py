@@ -0,0 +1,74 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, or_, select, update
+from typing import List, Optional
+import re
+
+from aetherium.models.courses import Course, LearningObjective
+
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+# Query words beyond this are ignored
+MAX_QUERY_TERMS = 8
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def words(text: Optional[str]) -> List[str]:
+    return WORD_PATTERN.findall((text or "").lower())
+
+
+def query_terms(term: str) -> List[str]:
+    return words(term)[:MAX_QUERY_TERMS]
+
+
+def _weighted(text, weight: str):
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(text, "")), literal_column(f"'{weight}'"))
+
+
+def course_search_vector(course_id: int):
+    """title (A) || subtitle (B) || description (C) || learning objectives (D)"""
+    objectives = (
+        select(func.string_agg(LearningObjective.description, " "))
+        .where(LearningObjective.course_id == course_id)
+        .scalar_subquery()
+    )
+    return (
+        _weighted(Course.title, "A")
+        .op("||")(_weighted(Course.subtitle, "B"))
+        .op("||")(_weighted(Course.description, "C"))
+        .op("||")(_weighted(objectives, "D"))
+    )
+
+
+class PostgresCourseSearch:
+    """
+    Course search on courses.search_vector (GIN) with a pg_trgm fallback on the title.
+
+    Every query word is matched as a prefix (`word:*`) and all words must match.
+    Titles within trigram similarity of the whole query also match, which
+    covers typos the stemmer cannot.
+    """
+
+    def refresh_course(self, db: Session, course_id: int):
+        """Recompute the course's vector inside the caller's transaction"""
+        db.execute(
+            update(Course)
+            .where(Course.id == course_id)
+            # Keep updated_at as is; this is derived data
+            .values(search_vector=course_search_vector(course_id), updated_at=Course.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def match(self, db: AsyncSession, term: str):
+        """(condition, rank) to filter and order courses by term; None when term has no words"""
+        terms = query_terms(term)
+        if not terms:
+            return None
+
+        tsquery = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{t}:*" for t in terms))
+        phrase = " ".join(terms)
+        condition = or_(
+            Course.search_vector.op("@@")(tsquery),
+            Course.title.op("%")(phrase)
+        )
+        rank = func.ts_rank_cd(Course.search_vector, tsquery) + func.similarity(Course.title, phrase)
+        return condition, rank
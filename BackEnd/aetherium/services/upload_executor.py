@@ -0,0 +1,152 @@
+# services/upload_executor.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+import asyncio
+import time
+
+from aetherium.config import settings
+from aetherium.core.logger import logger
+
+# Resource types with their own cap; anything else (pdf, raw files, deletes) counts as "raw"
+RESOURCE_TYPES = ("video", "image", "raw")
+
+
+class _TypeStats:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.transfer_total = 0.0
+        self.transfer_max = 0.0
+
+    def as_dict(self) -> dict:
+        started = self.completed + self.failed + self.timed_out + self.cancelled
+        finished = self.completed + self.failed
+        return {
+            "limit": self.limit,
+            "waiting": self.waiting,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "queue_wait_avg": self.queue_wait_total / started if started else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+            "transfer_avg": self.transfer_total / finished if finished else 0.0,
+            "transfer_max": self.transfer_max,
+        }
+
+
+class UploadExecutor:
+    """
+    Runs blocking Cloudinary calls off the event loop on a dedicated thread pool.
+
+    Each resource type has its own concurrency cap, so a burst of video or PDF
+    uploads queues behind its own limit instead of taking every thread (and the
+    default executor other blocking calls use). A slot stays taken until its thread
+    really finishes: a timed-out or cancelled caller stops waiting, but the
+    transfer keeps its slot until the SDK call returns.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = limits
+        self.stats = {resource_type: _TypeStats(limit) for resource_type, limit in limits.items()}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._pool = ThreadPoolExecutor(max_workers=sum(limits.values()), thread_name_prefix="media-upload")
+
+    @staticmethod
+    def resource_bucket(resource_type: Optional[str]) -> str:
+        return resource_type if resource_type in RESOURCE_TYPES else "raw"
+
+    def _semaphore(self, bucket: str) -> asyncio.Semaphore:
+        if bucket not in self._semaphores:
+            self._semaphores[bucket] = asyncio.Semaphore(self.limits[bucket])
+        return self._semaphores[bucket]
+
+    async def run(self, resource_type: Optional[str], fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        fn(*args, **kwargs) on the upload pool. timeout (seconds) covers queueing and
+        transfer; on expiry asyncio.TimeoutError is raised. Cancelling the caller
+        cancels a call that has not started yet.
+        """
+        bucket = self.resource_bucket(resource_type)
+        stats = self.stats[bucket]
+        semaphore = self._semaphore(bucket)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        queued_at = time.perf_counter()
+        stats.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            raise
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        finally:
+            stats.waiting -= 1
+            waited = time.perf_counter() - queued_at
+            stats.queue_wait_total += waited
+            stats.queue_wait_max = max(stats.queue_wait_max, waited)
+
+        started_at = time.perf_counter()
+        stats.active += 1
+
+        def release(_future):
+            # Runs when the thread is done (or the call was cancelled before starting)
+            stats.active -= 1
+            semaphore.release()
+
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+        remaining = max(deadline - loop.time(), 0) if deadline is not None else None
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            logger.warning(f"Media upload ({bucket}) timed out after {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.failed += 1
+            self._record_transfer(stats, started_at)
+            raise
+        stats.completed += 1
+        self._record_transfer(stats, started_at)
+        return result
+
+    @staticmethod
+    def _record_transfer(stats: _TypeStats, started_at: float) -> None:
+        elapsed = time.perf_counter() - started_at
+        stats.transfer_total += elapsed
+        stats.transfer_max = max(stats.transfer_max, elapsed)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> dict:
+        return {bucket: stats.as_dict() for bucket, stats in self.stats.items()}
+
+
+_upload_executor: Optional[UploadExecutor] = None
+
+
+def get_upload_executor() -> UploadExecutor:
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = UploadExecutor({
+            "video": settings.UPLOAD_CONCURRENCY_VIDEO,
+            "image": settings.UPLOAD_CONCURRENCY_IMAGE,
+            "raw": settings.UPLOAD_CONCURRENCY_RAW,
+        })
+    return _upload_executor
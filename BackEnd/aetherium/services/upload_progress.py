@@ -0,0 +1,156 @@
+# services/upload_progress.py
+from typing import Optional
+import json
+import time
+import redis
+
+from aetherium.core.logger import logger
+from aetherium.core.redis_client import get_sync_redis
+from aetherium.sockets.websocket import REPLAY_MAXLEN, REPLAY_TTL, replay_stream, user_channel
+
+# Latest progress event per upload task, for status requests and sockets that connect late
+UPLOAD_STATUS_PREFIX = "upload:status:"
+# Matches the Celery result_expires
+UPLOAD_STATUS_TTL = 2 * 60 * 60
+# Bytes-sent events are published at most this often per task; stage changes always are
+PROGRESS_EVENT_INTERVAL = 0.5
+
+# Stages after which nothing else is published for the task
+FINAL_STAGES = ("completed", "failed")
+# Celery state reported for each stage by the status endpoint
+STAGE_STATES = {
+    "queued": "PENDING",
+    "uploading": "PROGRESS",
+    "processing": "PROGRESS",
+    "retrying": "RETRY",
+    "completed": "SUCCESS",
+    "failed": "FAILURE",
+}
+
+def upload_status_key(task_id: str) -> str:
+    return f"{UPLOAD_STATUS_PREFIX}{task_id}"
+
+
+class UploadProgress:
+    """
+    Progress of one upload task, pushed to the uploading user's sockets.
+
+    Events go out on the user's WebSocket channel in the envelope NotificationManager
+    workers listen for, so no worker has to poll Celery. Intermediate events are
+    droppable and coalesced per task; the final one is also written to the user's
+    replay log. The latest event is kept as a snapshot in Redis.
+    """
+
+    def __init__(self, task_id: str, lesson_id: int, user_id: Optional[int], total_bytes: Optional[int] = None):
+        self.task_id = task_id
+        self.lesson_id = lesson_id
+        self.user_id = user_id
+        self.total_bytes = total_bytes
+        self._stage = None
+        self._last_sent = 0.0
+
+    def publish(self, stage: str, bytes_sent: Optional[int] = None, **fields) -> None:
+        now = time.monotonic()
+        if stage == self._stage and now - self._last_sent < PROGRESS_EVENT_INTERVAL:
+            return
+        self._stage = stage
+        self._last_sent = now
+
+        data = {
+            "task_id": self.task_id,
+            "lesson_id": self.lesson_id,
+            "user_id": self.user_id,
+            "stage": stage,
+            "bytes_sent": bytes_sent,
+            "total_bytes": self.total_bytes,
+            "progress": self._percent(stage, bytes_sent),
+            **fields,
+        }
+        try:
+            get_sync_redis().setex(upload_status_key(self.task_id), UPLOAD_STATUS_TTL, json.dumps(data))
+            if self.user_id is not None:
+                self._push({"type": "upload_progress", "data": data}, final=stage in FINAL_STAGES)
+        except redis.RedisError as e:
+            # Progress is best effort; the upload itself goes on
+            logger.warning(f"Could not publish progress of upload {self.task_id}: {e}")
+
+    def _percent(self, stage: str, bytes_sent: Optional[int]) -> int:
+        if stage == "completed":
+            return 100
+        if bytes_sent is None or not self.total_bytes:
+            return 0
+        # The transfer is 0-90%; the rest is Cloudinary processing and the database update
+        return min(int(bytes_sent * 90 / self.total_bytes), 90)
+
+    def _push(self, event: dict, final: bool) -> None:
+        event_id = None
+        if final:
+            pipe = get_sync_redis().pipeline(transaction=False)
+            pipe.xadd(replay_stream(self.user_id), {"event": json.dumps(event)}, maxlen=REPLAY_MAXLEN, approximate=True)
+            pipe.expire(replay_stream(self.user_id), REPLAY_TTL)
+            event_id, _ = pipe.execute()
+            event = {**event, "event_id": event_id}
+        envelope = {
+            "origin": f"upload:{self.task_id}",
+            "payload": json.dumps(event),
+            "coalesce_key": None if final else f"upload:{self.task_id}",
+            "droppable": not final,
+            "event_id": event_id,
+        }
+        get_sync_redis().publish(user_channel(self.user_id), json.dumps(envelope))
+
+
+class ProgressReader:
+    """File wrapper that reports how much was consumed before each read (chunked uploads read chunk by chunk)"""
+
+    def __init__(self, file, on_progress):
+        self._file = file
+        self._on_progress = on_progress
+        self.name = getattr(file, "name", None)
+
+    def read(self, size: int = -1) -> bytes:
+        # Everything read before this call has been sent
+        self._on_progress(self._file.tell())
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_upload_status(task_id: str) -> Optional[dict]:
+    """Latest progress snapshot of an upload task, or None"""
+    try:
+        raw = get_sync_redis().get(upload_status_key(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"Upload status cache unavailable: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+def upload_status_response(snapshot: dict) -> dict:
+    """Status response shaped like the Celery-based one (state, result, error) from a snapshot"""
+    response = {"state": STAGE_STATES.get(snapshot["stage"], "PROGRESS"), **snapshot}
+    if snapshot["stage"] == "completed":
+        response["result"] = {
+            "status": "success",
+            "lesson_id": snapshot["lesson_id"],
+            "url": snapshot.get("url"),
+            "public_id": snapshot.get("public_id"),
+            "file_type": snapshot.get("file_type"),
+            "file_size": snapshot.get("file_size"),
+            "duration": snapshot.get("duration"),
+            "thumbnail": snapshot.get("thumbnail"),
+        }
+    return response
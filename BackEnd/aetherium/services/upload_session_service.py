@@ -0,0 +1,202 @@
+# services/upload_session_service.py
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Dict, Tuple
+import hashlib
+import uuid
+from redis.asyncio import Redis
+
+from aetherium.schemas.lesson import UploadSessionCreate
+from aetherium.utils.upload_staging import STAGED_FILE_MAX_AGE, StagedFile, remove_staged_file, staging_dir
+
+UPLOAD_SESSION_PREFIX = "upload:session:"
+UPLOAD_LOCK_PREFIX = "upload:lock:"
+# Idle sessions expire; every committed chunk extends the session. Staged parts are
+# swept after STAGED_FILE_MAX_AGE, so the session must not outlive them.
+UPLOAD_SESSION_TTL = min(6 * 60 * 60, STAGED_FILE_MAX_AGE)
+# One chunk is written at a time per session; the lock outlives a slow chunk, not a dead client
+UPLOAD_LOCK_TTL = 10 * 60
+# Suggested chunk size; clients may send any size
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+HASH_READ_SIZE = 1024 * 1024
+
+# Release the lock only while it still holds our token; an expired lock may belong to another request by now
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class UploadSessionService:
+    """
+    Resumable lesson uploads: a session is created with the file's size, the client PUTs
+    byte ranges at the committed offset with a SHA-256 per chunk, and completes it.
+
+    Chunks are appended to one staged part file, so there is nothing to assemble;
+    the session (offset and metadata) lives in Redis (the shared async client).
+    """
+
+    @staticmethod
+    def _key(upload_id: str) -> str:
+        return f"{UPLOAD_SESSION_PREFIX}{upload_id}"
+
+    @staticmethod
+    def _response(upload_id: str, session: Dict[str, str]) -> Dict:
+        return {
+            "upload_id": upload_id,
+            "lesson_id": int(session["lesson_id"]),
+            "filename": session["filename"],
+            "file_type": session["file_type"],
+            "total_size": int(session["total_size"]),
+            "offset": int(session["offset"]),
+            "chunk_size": UPLOAD_CHUNK_SIZE,
+            "expires_in": UPLOAD_SESSION_TTL,
+        }
+
+    @staticmethod
+    async def _lock(cache: Redis, upload_id: str) -> str:
+        """Take the session's write lock; returns the token that releases it"""
+        token = uuid.uuid4().hex
+        if not await cache.set(f"{UPLOAD_LOCK_PREFIX}{upload_id}", token, nx=True, ex=UPLOAD_LOCK_TTL):
+            raise HTTPException(status_code=409, detail="Another chunk of this upload is being written")
+        return token
+
+    @staticmethod
+    async def _unlock(cache: Redis, upload_id: str, token: str) -> None:
+        await cache.eval(RELEASE_LOCK_SCRIPT, 1, f"{UPLOAD_LOCK_PREFIX}{upload_id}", token)
+
+    @staticmethod
+    async def create_session(cache: Redis, lesson_id: int, user_id: int, data: UploadSessionCreate) -> Dict:
+        upload_id = uuid.uuid4().hex
+        path = str(staging_dir() / f"session-{upload_id}.part")
+        open(path, "wb").close()
+
+        session = {
+            "lesson_id": lesson_id,
+            "user_id": user_id,
+            "filename": data.filename,
+            "file_type": data.file_type,
+            "total_size": data.total_size,
+            "sha256": (data.sha256 or "").lower(),
+            "offset": 0,
+            "path": path,
+        }
+        key = UploadSessionService._key(upload_id)
+        async with cache.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=session)
+            pipe.expire(key, UPLOAD_SESSION_TTL)
+            await pipe.execute()
+        return UploadSessionService._response(upload_id, {k: str(v) for k, v in session.items()})
+
+    @staticmethod
+    async def get_session(cache: Redis, upload_id: str, user_id: int) -> Dict[str, str]:
+        session = await cache.hgetall(UploadSessionService._key(upload_id))
+        if not session or session["user_id"] != str(user_id):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return session
+
+    @staticmethod
+    async def get_status(cache: Redis, upload_id: str, user_id: int) -> Dict:
+        return UploadSessionService._response(upload_id, await UploadSessionService.get_session(cache, upload_id, user_id))
+
+    @staticmethod
+    async def write_chunk(
+        cache: Redis,
+        upload_id: str,
+        user_id: int,
+        offset: int,
+        checksum: str,
+        chunks: AsyncIterator[bytes]
+    ) -> Dict:
+        """
+        Append a chunk at offset, which must be the committed offset. The chunk only
+        counts when its SHA-256 matches checksum; otherwise it is cut off again.
+        """
+        session = await UploadSessionService.get_session(cache, upload_id, user_id)
+        token = await UploadSessionService._lock(cache, upload_id)
+
+        try:
+            # Re-read under the lock; another chunk may have been committed meanwhile
+            session = await UploadSessionService.get_session(cache, upload_id, user_id)
+            committed = int(session["offset"])
+            total_size = int(session["total_size"])
+            if offset != committed:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Chunk must start at offset {committed}",
+                    headers={"Upload-Offset": str(committed)}
+                )
+
+            digest = hashlib.sha256()
+            with open(session["path"], "r+b") as part:
+                # Drop whatever an interrupted earlier attempt left past the committed offset
+                part.truncate(committed)
+                part.seek(committed)
+
+                def write(chunk: bytes) -> None:
+                    digest.update(chunk)
+                    part.write(chunk)
+
+                written = 0
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    written += len(chunk)
+                    if committed + written > total_size:
+                        part.truncate(committed)
+                        raise HTTPException(status_code=413, detail="Chunk goes past the declared file size")
+                    await run_in_threadpool(write, chunk)
+
+                if digest.hexdigest() != checksum.lower():
+                    part.truncate(committed)
+                    raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+
+            session["offset"] = str(committed + written)
+            key = UploadSessionService._key(upload_id)
+            async with cache.pipeline(transaction=False) as pipe:
+                pipe.hset(key, "offset", session["offset"])
+                pipe.expire(key, UPLOAD_SESSION_TTL)
+                await pipe.execute()
+            return UploadSessionService._response(upload_id, session)
+        finally:
+            await UploadSessionService._unlock(cache, upload_id, token)
+
+    @staticmethod
+    async def complete(cache: Redis, upload_id: str, user_id: int) -> Tuple[int, str, StagedFile]:
+        """End the session: (lesson_id, file_type, staged file), the staged file now owned by the caller"""
+        session = await UploadSessionService.get_session(cache, upload_id, user_id)
+        if int(session["offset"]) != int(session["total_size"]):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload is incomplete: {session['offset']} of {session['total_size']} bytes",
+                headers={"Upload-Offset": session["offset"]}
+            )
+        token = await UploadSessionService._lock(cache, upload_id)
+
+        try:
+            sha256 = await run_in_threadpool(UploadSessionService._file_sha256, session["path"])
+            await cache.delete(UploadSessionService._key(upload_id))
+        finally:
+            await UploadSessionService._unlock(cache, upload_id, token)
+
+        if session["sha256"] and session["sha256"] != sha256:
+            remove_staged_file(session["path"])
+            raise HTTPException(status_code=400, detail="File checksum mismatch; start a new upload")
+        staged = StagedFile(session["path"], int(session["total_size"]), sha256, session["filename"])
+        return int(session["lesson_id"]), session["file_type"], staged
+
+    @staticmethod
+    async def abort(cache: Redis, upload_id: str, user_id: int) -> None:
+        session = await UploadSessionService.get_session(cache, upload_id, user_id)
+        await cache.delete(UploadSessionService._key(upload_id))
+        remove_staged_file(session["path"])
+
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        # Chunk hashes were checked on the way in; this covers the assembled file
+        digest = hashlib.sha256()
+        with open(path, "rb") as part:
+            for block in iter(lambda: part.read(HASH_READ_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
@@ -0,0 +1,244 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, literal_column, select, tuple_
+from redis.asyncio import Redis
+from aetherium.models.courses import Course, Category
+from aetherium.models.user import User
+from aetherium.schemas.user_course import CourseFilters, CourseResponse, InstructorResponse, CategoryResponse
+from aetherium.services.search import get_course_search
+from aetherium.services.search.postgres_backend import query_terms
+from aetherium.utils.pagination import Keyset, count_statement, resolve_count
+from typing import Dict, Optional
+import hashlib
+import json
+
+# Only the columns a catalog card renders
+COURSE_CARD_COLUMNS = (
+    Course.id,
+    Course.title,
+    Course.subtitle,
+    Course.description,
+    Course.price,
+    Course.discount_price,
+    Course.cover_image,
+    Course.level,
+    Course.language,
+    Course.duration,
+    Course.duration_unit,
+    Course.created_at,
+    Course.updated_at,
+)
+INSTRUCTOR_CARD_COLUMNS = (
+    User.id.label("instructor_id"),
+    User.firstname.label("instructor_firstname"),
+    User.lastname.label("instructor_lastname"),
+    User.profile_picture.label("instructor_profile_picture"),
+    User.title.label("instructor_title"),
+)
+CATEGORY_CARD_COLUMNS = (
+    Category.id.label("category_id"),
+    Category.name.label("category_name"),
+)
+
+
+# Amount a buyer pays, as in PurchaseService: discount_price or price or 0.
+# Constants are inlined so the expression in SELECT matches the one in GROUP BY.
+EFFECTIVE_PRICE = func.coalesce(
+    func.nullif(Course.discount_price, literal_column("0")),
+    func.nullif(Course.price, literal_column("0")),
+    literal_column("0")
+)
+# (key, label, upper bound exclusive); the last bucket is open-ended
+PRICE_BUCKETS = [
+    ("free", "Free", 0.01),
+    ("under_500", "Under ₹500", 500),
+    ("500_to_1999", "₹500 - ₹1,999", 2000),
+    ("2000_plus", "₹2,000 and above", None),
+]
+PRICE_BUCKET = case(
+    *[
+        (EFFECTIVE_PRICE < literal_column(str(bound)), literal_column(f"'{key}'"))
+        for key, _, bound in PRICE_BUCKETS if bound is not None
+    ],
+    else_=literal_column(f"'{PRICE_BUCKETS[-1][0]}'")
+)
+
+FACETS_CACHE_PREFIX = "catalog:facets:"
+FACETS_CACHE_TTL = 60
+
+
+class CatalogService:
+    """
+    Read model for the public course catalog.
+
+    A page is one statement: course, instructor and category columns come from
+    outer joins and the total from COUNT(*) OVER (), so the query count does not
+    depend on the page size. Pages past the end, cursor pages and estimated
+    totals use a second COUNT statement.
+    """
+
+    @staticmethod
+    def published_course_filter(filters: CourseFilters):
+        conditions = [Course.is_published.is_(True)]
+        if filters.category:
+            conditions.append(Course.category_id == filters.category)
+        if filters.level:
+            conditions.append(Course.level == filters.level)
+        if filters.language:
+            conditions.append(Course.language == filters.language)
+        if filters.price:
+            conditions.append(PRICE_BUCKET == filters.price)
+        return conditions
+
+    @staticmethod
+    async def search_filter(db: AsyncSession, filters: CourseFilters):
+        """(conditions, rank) for the search term; rank is None without a usable term"""
+        if filters.search:
+            match = await get_course_search().match(db, filters.search)
+            if match is not None:
+                search_condition, rank = match
+                return [search_condition], rank
+        return [], None
+
+    @staticmethod
+    async def get_page(db: AsyncSession, filters: CourseFilters) -> Dict:
+        search_conditions, rank = await CatalogService.search_filter(db, filters)
+        conditions = CatalogService.published_course_filter(filters) + search_conditions
+
+        # Best matches first when searching, newest first otherwise; id keeps ties stable across pages
+        if rank is not None:
+            keyset = Keyset(rank, Course.id)
+        else:
+            keyset = Keyset(Course.created_at, Course.id)
+
+        listing = (
+            select(
+                *COURSE_CARD_COLUMNS,
+                *INSTRUCTOR_CARD_COLUMNS,
+                *CATEGORY_CARD_COLUMNS,
+            )
+            .select_from(Course)
+            .outerjoin(User, User.id == Course.instructor_id)
+            .outerjoin(Category, Category.id == Course.category_id)
+            .where(*conditions)
+        )
+        page_query = keyset.paginate(
+            listing.add_columns(keyset.keys[0].label("sort_key"), func.count().over().label("total_items")),
+            filters.cursor, filters.page, filters.limit
+        )
+        rows = (await db.execute(page_query)).all()
+        rows, next_cursor = keyset.split(rows, filters.limit, lambda row: (row.sort_key, row.id))
+
+        # Plain page requests get the exact total from the window count; a cursor narrows the
+        # rows the window sees, so cursor pages (and estimates) count the listing separately
+        if rows and not filters.cursor and filters.count == "exact":
+            total_items, total_estimated = rows[0].total_items, False
+        else:
+            total_items, total_estimated = resolve_count(
+                (await db.execute(count_statement(listing, filters.count))).scalar(), filters.count
+            )
+
+        return {
+            "courses": [CatalogService.to_card(row) for row in rows],
+            "total_pages": (total_items + filters.limit - 1) // filters.limit,
+            "current_page": filters.page,
+            "total_items": total_items,
+            "total_estimated": total_estimated,
+            "next_cursor": next_cursor
+        }
+
+    @staticmethod
+    async def get_facets(db: AsyncSession, filters: CourseFilters, cache: Optional[Redis] = None) -> Dict:
+        """
+        Category/level/language/price counts of published courses matching the search.
+
+        The facet selections themselves are not applied, so every value keeps its
+        count while one is selected. One GROUPING SETS query, cached per search.
+        """
+        key = CatalogService.facets_cache_key(filters)
+        if cache is not None:
+            cached = await cache.get(key)
+            if cached:
+                return json.loads(cached)
+
+        search_conditions, _ = await CatalogService.search_filter(db, filters)
+        rows = (await db.execute(
+            select(
+                Course.category_id,
+                Category.name.label("category_name"),
+                Course.level,
+                Course.language,
+                PRICE_BUCKET.label("price_bucket"),
+                func.grouping(Course.category_id).label("by_category"),
+                func.grouping(Course.level).label("by_level"),
+                func.grouping(Course.language).label("by_language"),
+                func.count().label("count"),
+            )
+            .select_from(Course)
+            .outerjoin(Category, Category.id == Course.category_id)
+            .where(Course.is_published.is_(True), *search_conditions)
+            .group_by(func.grouping_sets(
+                tuple_(Course.category_id, Category.name),
+                Course.level,
+                Course.language,
+                PRICE_BUCKET,
+            ))
+        )).all()
+
+        price_labels = {bucket: label for bucket, label, _ in PRICE_BUCKETS}
+        facets = {"categories": [], "levels": [], "languages": [], "price_ranges": []}
+        for row in rows:
+            if row.by_category == 0:
+                if row.category_id is not None:
+                    facets["categories"].append({"value": str(row.category_id), "label": row.category_name, "count": row.count})
+            elif row.by_level == 0:
+                if row.level is not None:
+                    facets["levels"].append({"value": row.level.value, "label": row.level.value, "count": row.count})
+            elif row.by_language == 0:
+                if row.language:
+                    facets["languages"].append({"value": row.language, "label": row.language, "count": row.count})
+            else:
+                facets["price_ranges"].append({"value": row.price_bucket, "label": price_labels[row.price_bucket], "count": row.count})
+
+        for values in facets.values():
+            values.sort(key=lambda facet: (-facet["count"], facet["label"] or ""))
+        price_order = [bucket for bucket, _, _ in PRICE_BUCKETS]
+        facets["price_ranges"].sort(key=lambda facet: price_order.index(facet["value"]))
+
+        if cache is not None:
+            await cache.setex(key, FACETS_CACHE_TTL, json.dumps(facets))
+        return facets
+
+    @staticmethod
+    def facets_cache_key(filters: CourseFilters) -> str:
+        # Only the search narrows facet counts; normalize it the way the search backends tokenize
+        normalized = " ".join(query_terms(filters.search or ""))
+        return FACETS_CACHE_PREFIX + hashlib.sha1(normalized.encode()).hexdigest()
+
+    @staticmethod
+    def to_card(row) -> CourseResponse:
+        return CourseResponse(
+            id=row.id,
+            title=row.title,
+            subtitle=row.subtitle,
+            description=row.description,
+            price=row.price,
+            discount_price=row.discount_price,
+            cover_image=row.cover_image,
+            category=CategoryResponse(
+                id=row.category_id,
+                name=row.category_name
+            ) if row.category_id is not None else None,
+            instructor=InstructorResponse(
+                id=row.instructor_id,
+                firstname=row.instructor_firstname,
+                lastname=row.instructor_lastname,
+                profile_picture=row.instructor_profile_picture,
+                title=row.instructor_title,
+            ) if row.instructor_id is not None else None,
+            level=row.level,
+            language=row.language,
+            duration=row.duration,
+            duration_unit=row.duration_unit,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
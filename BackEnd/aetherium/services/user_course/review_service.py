@@ -4,6 +4,8 @@ from aetherium.schemas.user_course import CourseReviewCreate
 from fastapi import HTTPException
 from sqlalchemy import func
 from aetherium.core.logger import logger
+from aetherium.utils.pagination import Keyset, count_statement, resolve_count
+from typing import Optional
 class ReviewService:
     @staticmethod
     def create_course_review(db: Session, user_id: int, review_data: CourseReviewCreate):
@@ -39,17 +41,20 @@ class ReviewService:
         return review
     
     @staticmethod
-    def get_course_reviews(db: Session, course_id: int, page: int = 1, limit: int = 10):
-        offset = (page - 1) * limit
+    def get_course_reviews(db: Session, course_id: int, page: int = 1, limit: int = 10,
+                           cursor: Optional[str] = None, count: str = "exact"):
         logger.info(f"Getting reviews for course {course_id}, page {page}, limit {limit}")
         
-        reviews = db.query(CourseReview).options(
-            joinedload(CourseReview.user)
-        ).filter(
-            CourseReview.course_id == course_id
-        ).order_by(CourseReview.created_at.desc()).offset(offset).limit(limit).all()
+        keyset = Keyset(CourseReview.created_at, CourseReview.id)
+        listing = db.query(CourseReview).filter(CourseReview.course_id == course_id)
+        reviews = keyset.paginate(
+            listing.options(joinedload(CourseReview.user)), cursor, page, limit
+        ).all()
+        reviews, next_cursor = keyset.split(reviews, limit, lambda review: (review.created_at, review.id))
         
-        total_reviews = db.query(CourseReview).filter(CourseReview.course_id == course_id).count()
+        total_reviews, total_estimated = resolve_count(
+            db.execute(count_statement(listing.statement, count)).scalar(), count
+        )
         
         avg_rating = db.query(func.avg(CourseReview.rating)).filter(
             CourseReview.course_id == course_id
@@ -60,9 +65,11 @@ class ReviewService:
         return {
             "reviews": reviews,
             "total": total_reviews,
+            "total_estimated": total_estimated,
             "average_rating": round(float(avg_rating), 1),
             "page": page,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
     
     @staticmethod
@@ -1,3 +1,4 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_,func,desc
 from aetherium.models.courses import Course, VerificationStatus, Section,Category
@@ -12,10 +13,12 @@ from typing import Optional,Dict
 import uuid
 from datetime import datetime,timezone
 from aetherium.models.courses.lesson import Lesson
+from aetherium.services.user_course.catalog_service import CatalogService
+from aetherium.services.course_graph_cache import CourseGraph, FULL, PUBLIC, get_course_graph
 
 class UserCourseService:
     @staticmethod
-    def get_published_courses(db: Session, filters: CourseFilters) ->Dict:
+    async def get_published_courses(db: AsyncSession, filters: CourseFilters) ->Dict:
         # query = db.query(Course).options(
         #     joinedload(Course.instructor),
         #     joinedload(Course.category),
@@ -24,101 +27,25 @@ class UserCourseService:
         #     Course.is_published == True,
         #     Course.verification_status == VerificationStatus.VERIFIED
         # )
-        query = db.query(Course).filter(Course.is_published.is_(True))
-        if filters.search:
-            search_term = f"%{filters.search}%"
-            query = query.filter(
-                or_(
-                    Course.title.ilike(search_term),
-                    Course.description.ilike(search_term)
-                )
-            )
-        
-        if filters.category:
-            query = query.filter(Course.category_id == filters.category)
-        if filters.level:
-            query = query.filter(Course.level == filters.level)
-        if filters.language:
-            query = query.filter(Course.language == filters.language)
-        
-        # offset = (filters.page - 1) * filters.limit
-        # total_courses = query.count()
-        # courses = query.offset(offset).limit(filters.limit).all()
-        # Calculate total items and pages
-        total_items = query.count()
-        total_pages = (total_items + filters.limit - 1) // filters.limit
-
-        paginated_query = query.offset((filters.page - 1) * filters.limit).limit(filters.limit)
-
-        # NOW execute the query to get the actual courses
-        courses = paginated_query.all()
-        
-        course_responses = []
-      
-        for course in courses:
-            # Fetch instructor and category
-            instructor = db.query(User).filter(User.id == course.instructor_id).first()
-            category = db.query(Category).filter(Category.id == course.category_id).first()
-
-            course_response = CourseResponse(
-                id=course.id,
-                title=course.title,
-                subtitle=course.subtitle,
-                description=course.description,
-                price=course.price,
-                discount_price=course.discount_price,
-                cover_image=course.cover_image,
-                category=CategoryResponse(id=category.id, name=category.name) if category else None,
-                instructor=InstructorResponse(
-                    id=instructor.id,
-                    firstname=instructor.firstname,
-                    lastname=instructor.lastname,
-                    profile_picture=instructor.profile_picture,
-                    title=instructor.title,
-                    # bio=instructor.bio
-                ) if instructor else None,
-                level=course.level,
-                language=course.language,
-                duration=course.duration,
-                duration_unit=course.duration_unit,
-                # rating=course.rating,
-                # num_reviews=course.num_reviews,
-                # num_students=course.num_students,
-                created_at=course.created_at,
-                updated_at=course.updated_at,
-                # status=course.status
-            )
-            course_responses.append(course_response)
-
-        return {
-            "courses": course_responses,
-            "total_pages": total_pages,
-            "current_page": filters.page,
-            "total_items": total_items
-        }
+        # One statement for the page, its instructors/categories and the total (see CatalogService)
+        return await CatalogService.get_page(db, filters)
     
     @staticmethod
-    def get_course_details(db: Session, course_id: int, user_id: Optional[int] = None):
-        course = db.query(Course).options(
-            joinedload(Course.instructor),
-            joinedload(Course.category),
-            joinedload(Course.topic),
-            joinedload(Course.learning_objectives),
-            joinedload(Course.target_audiences),
-            joinedload(Course.requirements)
-        ).filter(
+    async def get_course_details(db: Session, course_id: int, user_id: Optional[int] = None) -> CourseGraph:
+        # Only the version is read per request; the graph itself comes from the course graph cache
+        content_version = db.query(Course.content_version).filter(
             Course.id == course_id,
             Course.is_published == True,
             Course.verification_status == VerificationStatus.VERIFIED
-        ).first()
+        ).scalar()
         
-        if not course:
+        if content_version is None:
             raise HTTPException(status_code=404, detail="Course not found")
         
         # Check purchase status
         is_purchased = False
         if user_id:
-            purchase = db.query(Purchase).filter(
+            purchase = db.query(Purchase.id).filter(
                 Purchase.user_id == user_id,
                 Purchase.course_id == course_id,
                 Purchase.status == PurchaseStatus.COMPLETED
@@ -126,14 +53,7 @@ class UserCourseService:
             is_purchased = purchase is not None
         
         # Only include sections and lessons if purchased
-        if is_purchased:
-            course.sections = db.query(Section).options(
-                joinedload(Section.lessons).joinedload(Lesson.lesson_content)
-            ).filter(Section.course_id == course_id).all()
-        else:
-            course.sections = []
-        
-        return course
+        return await get_course_graph(db, course_id, content_version, FULL if is_purchased else PUBLIC)
     
     
     @staticmethod
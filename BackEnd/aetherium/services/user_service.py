@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from aetherium.models.user import User
 from aetherium.schemas.user import UserResponse
 from fastapi import HTTPException,status
+from aetherium.utils.jwt_utils import invalidate_user_cache
 
 def get_all_users(db:Session)->list[UserResponse]:
     users=db.query(User).all()
@@ -14,6 +15,7 @@ def block_user(db: Session, user_id: int, block: bool) -> User:
     user.is_active = not block  # If block=True, set is_active=False, and vice versa
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id)
     return user
 
 class UserService:
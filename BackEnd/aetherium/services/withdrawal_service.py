@@ -4,6 +4,7 @@ from aetherium.models.withdrawal import WithdrawalRequest, BankDetails, Withdraw
 from aetherium.models.user import User, Wallet
 from aetherium.services.wallet_service import wallet_service
 from aetherium.services.notification_service import create_notification
+from aetherium.utils.pagination import Keyset, count_statement, resolve_count
 from fastapi import HTTPException
 from datetime import datetime, timezone
 from typing import List, Optional
@@ -73,26 +74,35 @@ class WithdrawalService:
             "limit": limit
         }
     
-    def get_all_withdrawal_requests(self, db: Session, page: int = 1, limit: int = 10) -> dict:
+    def get_all_withdrawal_requests(self, db: Session, page: int = 1, limit: int = 10,
+                                    status: Optional[WithdrawalStatus] = None,
+                                    cursor: Optional[str] = None, count: str = "exact") -> dict:
         """Get all withdrawal requests for admin"""
-        offset = (page - 1) * limit
+        keyset = Keyset(WithdrawalRequest.requested_at, WithdrawalRequest.id)
+        listing = db.query(WithdrawalRequest).join(User, WithdrawalRequest.instructor_id == User.id)
+        if status:
+            listing = listing.filter(WithdrawalRequest.status == status)
         
-        requests = db.query(WithdrawalRequest).join(User, WithdrawalRequest.instructor_id == User.id).order_by(
-            desc(WithdrawalRequest.requested_at)
-        ).offset(offset).limit(limit).all()
+        requests = keyset.paginate(listing, cursor, page, limit).all()
+        requests, next_cursor = keyset.split(requests, limit, lambda request: (request.requested_at, request.id))
         
         # Add instructor balance information to each request
         for request in requests:
             wallet = wallet_service.get_or_create_wallet(db, request.instructor_id)
             request.instructor_balance = wallet.balance
         
-        total = db.query(WithdrawalRequest).count()
+        # The planner's row count only describes the whole table
+        total, total_estimated = resolve_count(db.execute(count_statement(
+            listing.statement, count, table=None if status else WithdrawalRequest.__tablename__
+        )).scalar(), count)
         
         return {
             "requests": requests,
             "total": total,
+            "total_estimated": total_estimated,
             "page": page,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
     
     async def update_withdrawal_request(self, db: Session, request_id: int, status: WithdrawalStatus, 
@@ -1,71 +1,459 @@
-from fastapi import WebSocket, APIRouter,Depends
+from fastapi import WebSocket, APIRouter,Depends, Query, status
+from datetime import datetime, date, timezone
+from collections import deque
+from typing import Optional, Dict, Set
+from redis.asyncio import Redis
 import json
+import time
+import uuid
 import asyncio
 from aetherium.core.logger import logger
 
+# Per-user pub/sub channel; every worker holding a socket for the user subscribes to it
+USER_CHANNEL_PREFIX = "ws:user:"
+# Per-worker channel, keeps the pub/sub connection open while no user is connected
+WORKER_CHANNEL_PREFIX = "ws:worker:"
+
+# Outbound events buffered per socket before transient events are shed
+OUTBOUND_QUEUE_SIZE = 256
+# A single send_text slower than this marks the client as stalled
+SEND_TIMEOUT = 10.0
+HEARTBEAT_INTERVAL = 25.0
+# No successful send or receive for this long closes the socket
+HEARTBEAT_TIMEOUT = 75.0
+# Clients already ignore "pong" frames, so they double as server heartbeats
+HEARTBEAT_EVENT = {"type": "pong", "heartbeat": True}
+
+# Per-user replay log of durable events (chat messages, notifications)
+REPLAY_STREAM_PREFIX = "ws:replay:"
+REPLAY_MAXLEN = 500
+REPLAY_TTL = 24 * 60 * 60
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def user_channel(user_id: int) -> str:
+    return f"{USER_CHANNEL_PREFIX}{user_id}"
+
+
+def replay_stream(user_id: int) -> str:
+    return f"{REPLAY_STREAM_PREFIX}{user_id}"
+
+
+def _stream_id(event_id: str) -> tuple:
+    """Redis stream ids ("<ms>-<seq>") as comparable tuples"""
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class ClientConnection:
+    """
+    One WebSocket plus its bounded outbound queue, drained by a dedicated
+    writer task so a slow client never blocks the code that sends to it.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: int, max_queue: int = OUTBOUND_QUEUE_SIZE):
+        self.id = uuid.uuid4().hex[:12]
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.connected_at = datetime.now(timezone.utc)
+        self.last_activity = time.monotonic()
+        self.closed = False
+        self.overflowed = False
+        self.writer_task: Optional[asyncio.Task] = None
+        self._queue: deque = deque()  # slots: [text, coalesce_key, droppable]
+        self._pending: Dict[str, list] = {}  # coalesce key -> queued slot
+        self._ready = asyncio.Event()
+        # Live events held back while the replay log is being sent
+        self._replaying = False
+        self._held: list = []
+        # metrics
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None, droppable: bool = False, event_id: Optional[str] = None) -> bool:
+        """
+        Queue an event without blocking. Events sharing a coalesce key replace
+        the queued one instead of adding another. Returns False if dropped.
+        """
+        if self.closed or self.overflowed:
+            return False
+        if self._replaying:
+            self._held.append((text, coalesce_key, droppable, event_id))
+            return True
+        if coalesce_key is not None and coalesce_key in self._pending:
+            self._pending[coalesce_key][0] = text
+            self.coalesced += 1
+            return True
+        if len(self._queue) >= self.max_queue:
+            if droppable or not self._evict_droppable():
+                self.dropped += 1
+                if not droppable:
+                    # Client can't keep up even with transient events shed
+                    self.overflowed = True
+                return False
+        slot = [text, coalesce_key, droppable]
+        self._queue.append(slot)
+        if coalesce_key is not None:
+            self._pending[coalesce_key] = slot
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+        return True
+
+    def begin_replay(self):
+        self._replaying = True
+
+    def finish_replay(self, replayed: list):
+        """
+        Queue replayed (event_id, text) pairs ahead of the live events that
+        arrived meanwhile, skipping live events the replay already covered.
+        """
+        replayed_ids = set()
+        for event_id, text in replayed:
+            replayed_ids.add(event_id)
+            # Replay is bounded by REPLAY_MAXLEN, so it may exceed the live queue size
+            self._queue.append([text, None, False])
+        self.max_depth = max(self.max_depth, len(self._queue))
+        if self._queue:
+            self._ready.set()
+        held, self._held = self._held, []
+        self._replaying = False
+        for text, coalesce_key, droppable, event_id in held:
+            if event_id is None or event_id not in replayed_ids:
+                self.enqueue(text, coalesce_key, droppable, event_id)
+
+    def _evict_droppable(self) -> bool:
+        for slot in self._queue:
+            if slot[2]:
+                self._queue.remove(slot)
+                if slot[1] is not None:
+                    self._pending.pop(slot[1], None)
+                self.dropped += 1
+                return True
+        return False
+
+    async def run_writer(self, on_failure):
+        """Drain the queue onto the socket; calls on_failure(self) if the client stalls or errors"""
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                text, coalesce_key, _ = self._queue.popleft()
+                if coalesce_key is not None:
+                    self._pending.pop(coalesce_key, None)
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=SEND_TIMEOUT)
+                self.sent += 1
+                self.touch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"WebSocket writer for user {self.user_id} ({self.id}) failed: {e!r}")
+            asyncio.create_task(on_failure(self))
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer_task and self.writer_task is not asyncio.current_task():
+            self.writer_task.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def metrics(self) -> dict:
+        return {
+            "connection_id": self.id,
+            "user_id": self.user_id,
+            "connected_at": self.connected_at.isoformat(),
+            "idle_seconds": round(time.monotonic() - self.last_activity, 1),
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "queue_capacity": self.max_queue,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
 class NotificationManager:
+    """
+    Tracks WebSocket connections of this worker and fans events out across
+    workers through Redis pub/sub.
+
+    A user may hold several sockets (tabs, chat + notification contexts).
+    Chat messages and notifications are also appended to a per-user Redis
+    stream, so a client reconnecting with its last seen event id gets what
+    it missed before live delivery resumes.
+    A send is queued straight onto every local socket of the user (no broker
+    round trip) and is also published on the user's channel, so sockets held
+    by other workers receive it too. Each worker ignores the events it
+    published itself.
+    """
+
     def __init__(self):
-        self.active_connections: dict = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: int):
+        self.active_connections: Dict[int, Set[ClientConnection]] = {}
+        self.worker_id = uuid.uuid4().hex
+        self.redis: Optional[Redis] = None
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def start(self, redis: Redis):
+        """Attach the shared Redis client and start listening for remote deliveries"""
+        self.redis = redis
+        self._pubsub = redis.pubsub()
+        await self._pubsub.subscribe(f"{WORKER_CHANNEL_PREFIX}{self.worker_id}")
+        # Re-subscribe users that connected before the broker was attached
+        for user_id in list(self.active_connections):
+            await self._pubsub.subscribe(user_channel(user_id))
+        self._listener_task = asyncio.create_task(self._listen())
+        self._ensure_heartbeat()
+        logger.info(f"NotificationManager worker {self.worker_id} subscribed to Redis")
+
+    async def stop(self):
+        for task in (self._listener_task, self._heartbeat_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener_task = None
+        self._heartbeat_task = None
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                await connection.close(code=status.WS_1001_GOING_AWAY)
+        self.active_connections.clear()
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self.redis = None
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def connect(self, websocket: WebSocket, user_id: int, last_event_id: Optional[str] = None) -> ClientConnection:
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        logger.info(f"User {user_id} connected to WebSocket.")
-    
-    async def disconnect(self, user_id: int):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-            logger.info(f"User {user_id} disconnected from WebSocket.")
-    
-    async def send_notification(self, user_id: int, notification: dict):
-        if user_id in self.active_connections:
+        connection = ClientConnection(websocket, user_id)
+        replay = bool(last_event_id) and self.redis is not None
+        if replay:
+            # Hold live events until everything after last_event_id is queued
+            connection.begin_replay()
+        connection.writer_task = asyncio.create_task(connection.run_writer(self.disconnect))
+        first = user_id not in self.active_connections
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        if first and self._pubsub:
             try:
-                websocket = self.active_connections[user_id]
-                await websocket.send_text(json.dumps(notification))
-                logger.info(f"Notification sent to user {user_id}")
+                await self._pubsub.subscribe(user_channel(user_id))
             except Exception as e:
-                logger.error(f"Failed to send notification to user {user_id}: {e}")
-                # Remove the connection if it's broken
-                await self.disconnect(user_id)
-        else:
-            logger.warning(f"User {user_id} is not connected. Notification skipped.")
-    
-    async def send_chat_message(self, user_id: int, message: dict):
-        """Send chat message to specific user"""
+                logger.error(f"Failed to subscribe user {user_id} channel: {e}")
+        self._ensure_heartbeat()
+        logger.info(f"User {user_id} connected to WebSocket ({connection.id}).")
+        if replay:
+            await self._replay(connection, last_event_id)
+        return connection
+
+    async def _replay(self, connection: ClientConnection, last_event_id: str):
+        """Send the user's logged events newer than last_event_id, then go live"""
+        replayed = []
+        complete = False
+        try:
+            _stream_id(last_event_id)
+            key = replay_stream(connection.user_id)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xrange(key, min="-", max="+", count=1)
+                pipe.xrange(key, min=f"({last_event_id}", max="+", count=REPLAY_MAXLEN)
+                oldest, entries = await pipe.execute()
+            # Nothing was trimmed past the client's cursor if the log still reaches back to it
+            complete = bool(oldest) and _stream_id(oldest[0][0]) <= _stream_id(last_event_id)
+            for event_id, fields in entries:
+                event = json.loads(fields["event"])
+                event["event_id"] = event_id
+                replayed.append((event_id, json.dumps(event)))
+        except ValueError:
+            logger.warning(f"Invalid last_event_id {last_event_id!r} for user {connection.user_id}")
+        except Exception as e:
+            logger.error(f"Replay failed for user {connection.user_id}: {e}")
+        finally:
+            replayed.append((None, json.dumps({
+                "type": "replay_complete",
+                "replayed": len(replayed),
+                # False means events may be missing: the client should refetch over REST
+                "complete": complete
+            })))
+            connection.finish_replay(replayed)
+        logger.info(f"Replayed {len(replayed) - 1} events to user {connection.user_id} ({connection.id})")
+
+    async def _append_replay(self, user_id: int, event: dict) -> Optional[str]:
+        """Log a durable event for reconnecting clients; returns its event id"""
+        if self.redis is None:
+            return None
+        key = replay_stream(user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xadd(key, {"event": json.dumps(event, default=_json_default)}, maxlen=REPLAY_MAXLEN, approximate=True)
+                pipe.expire(key, REPLAY_TTL)
+                event_id, _ = await pipe.execute()
+            return event_id
+        except Exception as e:
+            logger.error(f"Failed to log event for user {user_id}: {e}")
+            return None
+
+    async def disconnect(self, connection: ClientConnection, code: int = status.WS_1000_NORMAL_CLOSURE):
+        await connection.close(code=code)
+        connections = self.active_connections.get(connection.user_id)
+        if not connections or connection not in connections:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.active_connections[connection.user_id]
+            if self._pubsub:
+                try:
+                    await self._pubsub.unsubscribe(user_channel(connection.user_id))
+                except Exception as e:
+                    logger.error(f"Failed to unsubscribe user {connection.user_id} channel: {e}")
+        logger.info(f"User {connection.user_id} disconnected from WebSocket ({connection.id}).")
+
+    def _deliver_local(self, user_id: int, text: str, coalesce_key: Optional[str] = None, droppable: bool = False, event_id: Optional[str] = None) -> bool:
+        """Queue onto every local socket of the user; False if none accepted it"""
+        delivered = False
+        for connection in list(self.active_connections.get(user_id, ())):
+            already_overflowed = connection.overflowed
+            if connection.enqueue(text, coalesce_key, droppable, event_id):
+                delivered = True
+            elif connection.overflowed and not already_overflowed:
+                logger.warning(f"Outbound queue overflow for user {user_id} ({connection.id}), closing")
+                asyncio.create_task(self.disconnect(connection, code=status.WS_1013_TRY_AGAIN_LATER))
+        return delivered
+
+    async def _publish(self, user_id: int, text: str, coalesce_key: Optional[str] = None, droppable: bool = False, event_id: Optional[str] = None) -> int:
+        """Publish to the user's channel; returns the number of subscribed workers"""
+        if self.redis is None:
+            return 0
+        envelope = json.dumps({
+            "origin": self.worker_id,
+            "payload": text,
+            "coalesce_key": coalesce_key,
+            "droppable": droppable,
+            "event_id": event_id
+        })
+        try:
+            return await self.redis.publish(user_channel(user_id), envelope)
+        except Exception as e:
+            logger.error(f"Failed to publish to user {user_id}: {e}")
+            return 0
+
+    async def _dispatch(self, user_id: int, event: dict, label: str, coalesce_key: Optional[str] = None, droppable: bool = False):
         user_id = int(user_id)
-        if user_id in self.active_connections:
+        event_id = None
+        if not droppable:
+            # Durable events are logged first so a reconnecting client can replay them
+            event_id = await self._append_replay(user_id, event)
+            if event_id:
+                event = {**event, "event_id": event_id}
+        text = json.dumps(event, default=_json_default)
+        delivered = self._deliver_local(user_id, text, coalesce_key, droppable, event_id)
+        receivers = await self._publish(user_id, text, coalesce_key, droppable, event_id)
+        # Our own subscription counts as a receiver while the user is connected here
+        remote = receivers - (1 if user_id in self.active_connections else 0)
+        if delivered or remote > 0:
+            logger.info(f"{label} queued for user {user_id}")
+        elif event_id:
+            logger.info(f"User {user_id} is not connected. {label} kept for replay ({event_id}).")
+        else:
+            logger.warning(f"User {user_id} is not connected. {label} skipped.")
+
+    async def _listen(self):
+        """Deliver events published by other workers to sockets held by this worker"""
+        while True:
             try:
-                logger.info(f"user sending message {user_id}")
-                websocket = self.active_connections[user_id]
-                chat_data = {
-                    "type": "chat_message",
-                    "data": message
-                }
-                await websocket.send_text(json.dumps(chat_data))
-                logger.info(f"Chat message sent to user {user_id}")
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message or message.get("type") != "message":
+                    continue
+                channel = message["channel"]
+                if not channel.startswith(USER_CHANNEL_PREFIX):
+                    continue
+                envelope = json.loads(message["data"])
+                if envelope.get("origin") == self.worker_id:
+                    continue
+                self._deliver_local(
+                    int(channel[len(USER_CHANNEL_PREFIX):]),
+                    envelope["payload"],
+                    envelope.get("coalesce_key"),
+                    envelope.get("droppable", False),
+                    envelope.get("event_id")
+                )
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Failed to send chat message to user {user_id}: {e}")
-                await self.disconnect(user_id)
-        else:
-            logger.warning(f"User {user_id} is not connected. Chat message skipped.")
+                logger.error(f"WebSocket pub/sub listener error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _heartbeat(self):
+        """Close sockets that stopped making progress; keep healthy ones warm"""
+        heartbeat = json.dumps(HEARTBEAT_EVENT)
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            for connections in list(self.active_connections.values()):
+                for connection in list(connections):
+                    if now - connection.last_activity > HEARTBEAT_TIMEOUT:
+                        logger.warning(f"WebSocket heartbeat timeout for user {connection.user_id} ({connection.id})")
+                        await self.disconnect(connection, code=status.WS_1001_GOING_AWAY)
+                    else:
+                        connection.enqueue(heartbeat, coalesce_key="heartbeat", droppable=True)
+
+    def metrics(self) -> dict:
+        """Per-connection queue depth and delivery counters for this worker"""
+        connections = [
+            connection.metrics()
+            for user_connections in self.active_connections.values()
+            for connection in user_connections
+        ]
+        return {
+            "worker_id": self.worker_id,
+            "users": len(self.active_connections),
+            "connections": connections,
+            "total_queue_depth": sum(c["queue_depth"] for c in connections),
+        }
+
+    async def send_notification(self, user_id: int, notification: dict):
+        await self._dispatch(user_id, notification, "Notification")
+
+    async def send_chat_message(self, user_id: int, message: dict):
+        """Send chat message to specific user"""
+        chat_data = {
+            "type": "chat_message",
+            "data": message
+        }
+        await self._dispatch(user_id, chat_data, "Chat message")
 
     async def send_typing_indicator(self, user_id: int, typing_data: dict):
         """Send typing indicator to specific user"""
-        user_id = int(user_id)
-        if user_id in self.active_connections:
-            try:
-                websocket = self.active_connections[user_id]
-                typing_message = {
-                    "type": typing_data.get("action", "typing_start"),  # typing_start or typing_stop
-                    "data": typing_data
-                }
-                await websocket.send_text(json.dumps(typing_message))
-                logger.info(f"Typing indicator sent to user {user_id}: {typing_data.get('action')}")
-            except Exception as e:
-                logger.error(f"Failed to send typing indicator to user {user_id}: {e}")
-                await self.disconnect(user_id)
-        else:
-            logger.warning(f"User {user_id} is not connected. Typing indicator skipped.")
+        typing_message = {
+            "type": typing_data.get("action", "typing_start"),  # typing_start or typing_stop
+            "data": typing_data
+        }
+        # Only the latest typing state per sender/conversation matters; shed it first under pressure
+        coalesce_key = f"typing:{typing_data.get('sender_id')}:{typing_data.get('conversation_id')}"
+        await self._dispatch(user_id, typing_message, "Typing indicator", coalesce_key=coalesce_key, droppable=True)
 
 # Global manager instance - this is what other modules import
 manager = NotificationManager()
@@ -77,19 +465,20 @@ def get_notification_manager()->NotificationManager:
 router = APIRouter()
 
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int):
-    # Use the global manager instance directly
-    await manager.connect(websocket, user_id)
+async def websocket_endpoint(websocket: WebSocket, user_id: int, last_event_id: Optional[str] = Query(None)):
+    # Use the global manager instance directly; last_event_id resumes from the replay log
+    connection = await manager.connect(websocket, user_id, last_event_id)
     try:
         while True:
             data = await websocket.receive_text()
+            connection.touch()
             try:
                 message = json.loads(data)
                 if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({"type": "pong"}))
+                    connection.enqueue(json.dumps({"type": "pong"}), coalesce_key="pong", droppable=True)
             except json.JSONDecodeError:
-                pass 
+                pass
     except Exception as e:
         logger.error(f"WebSocket error for user {user_id}: {e}")
     finally:
-        await manager.disconnect(user_id)
\ No newline at end of file
+        await manager.disconnect(connection)
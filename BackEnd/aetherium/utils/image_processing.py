@@ -0,0 +1,154 @@
+# utils/image_processing.py
+"""
+Pillow work for uploaded images. Runs in the image process pool
+(services.image_pipeline), so it imports nothing from the app.
+"""
+from PIL import Image, ImageOps, UnidentifiedImageError
+from typing import Dict, Sequence
+import io
+import math
+import numpy as np
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+# Blurhash is computed on a thumbnail this large; more pixels do not change it visibly
+BLURHASH_SAMPLE_EDGE = 32
+BLURHASH_COMPONENTS = (4, 3)
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+class ImageRejected(ValueError):
+    """The upload is not an image we accept (format, size in pixels, corrupt data)"""
+
+
+def render_image(
+    data: bytes,
+    max_edge: int,
+    sizes: Sequence[int],
+    square: bool,
+    main_format: str,
+    max_pixels: int
+) -> Dict:
+    """
+    Decode an uploaded image and re-encode it without metadata: the main image
+    (longest edge at most max_edge, in main_format) and a WebP derivative per size
+    (a centred square for square=True, otherwise fitted in size x size), plus its
+    blurhash. Re-encoding drops EXIF (camera, GPS) after applying its orientation.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, OSError):
+        raise ImageRejected("Not a valid image")
+    if image.format not in ALLOWED_FORMATS:
+        raise ImageRejected(f"Unsupported image format {image.format}")
+    # Checked before decoding, so a small file cannot expand into gigabytes of pixels
+    if image.width * image.height > max_pixels:
+        raise ImageRejected(f"Image is too large ({image.width}x{image.height} pixels)")
+
+    try:
+        # JPEG: let the decoder downscale by up to 8x while decoding
+        image.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        image = _normalize_mode(image)
+    except (OSError, SyntaxError, ValueError) as e:
+        raise ImageRejected(f"Could not decode image: {e}")
+
+    icc_profile = image.info.get("icc_profile")
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    variants = {}
+    for size in sizes:
+        if square:
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[size] = _encode(variant, "webp", icc_profile)
+
+    return {
+        "main": _encode(image, main_format, icc_profile),
+        "main_format": main_format,
+        "width": image.width,
+        "height": image.height,
+        "variants": variants,
+        "blurhash": blurhash(image),
+    }
+
+
+def _normalize_mode(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGB", "RGBA"):
+        return image
+    if image.mode in ("LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image, image_format: str, icc_profile=None) -> bytes:
+    buffer = io.BytesIO()
+    options = {"icc_profile": icc_profile} if icc_profile else {}
+    if image_format == "jpeg":
+        if image.mode == "RGBA":
+            # JPEG has no alpha; transparent areas become white
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True, **options)
+    else:
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4, **options)
+    return buffer.getvalue()
+
+
+def _srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def blurhash(image: Image.Image, components=BLURHASH_COMPONENTS) -> str:
+    """Blurhash (https://blurha.sh) of the image, for a placeholder while it loads"""
+    x_components, y_components = components
+    sample = image.convert("RGB")
+    sample.thumbnail((BLURHASH_SAMPLE_EDGE, BLURHASH_SAMPLE_EDGE), Image.Resampling.BILINEAR)
+    pixels = _srgb_to_linear(np.asarray(sample, dtype=np.float64))
+    height, width = pixels.shape[:2]
+
+    xs = np.arange(width)
+    ys = np.arange(height)
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            basis = np.outer(np.cos(math.pi * j * ys / height), np.cos(math.pi * i * xs / width))
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((pixels * basis[:, :, None]).sum(axis=(0, 1)) * scale)
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_max = max(float(np.abs(component).max()) for component in ac)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1.0
+        result += _base83(0, 1)
+
+    r, g, b = (_linear_to_srgb(float(value)) for value in dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+    for component in ac:
+        quantised = [
+            max(0, min(18, int(math.floor(math.copysign(abs(value / maximum) ** 0.5, value) * 9 + 9.5))))
+            for value in component
+        ]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
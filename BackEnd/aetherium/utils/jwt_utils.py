@@ -5,18 +5,24 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional
 from aetherium.config import settings
-from fastapi import Cookie
+from fastapi import Cookie, Request
+from pydantic import ValidationError
+import hashlib
+import json
 import logging
-from sqlalchemy.orm import Session
-from aetherium.database.db import get_db
-from aetherium.models.user import User
-import redis
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from aetherium.database.db import get_async_db
+from aetherium.models.user import User, Role
+from aetherium.schemas.user import AuthenticatedUser, RoleResponse
+from aetherium.utils.token_blacklist import BLACKLIST_CHANNEL, BLACKLIST_INDEX_KEY, BLACKLIST_KEY_PREFIX, get_blacklist_filter, token_digest
+from redis.asyncio import Redis as AsyncRedis
+from aetherium.core.redis_client import get_sync_redis
 
 
 logger = logging.getLogger(__name__)
 
-redis_client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB, decode_responses=True)
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
@@ -38,16 +44,117 @@ def create_refresh_token(data: Dict[str, str]) -> str:
     logger.debug(f"Created JWT: {encoded_jwt[:30]}...")
     return encoded_jwt
 
+def blacklist_key(token: str) -> str:
+    return f"{BLACKLIST_KEY_PREFIX}{token}"
+
 def blacklist_token(token: str,user_id:int)->None:
     ttl=settings.ACCESS_TOKEN_EXPIRE_MIN * 60
-    redis_client.setex(f"black:{token}",ttl,str(user_id))
+    digest = token_digest(token)
+    pipe = get_sync_redis().pipeline()
+    pipe.setex(blacklist_key(token),ttl,str(user_id))
+    # Index before publish, so a filter rebuilt in between still sees the token
+    pipe.zadd(BLACKLIST_INDEX_KEY, {digest: time.time() + ttl})
+    pipe.publish(BLACKLIST_CHANNEL, digest)
+    pipe.execute()
+    get_blacklist_filter().add(digest)
+    # A blacklisted token must not keep authenticating from the principal cache
+    invalidate_token_cache(token)
+
+async def blacklist_token_async(cache: AsyncRedis, token: str, user_id: int) -> None:
+    """blacklist_token with the shared async client (app.state.redis), for async routes"""
+    ttl = settings.ACCESS_TOKEN_EXPIRE_MIN * 60
+    digest = token_digest(token)
+    async with cache.pipeline(transaction=False) as pipe:
+        pipe.setex(blacklist_key(token), ttl, str(user_id))
+        pipe.zadd(BLACKLIST_INDEX_KEY, {digest: time.time() + ttl})
+        pipe.publish(BLACKLIST_CHANNEL, digest)
+        await pipe.execute()
+    get_blacklist_filter().add(digest)
+    await invalidate_token_cache_async(cache, token)
 
 def is_token_blacklisted(token: str)->bool:
-    return redis_client.get(f"black:{token}") is not None
+    return get_sync_redis().get(blacklist_key(token)) is not None
+
+
+# Authenticated-user cache: decoded claims + AuthenticatedUser projection per token,
+# with a per-user index so profile/role/password/block changes drop every token entry.
+AUTH_TOKEN_PREFIX = "auth:token:"
+AUTH_USER_PREFIX = "auth:user:"
+
+def auth_token_key(token: str) -> str:
+    return AUTH_TOKEN_PREFIX + hashlib.sha256(token.encode()).hexdigest()
+
+def auth_user_key(user_id: int) -> str:
+    return f"{AUTH_USER_PREFIX}{user_id}:tokens"
+
+def invalidate_token_cache(token: str) -> None:
+    get_sync_redis().delete(auth_token_key(token))
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Drop every cached principal of a user (call after changing anything in AuthenticatedUser)"""
+    user_key = auth_user_key(user_id)
+    cache = get_sync_redis()
+    token_keys = cache.smembers(user_key)
+    cache.delete(user_key, *token_keys)
+
+async def invalidate_token_cache_async(cache: AsyncRedis, token: str) -> None:
+    await cache.delete(auth_token_key(token))
+
+async def invalidate_user_cache_async(cache: AsyncRedis, user_id: int) -> None:
+    """invalidate_user_cache with the shared async client, for async routes"""
+    user_key = auth_user_key(user_id)
+    token_keys = await cache.smembers(user_key)
+    await cache.delete(user_key, *token_keys)
+
+def _load_cached_principal(raw: Optional[str]) -> Optional[AuthenticatedUser]:
+    if raw is None:
+        return None
+    try:
+        entry = json.loads(raw)
+        if entry["claims"]["exp"] <= datetime.now(timezone.utc).timestamp():
+            return None
+        return AuthenticatedUser.model_validate(entry["user"])
+    except (ValueError, KeyError, TypeError, ValidationError):
+        logger.warning("Ignoring malformed auth cache entry")
+        return None
 
+async def _cache_principal(cache: AsyncRedis, token: str, claims: dict, user: AuthenticatedUser) -> None:
+    ttl = min(settings.AUTH_USER_CACHE_TTL, int(claims["exp"] - datetime.now(timezone.utc).timestamp()))
+    if ttl <= 0:
+        return
+    token_key = auth_token_key(token)
+    user_key = auth_user_key(user.id)
+    entry = json.dumps({"claims": claims, "user": user.model_dump()})
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.setex(token_key, ttl, entry)
+        pipe.sadd(user_key, token_key)
+        # Members never outlive AUTH_USER_CACHE_TTL, so neither does the index
+        pipe.expire(user_key, settings.AUTH_USER_CACHE_TTL)
+        await pipe.execute()
+
+async def _load_principal(db: AsyncSession, email: str) -> Optional[AuthenticatedUser]:
+    result = await db.execute(
+        select(
+            User.id, User.email, User.firstname, User.lastname,
+            User.profile_picture, User.is_active,
+            Role.id.label("role_id"), Role.name.label("role_name")
+        ).join(Role, Role.id == User.role_id).where(User.email == email)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return AuthenticatedUser(
+        id=row.id,
+        email=row.email,
+        firstname=row.firstname,
+        lastname=row.lastname,
+        profile_picture=row.profile_picture,
+        is_active=row.is_active,
+        role=RoleResponse(id=row.role_id, name=row.role_name)
+    )
 
 
-async def get_current_user(access_token: Optional[str] = Cookie(None),db: Session = Depends(get_db)) -> User:
+async def get_current_user(request: Request, access_token: Optional[str] = Cookie(None),db: AsyncSession = Depends(get_async_db)) -> AuthenticatedUser:
     if access_token is None:
         logger.debug("No access_token cookie found")
         return None
@@ -55,14 +162,26 @@ async def get_current_user(access_token: Optional[str] = Cookie(None),db: Sessio
         #     status_code=status.HTTP_401_UNAUTHORIZED,
         #     detail="Not authenticated"
         # )
-    if is_token_blacklisted(access_token):
+    cache: AsyncRedis = request.app.state.redis
+    bloom = get_blacklist_filter()
+    if bloom.might_contain(access_token):
+        # Blacklist flag and cached principal in a single round trip
+        blacklisted, cached = await cache.mget(blacklist_key(access_token), auth_token_key(access_token))
+        bloom.record_lookup(blacklisted is not None)
+    else:
+        blacklisted, cached = None, await cache.get(auth_token_key(access_token))
+    if blacklisted is not None:
         logger.debug("Token is blacklisted")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is blacklisted",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        
+
+    user = _load_cached_principal(cached)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -75,15 +194,14 @@ async def get_current_user(access_token: Optional[str] = Cookie(None),db: Sessio
             logger.error("Invalid payload: missing email")
             raise credentials_exception
 
-        user = db.query(User).filter(User.email == email).first()
+        user = await _load_principal(db, email)
         if user is None:
             logger.error("User not found for email from token")
             raise credentials_exception
 
+        await _cache_principal(cache, access_token, payload, user)
         logger.debug(f"Authenticated user: {user.email} (role={user.role.name})")
         return user
     except JWTError as e:
         logger.error(f"JWT decode error: {str(e)}")
         raise credentials_exception
-
-
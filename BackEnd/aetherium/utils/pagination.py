@@ -0,0 +1,109 @@
+# Backend/aetherium/utils/pagination.py
+from sqlalchemy import func, literal, select, text, tuple_
+from sqlalchemy.types import NullType
+from fastapi import HTTPException
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+# "exact" runs COUNT(*) over the whole listing; "estimate" stops counting at COUNT_ESTIMATE_CAP
+# (or reads pg_class.reltuples for unfiltered tables)
+COUNT_MODE_PATTERN = "^(exact|estimate)$"
+COUNT_ESTIMATE_CAP = 1000
+
+
+def encode_cursor(values: List[Any]) -> str:
+    payload = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value for value in payload]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class Keyset:
+    """
+    Sort keys of a cursor-paginated listing, most significant first; the last
+    key must be unique (normally the primary key). All keys sort the same way,
+    so "after the cursor" is one row-value comparison an index on the keys can
+    serve. Keys are assumed non-null.
+
+        Keyset(Purchase.purchased_at, Purchase.id)
+    """
+
+    def __init__(self, *keys, descending: bool = True):
+        self.keys = keys
+        self.descending = descending
+
+    def order_by(self) -> list:
+        return [key.desc() if self.descending else key.asc() for key in self.keys]
+
+    def after(self, cursor: str):
+        values = decode_cursor(cursor, len(self.keys))
+        # Bind with the key's type so e.g. timestamptz keys are not sent as naive timestamps
+        bound = tuple_(*[
+            literal(value, type_=None if isinstance(key.type, NullType) else key.type)
+            for key, value in zip(self.keys, values)
+        ])
+        if self.descending:
+            return tuple_(*self.keys) < bound
+        return tuple_(*self.keys) > bound
+
+    def paginate(self, query, cursor: Optional[str], page: int, limit: int):
+        """
+        Order query by the keys and select one page (plus one row to detect the next page).
+        With a cursor the page starts right after it; otherwise page numbers still work through OFFSET.
+        """
+        query = query.order_by(*self.order_by())
+        if cursor:
+            query = query.where(self.after(cursor))
+        else:
+            query = query.offset((page - 1) * limit)
+        return query.limit(limit + 1)
+
+    def split(self, rows: list, limit: int, key_values) -> Tuple[list, Optional[str]]:
+        """(page rows, cursor of the next page or None); key_values(row) returns the row's key values"""
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(list(key_values(rows[-1])))
+
+
+def count_statement(query, mode: str = "exact", table: Optional[str] = None, cap: int = COUNT_ESTIMATE_CAP):
+    """
+    COUNT of a listing query (ordering and paging are ignored).
+
+    "estimate" counts at most cap + 1 rows. For an unfiltered listing pass its
+    table: past the cap the planner's pg_class.reltuples is used instead.
+    """
+    query = query.order_by(None).limit(None).offset(None)
+    if mode != "estimate":
+        return select(func.count()).select_from(query.subquery())
+
+    capped = select(func.count()).select_from(query.limit(cap + 1).subquery()).scalar_subquery()
+    if table is None:
+        return select(capped)
+    planner = (
+        select(text("reltuples::bigint"))
+        .select_from(text("pg_class"))
+        .where(text("oid = CAST(:count_table AS regclass)"), text(f"reltuples > {int(cap)}"))
+        .params(count_table=table)
+        .scalar_subquery()
+    )
+    return select(func.coalesce(planner, capped))
+
+
+def resolve_count(counted: Optional[int], mode: str, cap: int = COUNT_ESTIMATE_CAP) -> Tuple[int, bool]:
+    """(total, is_estimate); an estimated total reads as "about" (planner) or "more than cap" (capped count)"""
+    counted = counted or 0
+    return counted, mode == "estimate" and counted > cap
@@ -1,4 +1,4 @@
-import io
+import os
 import logging
 from celery import shared_task
 import cloudinary
@@ -6,6 +6,12 @@ import cloudinary.uploader
 from sqlalchemy.orm import Session
 from aetherium.models.courses.lesson import LessonContent
 from aetherium.database.db import get_db, SessionLocal
+from aetherium.config import settings
+from aetherium.services.course_graph_cache import bump_content_version, lesson_course
+from aetherium.services.media_storage import get_media_storage
+from aetherium.services.media_index import UPLOAD_RESOURCE_TYPES, MediaIndex
+from aetherium.services.upload_progress import ProgressReader, UploadProgress, read_upload_status, upload_status_response
+from aetherium.utils.upload_staging import StagedUploadError, remove_staged_file
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -15,13 +21,22 @@ def get_celery_db() -> Session:
     return SessionLocal()
 
 @shared_task(bind=True, name='aetherium.utils.tasks.upload_file_task')
-def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str, filename: str):
-    """Enhanced task with proper DB handling"""
+def upload_file_task(self, lesson_id: int, staged_path: str, file_type: str, filename: str,
+                     file_size: int = None, sha256: str = None, user_id: int = None):
+    """
+    Upload a staged lesson file (see utils.upload_staging) and record it.
+    The file is streamed from disk in chunks and removed once the task is done for good.
+    Progress is pushed to user_id's sockets (services.upload_progress).
+    """
     db = None
+    retrying = False
+    progress = UploadProgress(self.request.id, lesson_id, user_id, file_size)
     try:
-        # Create file stream
-        file_stream = io.BytesIO(file_content)
-        file_stream.seek(0)  # Ensure we're at the beginning
+        if not os.path.exists(staged_path):
+            raise StagedUploadError(f"Staged upload {staged_path} not found")
+        if file_size is not None and os.path.getsize(staged_path) != file_size:
+            raise StagedUploadError(f"Staged upload {staged_path} is incomplete")
+        file_size = os.path.getsize(staged_path)
         
         # Prepare upload parameters based on file type
         upload_params = {
@@ -30,12 +45,12 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
             'use_filename': True,
             'unique_filename': True,
             'timeout': 600,  # Increased to 10 minutes for large videos
+            'chunk_size': 6*1024*1024,  # 6MB chunks read from disk
         }
         
         if file_type == "video":
             upload_params.update({
                 'resource_type': 'video',
-                'chunk_size': 6*1024*1024,  # 6MB chunks
                 'eager': [{
                     'width': 400, 
                     'height': 300, 
@@ -54,31 +69,31 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
         else:
             upload_params['resource_type'] = 'auto'
         
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Uploading to Cloudinary...', 'progress': 10}
-        )
+        progress.total_bytes = file_size
+        progress.publish("uploading", bytes_sent=0)
         
-        # Upload to Cloudinary
-        logger.info(f"Starting Cloudinary upload for lesson {lesson_id}, file type: {file_type}")
-        upload_result = cloudinary.uploader.upload(file_stream, **upload_params)
-        
-        # Verify upload succeeded
-        if not all(k in upload_result for k in ['secure_url', 'public_id']):
-            raise ValueError("Invalid Cloudinary response - missing required fields")
-        
-        logger.info(f"Cloudinary upload successful for lesson {lesson_id}")
-        logger.info(f"Cloudinary upload result: {upload_result}")
+        db = get_celery_db()
+        # Same content already on the host: link it instead of transferring it again
+        upload_result = MediaIndex.reuse(db, sha256, file_size, file_type) if sha256 else None
+        duplicate_public_id = None
+        if upload_result is None:
+            # Upload to Cloudinary
+            logger.info(f"Starting Cloudinary upload for lesson {lesson_id}, file type: {file_type}, sha256: {sha256}")
+            with ProgressReader(open(staged_path, "rb"), lambda sent: progress.publish("uploading", bytes_sent=sent)) as staged:
+                upload_result = get_media_storage().upload_large(staged, **upload_params)
+            
+            # Verify upload succeeded
+            if not all(k in upload_result for k in ['secure_url', 'public_id']):
+                raise ValueError("Invalid Cloudinary response - missing required fields")
+            
+            logger.info(f"Cloudinary upload successful for lesson {lesson_id}")
+            logger.info(f"Cloudinary upload result: {upload_result}")
+            if sha256:
+                upload_result, duplicate_public_id = MediaIndex.record_upload(db, sha256, file_size, file_type, upload_result)
         
-        # Update task state
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Updating database...', 'progress': 80}
-        )
+        progress.publish("processing", bytes_sent=file_size)
         
         # Update database
-        db = get_celery_db()
         try:
             # Get or create lesson content
             content = db.query(LessonContent).filter_by(lesson_id=lesson_id).first()
@@ -86,12 +101,15 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
                 content = LessonContent(lesson_id=lesson_id)
                 db.add(content)
             
+            previous_public_id = content.file_public_id
+            previous_resource_type = MediaIndex.resource_type_of(db, previous_public_id, content.file_type) if previous_public_id else None
+            
             # Update basic fields
             content.file_url = upload_result['secure_url']
             logger.info(f"Saving file_url {upload_result.get('secure_url')} to lesson_content for lesson_id {lesson_id}")
             content.file_public_id = upload_result['public_id']
             content.file_type = file_type
-            content.file_size = upload_result.get('bytes', len(file_content))
+            content.file_size = upload_result.get('bytes', file_size)
             content.upload_status = "completed"
             
             # Video-specific fields
@@ -106,7 +124,7 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
                     if eager_results:
                         thumbnail_url = eager_results[0].get('secure_url', '')
                 
-                if not thumbnail_url:
+                if not thumbnail_url and settings.MEDIA_UPLOAD_BACKEND == "cloudinary":
                     # Generate thumbnail URL manually
                     thumbnail_url = cloudinary.CloudinaryImage(
                         upload_result['public_id']
@@ -121,19 +139,37 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
                 
                 content.video_thumbnail = thumbnail_url
             
+            # The replaced file goes with its last reference
+            delete_previous = bool(previous_public_id) and MediaIndex.release(db, previous_public_id) \
+                and previous_public_id != upload_result['public_id']
+            
+            bump_content_version(db, lesson_course(lesson_id))
             db.commit()
             logger.info(f"Database updated successfully for lesson {lesson_id}")
             
-            return {
+            unused = []
+            if duplicate_public_id:
+                unused.append((duplicate_public_id, upload_result.get('resource_type') or UPLOAD_RESOURCE_TYPES.get(file_type, 'raw')))
+            if delete_previous:
+                unused.append((previous_public_id, previous_resource_type))
+            MediaIndex.delete_unused(unused)
+            
+            result = {
                 'status': 'success',
                 'public_id': upload_result['public_id'],
                 'url': upload_result['secure_url'],
                 'lesson_id': lesson_id,
                 'file_type': file_type,
-                'file_size': upload_result.get('bytes', len(file_content)),
+                'file_size': upload_result.get('bytes', file_size),
                 'duration': upload_result.get('duration', 0) if file_type == 'video' else None,
                 'thumbnail': content.video_thumbnail if file_type == 'video' else None
             }
+            progress.publish(
+                "completed", bytes_sent=file_size,
+                url=result['url'], public_id=result['public_id'], file_type=file_type, file_size=result['file_size'],
+                duration=result['duration'], thumbnail=result['thumbnail']
+            )
+            return result
             
         except Exception as db_error:
             db.rollback()
@@ -143,6 +179,7 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
                 content = db.query(LessonContent).filter_by(lesson_id=lesson_id).first()
                 if content:
                     content.upload_status = "failed"
+                    bump_content_version(db, lesson_course(lesson_id))
                     db.commit()
             except:
                 pass
@@ -155,28 +192,41 @@ def upload_file_task(self, lesson_id: int, file_content: bytes, file_type: str,
         # Mark as failed in database if possible
         if db:
             try:
+                # Drop media references taken by this attempt
+                db.rollback()
                 content = db.query(LessonContent).filter_by(lesson_id=lesson_id).first()
                 if content:
                     content.upload_status = "failed"
+                    bump_content_version(db, lesson_course(lesson_id))
                     db.commit()
             except Exception as db_err:
                 logger.error(f"Failed to mark upload as failed: {str(db_err)}")
         
-        # Retry logic
-        if self.request.retries < 3:
+        # Retry logic; a missing or truncated staged file will not get better
+        if self.request.retries < 3 and not isinstance(e, StagedUploadError):
+            retrying = True
+            progress.publish("retrying", error=str(e), retries=self.request.retries + 1)
             raise self.retry(exc=e, countdown=60, max_retries=3)
         else:
+            progress.publish("failed", error=str(e))
             raise Exception(error_msg)
         
     finally:
         if db:
             db.close()
+        # Retries need the staged file; otherwise it is done with
+        if not retrying:
+            remove_staged_file(staged_path)
 
 @shared_task(name='aetherium.utils.tasks.check_upload_status')
 def check_upload_status(task_id: str) -> Dict[str, Any]:
     """Check status of an upload task"""
     from celery.result import AsyncResult
     
+    snapshot = read_upload_status(task_id)
+    if snapshot:
+        return upload_status_response(snapshot)
+
     try:
         result = AsyncResult(task_id)
         
@@ -0,0 +1,221 @@
+# Backend/aetherium/utils/token_blacklist.py
+from redis.asyncio import Redis
+from typing import Optional
+import asyncio
+import hashlib
+import math
+import time
+from aetherium.config import settings
+from aetherium.core.logger import logger
+
+# black:{token} flags the token itself; get_current_user reads it on a possible hit
+BLACKLIST_KEY_PREFIX = "black:"
+# Sorted set of blacklisted token digests scored by expiry (bootstrap + periodic rebuild)
+BLACKLIST_INDEX_KEY = "black:index"
+# Digests published here as soon as a token is blacklisted on any worker
+BLACKLIST_CHANNEL = "auth:blacklist"
+# Full rebuild from the index: drops expired tokens and repairs missed pub/sub messages
+REBUILD_INTERVAL = 60.0
+DEFAULT_CAPACITY = 100_000
+FALSE_POSITIVE_RATE = 0.01
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over hex digests (double hashing on the digest bytes)"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: str):
+        raw = bytes.fromhex(digest)
+        h1 = int.from_bytes(raw[:8], "big")
+        h2 = int.from_bytes(raw[8:16], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest: str) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class TokenBlacklistFilter:
+    """
+    In-process front for the Redis token blacklist.
+
+    A negative answer is definitive, so get_current_user only asks Redis about
+    tokens the filter reports as possibly blacklisted. The filter is built from
+    BLACKLIST_INDEX_KEY (black:* flags are indexed on the first build), kept current through BLACKLIST_CHANNEL and rebuilt every
+    REBUILD_INTERVAL so expired tokens do not accumulate. Until the first build
+    completes every token counts as a possible hit.
+    """
+
+    def __init__(self):
+        self.redis: Optional[Redis] = None
+        self.ready = False
+        self._bloom = BloomFilter()
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_rebuild: Optional[float] = None
+        self._backfilled = False
+        # metrics
+        self.checks = 0
+        self.negatives = 0
+        self.confirmed = 0
+        self.false_positives = 0
+
+    async def start(self, redis: Redis):
+        self.redis = redis
+        self._pubsub = redis.pubsub()
+        try:
+            await self._connect()
+        except Exception as e:
+            # Not fatal: every token counts as a possible hit until the sync loop gets through
+            logger.error(f"Token blacklist filter not built, checking every token in Redis: {e}")
+        self._task = asyncio.create_task(self._sync())
+
+    async def _connect(self):
+        # Subscribe before the build so nothing published in between is lost
+        if not self._pubsub.subscribed:
+            await self._pubsub.subscribe(BLACKLIST_CHANNEL)
+        await self.rebuild()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self.redis = None
+        self.ready = False
+
+    async def backfill(self) -> int:
+        """
+        Index black:{token} flags that predate BLACKLIST_INDEX_KEY (or were written by
+        an older worker), so the filter cannot answer "clean" for them; returns the
+        number of tokens found.
+        """
+        found = 0
+        now = time.time()
+        batch = []
+        async for key in self.redis.scan_iter(match=f"{BLACKLIST_KEY_PREFIX}*", count=1000):
+            if key != BLACKLIST_INDEX_KEY:
+                batch.append(key)
+            if len(batch) >= 1000:
+                found += await self._index_flags(batch, now)
+                batch = []
+        if batch:
+            found += await self._index_flags(batch, now)
+        if found:
+            logger.info(f"Indexed {found} blacklisted tokens from black:* keys")
+        return found
+
+    async def _index_flags(self, keys, now: float) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+            ttls = await pipe.execute()
+        entries = {}
+        for key, ttl in zip(keys, ttls):
+            if ttl == -2:
+                # Expired since the scan
+                continue
+            # No TTL: keep it for the longest an access token can live
+            expires = now + (ttl if ttl > 0 else settings.ACCESS_TOKEN_EXPIRE_MIN * 60)
+            entries[token_digest(key[len(BLACKLIST_KEY_PREFIX):])] = expires
+        if entries:
+            await self.redis.zadd(BLACKLIST_INDEX_KEY, entries)
+        return len(entries)
+
+    async def rebuild(self) -> None:
+        if not self._backfilled:
+            await self.backfill()
+            self._backfilled = True
+        now = time.time()
+        await self.redis.zremrangebyscore(BLACKLIST_INDEX_KEY, "-inf", now)
+        digests = await self.redis.zrange(BLACKLIST_INDEX_KEY, 0, -1)
+        bloom = BloomFilter(capacity=max(DEFAULT_CAPACITY, 2 * len(digests)))
+        for digest in digests:
+            bloom.add(digest)
+        self._bloom = bloom
+        self.ready = True
+        self.last_rebuild = now
+
+    def add(self, digest: str) -> None:
+        self._bloom.add(digest)
+
+    async def _sync(self):
+        next_rebuild = time.monotonic() + (REBUILD_INTERVAL if self.ready else 0)
+        while True:
+            try:
+                if self._pubsub.subscribed:
+                    message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.add(message["data"])
+                if time.monotonic() >= next_rebuild:
+                    await self._connect()
+                    next_rebuild = time.monotonic() + REBUILD_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Missed updates are unsafe: answer "maybe" until the next rebuild succeeds
+                logger.error(f"Token blacklist filter sync error: {e}")
+                self.ready = False
+                next_rebuild = time.monotonic()
+                await asyncio.sleep(1.0)
+
+    def might_contain(self, token: str) -> bool:
+        self.checks += 1
+        if not self.ready:
+            return True
+        if token_digest(token) in self._bloom:
+            return True
+        self.negatives += 1
+        return False
+
+    def record_lookup(self, blacklisted: bool) -> None:
+        """Outcome of the Redis lookup that followed a possible hit"""
+        if not self.ready:
+            return
+        if blacklisted:
+            self.confirmed += 1
+        else:
+            self.false_positives += 1
+
+    def metrics(self) -> dict:
+        clean = self.negatives + self.false_positives
+        return {
+            "ready": self.ready,
+            "insertions": self._bloom.count,
+            "capacity": self._bloom.capacity,
+            "bits": self._bloom.size,
+            "hashes": self._bloom.hashes,
+            "last_rebuild": self.last_rebuild,
+            "checks": self.checks,
+            "negatives": self.negatives,
+            "confirmed": self.confirmed,
+            "false_positives": self.false_positives,
+            "false_positive_rate": self.false_positives / clean if clean else 0.0,
+            "redis_lookups_saved": self.negatives,
+        }
+
+
+blacklist_filter = TokenBlacklistFilter()
+
+def get_blacklist_filter() -> TokenBlacklistFilter:
+    return blacklist_filter
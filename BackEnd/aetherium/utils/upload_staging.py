@@ -0,0 +1,96 @@
+# Backend/aetherium/utils/upload_staging.py
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import tempfile
+import time
+
+from aetherium.config import settings
+from aetherium.core.logger import logger
+
+# Bytes read from the request and written to disk at a time; memory per upload stays at one chunk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Staged files nobody picked up (worker lost, retries exhausted) are swept after this many seconds
+STAGED_FILE_MAX_AGE = 24 * 60 * 60
+
+
+class StagedUploadError(Exception):
+    """The staged file of an upload task is missing or not what was staged"""
+
+
+class StagedFile:
+    """An upload spooled to the staging directory, with its size and SHA-256"""
+
+    def __init__(self, path: str, size: int, sha256: str, filename: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+
+    def head(self, length: int) -> bytes:
+        with open(self.path, "rb") as staged:
+            return staged.read(length)
+
+    def open(self):
+        return open(self.path, "rb")
+
+    def remove(self) -> None:
+        remove_staged_file(self.path)
+
+
+def staging_dir() -> Path:
+    path = Path(settings.UPLOAD_STAGING_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+async def stage_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> StagedFile:
+    """
+    Copy an upload to the staging directory chunk by chunk, hashing as it goes.
+    The caller owns the staged file and removes it (or hands its path to a task that does).
+    """
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(dir=staging_dir(), suffix=Path(file.filename or "").suffix)
+    try:
+        with os.fdopen(fd, "wb") as staged:
+            def write(chunk: bytes) -> None:
+                digest.update(chunk)
+                staged.write(chunk)
+
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                # Hashing and the disk write stay off the event loop
+                await run_in_threadpool(write, chunk)
+            size = staged.tell()
+    except BaseException:
+        remove_staged_file(path)
+        raise
+    return StagedFile(path, size, digest.hexdigest(), file.filename)
+
+
+def remove_staged_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove staged upload {path}: {e}")
+
+
+def purge_stale_staged_files(max_age: int = STAGED_FILE_MAX_AGE) -> int:
+    """Remove staged files older than max_age seconds; returns how many were removed"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in staging_dir().iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove staged upload {path}: {e}")
+    return removed
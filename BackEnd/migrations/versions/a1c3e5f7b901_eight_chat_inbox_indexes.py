@@ -0,0 +1,35 @@
+"""eight chat inbox indexes
+
+Revision ID: a1c3e5f7b901
+Revises: 950e0d7853c1
+Create Date: 2025-08-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b901'
+down_revision: Union[str, None] = '950e0d7853c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_conversations_instructor_id_user_id', 'conversations', ['instructor_id', 'user_id'], unique=False)
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False)
+    op.create_index(
+        'ix_messages_unread', 'messages', ['conversation_id', 'sender_id'],
+        unique=False, postgresql_where=sa.text('is_read = false')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_unread', table_name='messages')
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages')
+    op.drop_index('ix_conversations_instructor_id_user_id', table_name='conversations')
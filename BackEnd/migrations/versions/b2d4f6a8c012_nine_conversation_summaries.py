@@ -0,0 +1,65 @@
+"""nine conversation summaries
+
+Revision ID: b2d4f6a8c012
+Revises: a1c3e5f7b901
+Create Date: 2025-08-21 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c012'
+down_revision: Union[str, None] = 'a1c3e5f7b901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('conversation_summaries',
+        sa.Column('conversation_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_sender_id', sa.Integer(), nullable=True),
+        sa.Column('last_message_type', sa.String(length=20), nullable=True),
+        sa.Column('last_message_preview', sa.String(length=500), nullable=True),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_unread_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('instructor_unread_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['last_message_id'], ['messages.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['last_sender_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('conversation_id')
+    )
+
+    # Backfill from existing messages
+    op.execute("""
+        INSERT INTO conversation_summaries (
+            conversation_id, last_message_id, last_sender_id, last_message_type,
+            last_message_preview, last_message_at, user_unread_count, instructor_unread_count
+        )
+        SELECT c.id, lm.id, lm.sender_id, lm.message_type,
+               CASE WHEN lm.message_type = 'image' THEN left(lm.content, 500) ELSE left(lm.content, 200) END,
+               lm.created_at,
+               COUNT(m.id) FILTER (WHERE m.sender_id != c.user_id),
+               COUNT(m.id) FILTER (WHERE m.sender_id != c.instructor_id)
+        FROM conversations c
+        LEFT JOIN LATERAL (
+            SELECT id, sender_id, message_type, content, created_at
+            FROM messages
+            WHERE conversation_id = c.id
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        ) lm ON true
+        LEFT JOIN messages m ON m.conversation_id = c.id AND m.is_read = false
+        GROUP BY c.id, lm.id, lm.sender_id, lm.message_type, lm.content, lm.created_at
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('conversation_summaries')
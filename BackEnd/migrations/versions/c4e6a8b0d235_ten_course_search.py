@@ -0,0 +1,50 @@
+"""ten course search
+
+Revision ID: c4e6a8b0d235
+Revises: b2d4f6a8c012
+Create Date: 2025-08-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e6a8b0d235'
+down_revision: Union[str, None] = 'b2d4f6a8c012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('courses', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Backfill; same weighting as aetherium.services.search.postgres_backend.course_search_vector
+    op.execute("""
+        UPDATE courses c SET search_vector =
+            setweight(to_tsvector('english', coalesce(c.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(c.subtitle, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(c.description, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(lo.description, ' ') FROM learning_objectives lo WHERE lo.course_id = c.id
+            ), '')), 'D')
+    """)
+
+    op.create_index('ix_courses_search_vector', 'courses', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_courses_title_trgm', 'courses', ['title'],
+        unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_courses_title_trgm', table_name='courses')
+    op.drop_index('ix_courses_search_vector', table_name='courses')
+    op.drop_column('courses', 'search_vector')
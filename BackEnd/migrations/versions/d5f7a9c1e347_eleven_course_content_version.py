@@ -0,0 +1,28 @@
+"""eleven course content version
+
+Revision ID: d5f7a9c1e347
+Revises: c4e6a8b0d235
+Create Date: 2025-08-29 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f7a9c1e347'
+down_revision: Union[str, None] = 'c4e6a8b0d235'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('courses', sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('courses', 'content_version')
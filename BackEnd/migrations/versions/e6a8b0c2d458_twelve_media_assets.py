@@ -0,0 +1,46 @@
+"""twelve media assets
+
+Revision ID: e6a8b0c2d458
+Revises: d5f7a9c1e347
+Create Date: 2025-09-02 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a8b0c2d458'
+down_revision: Union[str, None] = 'd5f7a9c1e347'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_assets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('public_id', sa.String(length=255), nullable=False),
+        sa.Column('secure_url', sa.String(length=500), nullable=False),
+        sa.Column('resource_type', sa.String(length=20), nullable=True),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('thumbnail', sa.String(length=500), nullable=True),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('public_id'),
+        sa.UniqueConstraint('sha256', 'size', 'kind', name='uq_media_assets_content')
+    )
+    op.create_index(op.f('ix_media_assets_id'), 'media_assets', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_assets_id'), table_name='media_assets')
+    op.drop_table('media_assets')
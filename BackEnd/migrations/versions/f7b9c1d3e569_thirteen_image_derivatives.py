@@ -0,0 +1,32 @@
+"""thirteen image derivatives
+
+Revision ID: f7b9c1d3e569
+Revises: e6a8b0c2d458
+Create Date: 2025-09-04 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b9c1d3e569'
+down_revision: Union[str, None] = 'e6a8b0c2d458'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('profile_picture_variants', sa.JSON(), nullable=True))
+    op.add_column('users', sa.Column('profile_picture_blurhash', sa.String(length=64), nullable=True))
+    op.add_column('messages', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('messages', 'image_variants')
+    op.drop_column('users', 'profile_picture_blurhash')
+    op.drop_column('users', 'profile_picture_variants')
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import {
   ContentTypeSelector,
   LessonContentEditor,
@@ -6,6 +6,12 @@ import {
 import AssessmentEditor from "./AssessmentEditor";
 import { Save, X } from "lucide-react";
 import { instructorAPI } from "../../services/instructorApi";
+import { useNotifications } from "../../context/NotificationContext";
+
+// Status polling interval while the notification socket is down
+const UPLOAD_POLL_INTERVAL_MS = 5000;
+// Give up after this long without a final upload event
+const UPLOAD_TRACK_TIMEOUT_MS = 5 * 60 * 1000;
 
 const LessonEditor = ({
   lesson,
@@ -70,6 +76,10 @@ const LessonEditor = ({
   const [errors, setErrors] = useState({});
   const [loading, setLoading] = useState(false);
   const [apiError, setApiError] = useState("");
+  const { subscribeUploadProgress, isSocketConnected } = useNotifications();
+  const stopUploadTracking = useRef(null);
+
+  useEffect(() => () => stopUploadTracking.current?.(), []);
  const [lessonData, setLessonData] = useState(() => {
   if (!lesson) {
     return {
@@ -306,69 +316,88 @@ const LessonEditor = ({
 
         // Check if it's an async upload (has task_id)
         if (uploadResult.task_id) {
-          // Handle async upload with polling
+          // Progress arrives as upload_progress socket events; the status endpoint is polled only while the socket is down
           setApiError("File upload started. Please wait...");
 
-          const pollUploadStatus = async (taskId) => {
-            const maxAttempts = 60; // 5 minutes with 5-second intervals
-            let attempts = 0;
-
-            const poll = async () => {
-              try {
-                const statusResult = await instructorAPI.getUploadStatus(taskId);
-                console.log("The result after saving the file to couldianry returned by getUploadStatus: ",statusResult)
-                if (statusResult.state === "SUCCESS") {
-                  // Upload completed successfully
-                  const finalResult = statusResult.result;
-                  const updatedLesson = {
-                    ...savedLesson,
-                    content: {
-                      ...savedLesson.content,
-                      file_url: finalResult.url,
-                      file_public_id: finalResult.public_id,
-                      file_type: finalResult.file_type,
-                      file_size: finalResult.file_size,
-                      ...(lessonData.content_type === "VIDEO" && {
-                        video_duration: finalResult.duration,
-                        video_thumbnail: finalResult.thumbnail,
-                      }),
-                    },
-                  };
-                  setApiError("");
-                  onSave(updatedLesson);
-                  return;
-                } else if (statusResult.state === "FAILURE") {
-                  // Upload failed
-                  setApiError(`File upload failed: ${statusResult.status}`);
-                  return;
-                } else {
-                  // Still processing
-                  const progress = Math.round(
-                    (statusResult.current / statusResult.total) * 100
-                  );
-                  setApiError(
-                    `Upload progress: ${progress}% - ${statusResult.status}`
-                  );
-
-                  attempts++;
-                  if (attempts < maxAttempts) {
-                    setTimeout(poll, 5000); // Poll every 5 seconds
-                  } else {
-                    setApiError("Upload timeout. Please try again.");
-                  }
-                }
-              } catch (error) {
-                console.error("Error polling upload status:", error);
+          const trackUpload = (taskId) => {
+            let finished = false;
+            let pollTimer = null;
+            let unsubscribe = () => {};
+            const startedAt = Date.now();
+
+            const stop = () => {
+              finished = true;
+              clearTimeout(pollTimer);
+              unsubscribe();
+              stopUploadTracking.current = null;
+            };
+
+            // Socket events carry stage/progress; the status endpoint also reports a Celery state
+            const handleStatus = (statusResult) => {
+              if (finished) return;
+              console.log("Upload status for task", taskId, statusResult);
+              if (statusResult.stage === "completed" || statusResult.state === "SUCCESS") {
+                const finalResult = statusResult.result || statusResult;
+                const updatedLesson = {
+                  ...savedLesson,
+                  content: {
+                    ...savedLesson.content,
+                    file_url: finalResult.url,
+                    file_public_id: finalResult.public_id,
+                    file_type: finalResult.file_type,
+                    file_size: finalResult.file_size,
+                    ...(lessonData.content_type === "VIDEO" && {
+                      video_duration: finalResult.duration,
+                      video_thumbnail: finalResult.thumbnail,
+                    }),
+                  },
+                };
+                stop();
+                setApiError("");
+                onSave(updatedLesson);
+              } else if (statusResult.stage === "failed" || statusResult.state === "FAILURE") {
+                stop();
+                setApiError(`File upload failed: ${statusResult.error || statusResult.status || "unknown error"}`);
+              } else {
+                const progress = statusResult.progress ?? Math.round(
+                  (statusResult.current / statusResult.total) * 100
+                );
                 setApiError(
-                  "Error checking upload status. Please refresh and try again."
+                  `Upload progress: ${progress || 0}% - ${statusResult.stage || statusResult.status || "processing"}`
                 );
               }
             };
 
-            poll();
+            const check = async () => {
+              if (finished) return;
+              if (Date.now() - startedAt > UPLOAD_TRACK_TIMEOUT_MS) {
+                stop();
+                setApiError("Upload timeout. Please try again.");
+                return;
+              }
+              if (!isSocketConnected()) {
+                try {
+                  handleStatus(await instructorAPI.getUploadStatus(taskId));
+                } catch (error) {
+                  console.error("Error polling upload status:", error);
+                }
+              }
+              if (!finished) {
+                pollTimer = setTimeout(check, UPLOAD_POLL_INTERVAL_MS);
+              }
+            };
+
+            stopUploadTracking.current = stop;
+            // May deliver an event that arrived before the subscription right away
+            unsubscribe = subscribeUploadProgress(taskId, handleStatus);
+            if (finished) {
+              unsubscribe();
+              return;
+            }
+            check();
           };
 
-          await pollUploadStatus(uploadResult.task_id);
+          trackUpload(uploadResult.task_id);
         } else {
           // Direct upload completed
           const updatedLesson = {
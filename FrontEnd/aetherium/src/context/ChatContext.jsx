@@ -34,6 +34,7 @@ export const ChatProvider = ({ children, userId }) => {
   const [typingUsers, setTypingUsers] = useState(new Set());
   const [isConnected, setIsConnected] = useState(false);
   const wsRef = useRef(null);
+  const lastEventIdRef = useRef(null); // last replayable event seen, sent on reconnect
   const MAX_RECONNECT_ATTEMPTS = 5;
   const baseWsUrl = import.meta.env.VITE_WS_URL || "ws://localhost:8000";
   const currentConversationRef = useRef(null);
@@ -402,7 +403,8 @@ export const ChatProvider = ({ children, userId }) => {
     if (!userId) return;
 
     const connectWebSocket = () => {
-      const ws = new WebSocket(`${baseWsUrl}/ws/${userId}`);
+      const resume = lastEventIdRef.current ? `?last_event_id=${encodeURIComponent(lastEventIdRef.current)}` : '';
+      const ws = new WebSocket(`${baseWsUrl}/ws/${userId}${resume}`);
       
       ws.onopen = () => {
         console.log('Chat WebSocket connected for user:', userId);
@@ -415,6 +417,9 @@ export const ChatProvider = ({ children, userId }) => {
         try {
           const data = JSON.parse(event.data);
           console.log('🔍 WebSocket message received:', data);
+          if (data.event_id) {
+            lastEventIdRef.current = data.event_id;
+          }
           
           if (data.type === 'chat_message') {
             const message = data.data || data;
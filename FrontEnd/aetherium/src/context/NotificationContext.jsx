@@ -30,15 +30,21 @@
 
 // export const useNotifications = () => useContext(NotificationContext);
 
-import { createContext, useContext, useEffect, useState } from 'react';
+import { createContext, useCallback, useContext, useEffect, useRef, useState } from 'react';
 
 const NotificationContext = createContext();
 
+// Latest upload_progress event kept per task, for editors that subscribe after it arrived
+const MAX_TRACKED_UPLOADS = 50;
+
 export const NotificationProvider = ({ children, userId }) => {
   const [notifications, setNotifications] = useState([]);
   const [toasts, setToasts] = useState([]);
   const baseWsUrl = import.meta.env.VITE_WS_URL;
   console.log("This is the base url from the env ",baseWsUrl)
+  const socketRef = useRef(null);
+  const uploadListeners = useRef(new Map()); // taskId -> handler
+  const uploadEvents = useRef(new Map()); // taskId -> latest upload_progress data
   
   const showToast = (message, type = 'info') => {
     const id = Date.now();
@@ -56,11 +62,41 @@ export const NotificationProvider = ({ children, userId }) => {
     setToasts(prev => prev.filter(t => t.id !== id));
   };
 
+  // Upload progress pushed by the server; callers poll only while this is false
+  const isSocketConnected = useCallback(
+    () => socketRef.current?.readyState === WebSocket.OPEN,
+    []
+  );
+
+  // Receive upload_progress events of one upload task; returns the unsubscribe function
+  const subscribeUploadProgress = useCallback((taskId, handler) => {
+    uploadListeners.current.set(taskId, handler);
+    const latest = uploadEvents.current.get(taskId);
+    if (latest) handler(latest);
+    return () => {
+      uploadListeners.current.delete(taskId);
+      uploadEvents.current.delete(taskId);
+    };
+  }, []);
+
+  const handleUploadProgress = (progress) => {
+    if (!progress?.task_id) return;
+    const events = uploadEvents.current;
+    events.delete(progress.task_id);
+    events.set(progress.task_id, progress);
+    if (events.size > MAX_TRACKED_UPLOADS) {
+      events.delete(events.keys().next().value);
+    }
+    const handler = uploadListeners.current.get(progress.task_id);
+    if (handler) handler(progress);
+  };
+
   useEffect(() => {
     if (!userId) return;
 
     // WebSocket connection
     const ws = new WebSocket(`${baseWsUrl}/ws/${userId}`);
+    socketRef.current = ws;
     ws.onmessage = (event) => console.log("Received:", event.data);
     
     ws.onopen = () => {
@@ -77,9 +113,12 @@ export const NotificationProvider = ({ children, userId }) => {
           // This is a regular notification
           setNotifications(prev => [data, ...prev]);
           showToast(data.message, 'info');
-        } else if (data.type === 'pong') {
-          // Handle pong response
-          console.log('WebSocket pong received');
+        } else if (data.type === 'upload_progress') {
+          // Lesson file uploads; delivered to the editor tracking the task
+          handleUploadProgress(data.data);
+        } else if (data.type === 'pong' || data.type === 'replay_complete') {
+          // Heartbeat / end of reconnect replay, nothing to show
+          console.log('WebSocket control frame received:', data.type);
         } else if (data.type === 'chat_message' || data.type === 'typing_start' || data.type === 'typing_stop') {
           // These are handled by ChatContext, ignore here
           console.log('Chat message received in NotificationContext, ignoring');
@@ -102,6 +141,9 @@ export const NotificationProvider = ({ children, userId }) => {
     };
     
     return () => {
+      if (socketRef.current === ws) {
+        socketRef.current = null;
+      }
       if (ws.readyState === WebSocket.OPEN) {
         ws.close();
       }
@@ -114,7 +156,9 @@ export const NotificationProvider = ({ children, userId }) => {
       setNotifications, 
       toasts, 
       showToast, 
-      removeToast 
+      removeToast,
+      isSocketConnected,
+      subscribeUploadProgress
     }}>
       {children}
       <ToastContainer toasts={toasts} removeToast={removeToast} />
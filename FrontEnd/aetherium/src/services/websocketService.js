@@ -5,6 +5,7 @@ class WebSocketService {
     this.typingHandlers = new Map(); // userId -> typing handler function
     this.baseWsUrl = import.meta.env.VITE_WS_URL || "ws://localhost:8000";
     this.reconnectAttempts = new Map(); // userId -> reconnect count
+    this.lastEventIds = new Map(); // userId -> last replayable event id, sent on reconnect
     this.maxReconnectAttempts = 10; // Increased for production
     this.heartbeatInterval = null;
     this.heartbeatIntervalMs = 30000; // 30 seconds
@@ -28,7 +29,9 @@ class WebSocketService {
     const isProduction = window.location.protocol === 'https:';
     const wsProtocol = isProduction ? 'wss:' : 'ws:';
     const wsHost = isProduction ? 'api.aetherium.wiki' : 'localhost:8000';
-    const wsUrl = `${wsProtocol}//${wsHost}/ws/${userId}`;
+    const lastEventId = this.lastEventIds.get(userId);
+    const resume = lastEventId ? `?last_event_id=${encodeURIComponent(lastEventId)}` : '';
+    const wsUrl = `${wsProtocol}//${wsHost}/ws/${userId}${resume}`;
     
     console.log(`Connecting to WebSocket: ${wsUrl}`);
     
@@ -58,6 +61,9 @@ class WebSocketService {
       try {
         const data = JSON.parse(event.data);
         console.log(`WebSocket message received for user ${userId}:`, data);
+        if (data.event_id) {
+          this.lastEventIds.set(userId, data.event_id);
+        }
         
         if (data.type === 'pong') {
           console.log(`WebSocket pong received for user: ${userId}`);